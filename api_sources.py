@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+API源管理模块
+从服务器获取API源列表并缓存到本地，启动时优先使用缓存并在后台刷新
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+try:
+    from config import CONFIG, Config
+except ImportError:
+    CONFIG = {
+        "auth_token": "wcnmd91jb",
+        "server_url": "https://dlbkltos.s7123.xyz:5080/api/sources",
+        "api_endpoints": [],
+        "batch_config": {"name": "qyuing", "enabled": True}
+    }
+
+    class Config:
+        SOURCE_CACHE_CONFIG = {
+            "enabled": True,
+            "cache_file": "api_sources.json",
+            "ttl": 3600
+        }
+
+
+def parse_sources(sources: List[Dict[str, Any]]):
+    """
+    解析服务器返回的API源
+
+    Returns:
+        (api_endpoints, batch_config)，batch_config为批量下载源的配置，没有时为None
+    """
+    api_endpoints = []
+    batch_config = None
+
+    for source in sources:
+        if not source.get("enabled"):
+            continue
+        if source["name"] == CONFIG["batch_config"]["name"]:
+            base_url = source["single_url"].split('?')[0]
+            batch_endpoint = base_url.split('/')[-1]
+            base_url = base_url.rsplit('/', 1)[0] if '/' in base_url else base_url
+
+            batch_config = {
+                "base_url": base_url,
+                "batch_endpoint": f"/{batch_endpoint}",
+                "token": source.get("token", ""),
+                "enabled": True
+            }
+        else:
+            endpoint = {"url": source["single_url"], "name": source["name"]}
+            if source["name"] == "fanqie_sdk":
+                endpoint["params"] = source.get("params", {})
+                endpoint["data"] = source.get("data", {})
+            api_endpoints.append(endpoint)
+
+    return api_endpoints, batch_config
+
+
+def apply_sources(api_endpoints: List[Dict[str, Any]], batch_config: Optional[Dict[str, Any]]):
+    """将解析后的API源写入全局配置"""
+    CONFIG["api_endpoints"] = api_endpoints
+    if batch_config:
+        CONFIG["batch_config"].update(batch_config)
+
+
+class ApiSourceLoader:
+    """API源加载器，带本地TTL缓存"""
+
+    def __init__(self, session: Optional[requests.Session] = None,
+                 logger: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            session: 请求使用的会话
+            logger: 日志函数
+        """
+        cache_config = Config.SOURCE_CACHE_CONFIG
+        self.enabled = cache_config["enabled"]
+        self.cache_file = cache_config["cache_file"]
+        self.ttl = cache_config["ttl"]
+        self.session = session or requests.Session()
+        self.logger = logger or print
+        self._refresh_thread = None
+
+    def fetch(self, headers: Dict[str, str]) -> bool:
+        """从服务器获取API列表，成功后写入配置和缓存"""
+        try:
+            headers = dict(headers)
+            headers["X-Auth-Token"] = CONFIG["auth_token"]
+
+            response = self.session.get(
+                CONFIG["server_url"],
+                headers=headers,
+                timeout=10,
+                verify=False
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                api_endpoints, batch_config = parse_sources(data.get("sources", []))
+                apply_sources(api_endpoints, batch_config)
+                self.save_cache(api_endpoints, batch_config)
+
+                self.logger("成功从服务器获取API列表!")
+                return True
+            else:
+                self.logger(f"获取API列表失败，状态码: {response.status_code}")
+        except Exception as e:
+            self.logger(f"获取API列表异常: {str(e)}")
+        return False
+
+    def load(self, headers_factory: Callable[[], Dict[str, str]]) -> bool:
+        """
+        加载API源
+
+        缓存有效时直接使用并在后台刷新；缓存过期或缺失时同步请求服务器，
+        请求失败再退回过期缓存。
+
+        Args:
+            headers_factory: 生成请求头的函数
+        """
+        cache = self.load_cache()
+        if cache and self._is_fresh(cache):
+            apply_sources(cache["api_endpoints"], cache.get("batch_config"))
+            self._refresh_thread = threading.Thread(
+                target=self.fetch, args=(headers_factory(),), daemon=True
+            )
+            self._refresh_thread.start()
+            return True
+
+        if self.fetch(headers_factory()):
+            return True
+
+        if cache:
+            self.logger("服务器不可用，使用过期的API列表缓存")
+            apply_sources(cache["api_endpoints"], cache.get("batch_config"))
+            return True
+        return False
+
+    def load_cache(self) -> Optional[Dict[str, Any]]:
+        """读取本地缓存"""
+        if not self.enabled or not os.path.exists(self.cache_file):
+            return None
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+            if isinstance(cache, dict) and isinstance(cache.get("api_endpoints"), list):
+                return cache
+        except Exception as e:
+            self.logger(f"读取API列表缓存失败: {str(e)}")
+        return None
+
+    def save_cache(self, api_endpoints: List[Dict[str, Any]], batch_config: Optional[Dict[str, Any]]):
+        """写入本地缓存"""
+        if not self.enabled:
+            return
+        cache = {
+            "fetched_at": time.time(),
+            "api_endpoints": api_endpoints,
+            "batch_config": batch_config
+        }
+        try:
+            temp_file = self.cache_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False, indent=2)
+            os.replace(temp_file, self.cache_file)
+        except Exception as e:
+            self.logger(f"保存API列表缓存失败: {str(e)}")
+
+    def _is_fresh(self, cache: Dict[str, Any]) -> bool:
+        """缓存是否在有效期内"""
+        return time.time() - cache.get("fetched_at", 0) < self.ttl
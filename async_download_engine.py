@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+异步下载引擎模块
+基于asyncio的单章下载引擎，用少量线程维持大量并发请求
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import aiohttp
+except ImportError:
+    # aiohttp为可选依赖，未安装时调用方回退到线程池模式
+    aiohttp = None
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        REQUEST_TIMEOUT = 15
+        ASYNC_CONFIG = {"max_concurrency": 200}
+
+
+class AsyncDownloadEngine:
+    """异步章节下载引擎"""
+
+    def __init__(self, build_requests: Callable[[str], List[Tuple[str, Optional[Dict[str, Any]]]]],
+                 parse_response: Callable[[str, str, int, str], Optional[Tuple[str, str]]],
+                 max_concurrency: Optional[int] = None,
+                 timeout: Optional[float] = None,
+                 is_cancelled: Optional[Callable[[], bool]] = None,
+                 rate_limiter=None,
+                 record_attempt: Optional[Callable[[str, float, bool], None]] = None,
+                 hedge_policy=None,
+                 breakers=None,
+                 fallback: Optional[Callable[[str], Optional[Tuple[str, str]]]] = None):
+        """
+        初始化异步下载引擎
+
+        Args:
+            build_requests: 根据章节ID生成按顺序尝试的请求列表 [(api_name, request), ...]
+            parse_response: 解析响应 (api_name, chapter_id, status_code, text) -> (title, content) 或 None
+            max_concurrency: 同时在途的最大请求数
+            timeout: 单个请求超时时间（秒）
+            is_cancelled: 返回是否已取消下载的函数
+            rate_limiter: 可选的令牌桶限速器（rate_limiter.RateLimiter）
+            record_attempt: 每次端点请求后的回调 (api_name, latency, success)，用于端点统计
+            hedge_policy: 可选的对冲策略（hedging.HedgePolicy）
+            breakers: 可选的端点熔断器（circuit_breaker.CircuitBreakerManager）
+            fallback: 可选的后备下载 chapter_id -> (title, content) 或 None，所有端点都失败后在线程池中调用
+        """
+        self.build_requests = build_requests
+        self.parse_response = parse_response
+        self.max_concurrency = max_concurrency or Config.ASYNC_CONFIG["max_concurrency"]
+        self.timeout = timeout or Config.REQUEST_TIMEOUT
+        self.is_cancelled = is_cancelled or (lambda: False)
+        self.rate_limiter = rate_limiter
+        self.record_attempt = record_attempt
+        self.hedge_policy = hedge_policy
+        self.breakers = breakers
+        self.fallback = fallback
+
+    @staticmethod
+    def is_available() -> bool:
+        """是否可以使用异步引擎（需要安装aiohttp）"""
+        return aiohttp is not None
+
+    def download(self, chapters: List[Dict[str, Any]], headers: Dict[str, str],
+                 on_result: Callable[[Dict[str, Any], Optional[str], Optional[str]], None],
+                 on_progress: Optional[Callable[[int, int], None]] = None):
+        """
+        并发下载一组章节，阻塞直到全部完成
+
+        Args:
+            chapters: 章节列表
+            headers: 请求头
+            on_result: 每个章节完成时回调 (chapter, title, content)，失败时title和content为None；
+                在单独的结果线程中按完成顺序逐个调用，可以执行写入内容库、文件等阻塞操作
+            on_progress: 进度回调 (completed, total)，与 on_result 在同一线程中调用
+        """
+        if not chapters:
+            return
+        if not self.is_available():
+            raise RuntimeError("异步下载引擎需要安装aiohttp")
+        asyncio.run(self._download_all(chapters, headers, on_result, on_progress))
+
+    async def _download_all(self, chapters, headers, on_result, on_progress):
+        """下载全部章节"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, ssl=False)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        loop = asyncio.get_running_loop()
+        # 回调中的内容库和文件写入是阻塞操作，放到单个结果线程中依次执行，不阻塞在途请求
+        result_executor = ThreadPoolExecutor(max_workers=1)
+
+        def deliver(chapter, title, content, completed):
+            on_result(chapter, title, content)
+            if on_progress:
+                on_progress(completed, len(chapters))
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            tasks = [
+                asyncio.ensure_future(self._download_chapter(session, semaphore, chapter, headers))
+                for chapter in chapters
+            ]
+
+            completed = 0
+            try:
+                for future in asyncio.as_completed(tasks):
+                    chapter, title, content = await future
+                    completed += 1
+                    await loop.run_in_executor(result_executor, deliver, chapter, title, content, completed)
+                    if self.is_cancelled():
+                        break
+            finally:
+                for task in tasks:
+                    task.cancel()
+                result_executor.shutdown(wait=True)
+
+    async def _download_chapter(self, session, semaphore, chapter, headers):
+        """按端点顺序下载单个章节"""
+        chapter_id = chapter["id"]
+        async with semaphore:
+            chapter_requests = self.build_requests(chapter_id)
+            hedged_names = set()
+            for idx, (api_name, request) in enumerate(chapter_requests):
+                if self.is_cancelled():
+                    break
+                if request is None or api_name in hedged_names:
+                    continue
+                if self.breakers and not self.breakers.get(api_name).allow_request():
+                    continue
+
+                backup = None
+                if self.hedge_policy:
+                    backup = next((item for item in chapter_requests[idx + 1:]
+                                   if item[1] is not None
+                                   and (not self.breakers or self.breakers.is_closed(item[0]))), None)
+
+                if backup:
+                    result, backup_used = await self._attempt_hedged(session, (api_name, request), backup,
+                                                                     chapter_id, headers)
+                    if backup_used:
+                        hedged_names.add(backup[0])
+                else:
+                    result = await self._attempt(session, api_name, request, chapter_id, headers)
+
+                if result is not None:
+                    title, content = result
+                    return chapter, title, content
+
+            if self.fallback and not self.is_cancelled():
+                try:
+                    result = await asyncio.get_running_loop().run_in_executor(None, self.fallback, chapter_id)
+                except Exception:
+                    result = None
+                if result is not None:
+                    title, content = result
+                    return chapter, title, content
+
+        return chapter, None, None
+
+    async def _attempt(self, session, api_name, request, chapter_id, headers):
+        """请求单个端点，返回 (title, content) 或 None"""
+        if self.rate_limiter:
+            wait = self.rate_limiter.reserve(api_name, request["url"])
+            if wait > 0:
+                await asyncio.sleep(wait)
+        if self.hedge_policy:
+            self.hedge_policy.record_request()
+
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        try:
+            async with session.request(
+                request["method"],
+                request["url"],
+                headers=headers.copy(),
+                params=request.get("params"),
+                json=request.get("data")
+            ) as response:
+                text = await response.text()
+                status = response.status
+            # 解析和正文处理是阻塞的CPU工作（可能还要等待进程池），放到线程中执行，不阻塞事件循环
+            result = await loop.run_in_executor(None, self.parse_response, api_name, chapter_id, status, text)
+        except Exception:
+            # 网络或解析异常都视为该端点失败
+            result = None
+
+        if self.record_attempt:
+            self.record_attempt(api_name, loop.time() - start_time, result is not None)
+        if self.breakers:
+            if result is not None:
+                self.breakers.get(api_name).record_success()
+            else:
+                self.breakers.get(api_name).record_failure()
+        return result
+
+    async def _attempt_hedged(self, session, primary, backup, chapter_id, headers):
+        """
+        对冲请求：主端点超过其p95延迟仍未返回时向备用端点发送重复请求，
+        先返回有效内容的一方胜出，另一方被取消
+
+        Returns:
+            (result, backup_used)
+        """
+        api_name, request = primary
+        primary_task = asyncio.ensure_future(self._attempt(session, api_name, request, chapter_id, headers))
+
+        delay = self.hedge_policy.hedge_delay(api_name)
+        if delay is not None:
+            done, _ = await asyncio.wait({primary_task}, timeout=delay)
+            if not done and self.hedge_policy.try_acquire():
+                backup_name, backup_request = backup
+                backup_task = asyncio.ensure_future(
+                    self._attempt(session, backup_name, backup_request, chapter_id, headers)
+                )
+                pending = {primary_task, backup_task}
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        result = task.result()
+                        if result is not None:
+                            for other in pending:
+                                other.cancel()
+                            return result, True
+                return None, True
+
+        return await primary_task, False
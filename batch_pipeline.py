@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+批量下载流水线模块
+同时保持多个批量请求在途，按完成顺序逐批返回结果
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+
+def pipeline_batches(batches: Union[List[List[Dict[str, Any]]], Callable[[], Optional[List[Dict[str, Any]]]]],
+                     fetch: Callable[[List[str]], Any],
+                     depth: int = 1,
+                     is_cancelled: Optional[Callable[[], bool]] = None,
+                     rate_limiter=None,
+                     rate_key: Tuple[str, str] = ("batch", "")) -> Iterator[Tuple[List[Dict[str, Any]], Any]]:
+    """
+    流水线下载多个批次
+
+    Args:
+        batches: 章节批次列表，或返回下一个批次的函数（暂时没有批次时返回None，
+            每个请求完成后会再次调用，因此可以在迭代过程中追加批次）
+        fetch: 批量请求函数 (item_ids) -> 结果，失败返回None
+        depth: 同时在途的批量请求数
+        is_cancelled: 返回是否已取消的函数，取消后不再发送新请求
+        rate_limiter: 可选的令牌桶限速器（rate_limiter.RateLimiter），每个批量请求占用一个令牌
+        rate_key: 限速使用的 (端点名称, URL)
+
+    Yields:
+        (batch, result)，按请求完成的顺序
+    """
+    is_cancelled = is_cancelled or (lambda: False)
+    depth = max(1, depth)
+    if callable(batches):
+        next_batch = batches
+    else:
+        remaining = iter(batches)
+        next_batch = lambda: next(remaining, None)
+
+    def fetch_batch(batch):
+        if rate_limiter:
+            rate_limiter.acquire(*rate_key)
+        return fetch([chap["id"] for chap in batch])
+
+    executor = ThreadPoolExecutor(max_workers=depth)
+    pending = {}
+    try:
+        while True:
+            while len(pending) < depth and not is_cancelled():
+                batch = next_batch()
+                if batch is None:
+                    break
+                pending[executor.submit(fetch_batch, batch)] = batch
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception:
+                    result = None
+                yield batch, result
+    finally:
+        # 提前退出（取消或调用方停止迭代）时不等待在途请求
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+自适应批量大小模块
+按响应时间和响应体积调整每个批量端点的批次大小并持久化；响应无法解析或缺少章节时对半拆分重试，
+端点本身失败时整批回退到单章下载
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        BATCH_CONFIG = {"max_batch_size": 290}
+        ADAPTIVE_BATCH_CONFIG = {
+            "enabled": True,
+            "min_size": 10,
+            "target_latency": 5.0,
+            "max_payload_chars": 4 * 1024 * 1024,
+            "increase_factor": 1.25,
+            "decrease_factor": 0.5,
+            "bisect": True,
+            "max_splits": 16,
+            "stats_file": "batch_sizes.json"
+        }
+
+
+class BatchEndpointError(Exception):
+    """批量端点本身失败（连接错误、超时、非200响应），拆分批次重试无济于事"""
+
+
+class EndpointFailure:
+    """BatchScheduler.timed 包装的请求遇到 BatchEndpointError 时返回的结果，布尔值为False"""
+
+    def __bool__(self):
+        return False
+
+
+ENDPOINT_FAILURE = EndpointFailure()
+
+
+def payload_size(results: Any) -> int:
+    """批量结果的正文字符数，结果的值可以是正文或正文长度"""
+    if not isinstance(results, dict):
+        return 0
+    total = 0
+    for content in results.values():
+        if isinstance(content, dict):
+            content = content.get("content", "")
+        if isinstance(content, str):
+            total += len(content)
+        elif isinstance(content, int):
+            total += content
+    return total
+
+
+def _has_content(value: Any) -> bool:
+    if isinstance(value, dict):
+        value = value.get("content")
+    return bool(value)
+
+
+class BatchSizer:
+    """按端点维护批量大小"""
+
+    def __init__(self, max_size: Optional[int] = None, stats_file: Optional[str] = None):
+        """
+        Args:
+            max_size: 批量大小上限（接口允许的最大值）
+            stats_file: 批量大小保存文件
+        """
+        config = Config.ADAPTIVE_BATCH_CONFIG
+        self.enabled = config["enabled"]
+        self.max_size = max_size or Config.BATCH_CONFIG["max_batch_size"]
+        self.min_size = min(config["min_size"], self.max_size)
+        self.target_latency = config["target_latency"]
+        self.max_payload_chars = config["max_payload_chars"]
+        self.increase_factor = config["increase_factor"]
+        self.decrease_factor = config["decrease_factor"]
+        self.stats_file = stats_file or config["stats_file"]
+        self._sizes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def size(self, name: str) -> int:
+        """端点当前的批量大小"""
+        if not self.enabled:
+            return self.max_size
+        with self._lock:
+            return self._sizes.get(name, self.max_size)
+
+    def record(self, name: str, batch_size: int, latency: float, payload_chars: int, success: bool):
+        """
+        根据一次批量请求的结果调整批量大小
+
+        响应过慢或过大时缩小；满批次快速成功且体积较小时放大；
+        快速失败通常是个别章节的问题（由拆分处理），不调整大小。
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            current = self._sizes.get(name, self.max_size)
+            too_slow = latency > self.target_latency
+            if too_slow or (success and payload_chars > self.max_payload_chars):
+                current = max(self.min_size, int(current * self.decrease_factor))
+            elif (success and batch_size >= current
+                  and latency < self.target_latency / 2
+                  and payload_chars < self.max_payload_chars / 2):
+                current = min(self.max_size, max(current + 1, int(current * self.increase_factor)))
+            self._sizes[name] = current
+
+    def load(self):
+        """从文件加载上次运行的批量大小"""
+        if not self.enabled or not os.path.exists(self.stats_file):
+            return
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                with self._lock:
+                    self._sizes = {
+                        name: min(self.max_size, max(self.min_size, size))
+                        for name, size in data.items() if isinstance(size, int)
+                    }
+        except Exception as e:
+            print(f"加载批量大小失败: {str(e)}")
+
+    def save(self):
+        """保存批量大小"""
+        if not self.enabled:
+            return
+        try:
+            with self._lock:
+                data = dict(self._sizes)
+            temp_file = self.stats_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(temp_file, self.stats_file)
+        except Exception as e:
+            print(f"保存批量大小失败: {str(e)}")
+
+
+class BatchScheduler:
+    """按当前批量大小切分待下载章节，响应无法解析或缺少章节时拆分后重新排队"""
+
+    def __init__(self, chapters: List[Dict[str, Any]], sizer: BatchSizer, name: str):
+        """
+        Args:
+            chapters: 待下载章节
+            sizer: 批量大小管理器
+            name: 批量端点名称
+        """
+        config = Config.ADAPTIVE_BATCH_CONFIG
+        self.chapters = chapters
+        self.sizer = sizer
+        self.name = name
+        self.bisect = config["bisect"]
+        self.max_splits = config["max_splits"]
+        self.splits = 0
+        # 已得到结果（成功或转为单章下载）的章节数
+        self.resolved = 0
+        self._position = 0
+        self._retry = deque()
+        self._lock = threading.Lock()
+
+    def next_batch(self) -> Optional[List[Dict[str, Any]]]:
+        """下一个待请求的批次，暂时没有时返回None；拆分出的批次优先"""
+        with self._lock:
+            if self._retry:
+                return self._retry.popleft()
+            if self._position >= len(self.chapters):
+                return None
+            size = self.sizer.size(self.name)
+            batch = self.chapters[self._position:self._position + size]
+            self._position += len(batch)
+            return batch
+
+    def split(self, batch: List[Dict[str, Any]]) -> bool:
+        """将批次对半拆分重新排队；无法再拆分或本次运行的拆分次数用完时返回False"""
+        if not self.bisect or len(batch) <= 1:
+            return False
+        middle = len(batch) // 2
+        with self._lock:
+            if self.splits >= self.max_splits:
+                return False
+            self.splits += 1
+            self._retry.append(batch[:middle])
+            self._retry.append(batch[middle:])
+        return True
+
+    def resolve(self, batch: List[Dict[str, Any]], results: Any) -> List[Dict[str, Any]]:
+        """
+        处理一个批次的结果，返回需要转为单章下载的章节
+
+        端点本身失败时整批转为单章下载，拆分只会成倍增加对失效端点的请求；
+        响应无法解析（results为None）或缺少部分章节时，没有拿到内容的章节拆分后重新排队。
+
+        Args:
+            batch: 请求的批次
+            results: {item_id: 正文或正文长度}，ENDPOINT_FAILURE 或 None
+        """
+        if isinstance(results, EndpointFailure):
+            missing, requeued = batch, False
+        else:
+            received = results if isinstance(results, dict) else {}
+            missing = [chap for chap in batch if not _has_content(received.get(chap["id"]))]
+            requeued = bool(missing) and self.split(missing)
+        with self._lock:
+            self.resolved += len(batch) - (len(missing) if requeued else 0)
+        return [] if requeued else missing
+
+    def timed(self, fetch: Callable[[List[str]], Any]) -> Callable[[List[str]], Any]:
+        """
+        包装批量请求函数，记录耗时和响应体积用于调整批量大小
+
+        fetch 抛出 BatchEndpointError 时返回 ENDPOINT_FAILURE。
+        """
+        def fetch_and_record(item_ids):
+            start_time = time.time()
+            results = None
+            try:
+                results = fetch(item_ids)
+                return results
+            except BatchEndpointError:
+                results = ENDPOINT_FAILURE
+                return results
+            finally:
+                self.sizer.record(self.name, len(item_ids), time.time() - start_time,
+                                  payload_size(results), bool(results))
+        return fetch_and_record
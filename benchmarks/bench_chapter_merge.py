@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+章节列表合并基准测试
+用合成目录比较逐个线性查找（改动前）与按章节ID索引合并的耗时随章节数的增长
+
+用法: python benchmarks/bench_chapter_merge.py [最大章节数]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from download_engine import DownloadEngine
+
+# 线性查找版本超过这个章节数时耗时过长，不再测量
+_LINEAR_LIMIT = 10000
+
+
+def _synthetic_directory(count):
+    """合成目录：网页章节缺少约1%，并有少量重复ID"""
+    chapter_ids = [str(7000000000000000000 + i) for i in range(count)]
+    rng = random.Random(count)
+    chapters = [{"id": chapter_id, "title": f"第{i + 1}章 标题{i}"}
+                for i, chapter_id in enumerate(chapter_ids) if rng.random() > 0.01]
+    chapters.extend(rng.sample(chapters, min(10, len(chapters))))
+    return chapters, chapter_ids
+
+
+def _linear_merge(chapters, chapter_ids):
+    """改动前的合并：每个章节ID在网页章节列表中线性查找"""
+    final_chapters = []
+    for idx, chapter_id in enumerate(chapter_ids):
+        web_chapter = next((ch for ch in chapters if ch["id"] == chapter_id), None)
+        title = web_chapter["title"] if web_chapter else f"第{idx+1}章"
+        final_chapters.append({"id": chapter_id, "title": title, "index": idx})
+    return final_chapters
+
+
+def _indexed_merge(chapters, chapter_ids):
+    # _merge_chapters 不使用实例状态
+    return DownloadEngine._merge_chapters(None, chapters, chapter_ids)
+
+
+def _measure(merge, chapters, chapter_ids):
+    start = time.perf_counter()
+    result = merge(chapters, chapter_ids)
+    return result, time.perf_counter() - start
+
+
+def main():
+    largest = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    sizes = [size for size in (1250, 2500, 5000, 10000, 20000) if size <= largest] or [largest]
+
+    print(f"{'章节数':>8} {'线性查找(秒)':>14} {'索引合并(秒)':>14}")
+    for size in sizes:
+        chapters, chapter_ids = _synthetic_directory(size)
+        indexed, indexed_time = _measure(_indexed_merge, chapters, chapter_ids)
+        if size <= _LINEAR_LIMIT:
+            linear, linear_time = _measure(_linear_merge, chapters, chapter_ids)
+            if linear != indexed:
+                raise SystemExit(f"{size} 章：两种合并结果不一致")
+            linear_text = f"{linear_time:.3f}"
+        else:
+            linear_text = "-"
+        print(f"{size:>8} {linear_text:>14} {indexed_time:>14.4f}")
+
+
+if __name__ == '__main__':
+    main()
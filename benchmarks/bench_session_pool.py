@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+连接池基准测试
+对本地桩服务器下载章节，比较每次请求新建Session与共享连接池Session的握手次数和吞吐量
+
+用法: python benchmarks/bench_session_pool.py [章节数] [线程数]
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from network import create_pooled_session
+
+_connections = 0
+_connections_lock = threading.Lock()
+
+
+class _ChapterHandler(BaseHTTPRequestHandler):
+    """返回固定章节内容的HTTP/1.1桩服务，每个新连接计一次握手"""
+    protocol_version = 'HTTP/1.1'
+    # 头部和正文分两次写出，不关闭Nagle时长连接会被延迟ACK拖慢
+    disable_nagle_algorithm = True
+    body = ('{"code": 0, "data": {"content": "' + '字' * 3000 + '"}}').encode('utf-8')
+
+    def setup(self):
+        global _connections
+        with _connections_lock:
+            _connections += 1
+        super().setup()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _run(url, chapters, workers, get):
+    global _connections
+    _connections = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for response in executor.map(lambda i: get(f"{url}/content?item_id={i}"), range(chapters)):
+            response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    return _connections, elapsed
+
+
+def main():
+    chapters = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _ChapterHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}"
+
+    def new_session_get(target):
+        # 改动前：每次请求新建Session
+        with requests.Session() as session:
+            return session.get(target, timeout=10)
+
+    pooled = create_pooled_session()
+
+    def pooled_get(target):
+        return pooled.get(target, timeout=10)
+
+    print(f"章节数: {chapters}, 线程数: {workers}")
+    for name, get in (("每次新建Session", new_session_get), ("共享连接池", pooled_get)):
+        connections, elapsed = _run(url, chapters, workers, get)
+        print(f"{name}: 握手 {connections / chapters:.3f} 次/章, {chapters / elapsed:.0f} 章/秒")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
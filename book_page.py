@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+书籍页面缓存模块
+一次下载中只请求并解析一次书籍页面，章节列表和书名、作者、简介共用同一份解析结果
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import bs4
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        BOOK_PAGE_CACHE_CONFIG = {
+            "enabled": True,
+            "ttl": 300,
+            "max_entries": 8
+        }
+
+
+BOOK_PAGE_URL = 'https://fanqienovel.com/page/{book_id}'
+
+
+def parse_book_info(soup: bs4.BeautifulSoup) -> Tuple[str, str, str]:
+    """从书籍页面解析书名、作者、简介"""
+    name_element = soup.find('h1')
+    name = name_element.text if name_element else "未知书名"
+
+    author_name = "未知作者"
+    author_name_element = soup.find('div', class_='author-name')
+    if author_name_element:
+        author_name_span = author_name_element.find('span', class_='author-name-text')
+        if author_name_span:
+            author_name = author_name_span.text
+
+    description = "无简介"
+    description_element = soup.find('div', class_='page-abstract-content')
+    if description_element:
+        description_p = description_element.find('p')
+        if description_p:
+            description = description_p.text
+
+    return name, author_name, description
+
+
+class BookPage:
+    """解析后的书籍页面"""
+
+    def __init__(self, book_id: str, soup: bs4.BeautifulSoup):
+        self.book_id = book_id
+        self.soup = soup
+        self.fetched_at = time.monotonic()
+        self._info = None
+        self._chapters: Dict[Any, Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def info(self) -> Tuple[str, str, str]:
+        """书名、作者、简介"""
+        with self._lock:
+            if self._info is None:
+                self._info = parse_book_info(self.soup)
+            return self._info
+
+    def chapters(self, extract: Callable[[bs4.BeautifulSoup], Any]) -> Any:
+        """用给定的解析函数提取章节列表，结果按解析函数缓存"""
+        with self._lock:
+            if extract not in self._chapters:
+                self._chapters[extract] = extract(self.soup)
+            return self._chapters[extract]
+
+
+class BookPageCache:
+    """书籍页面缓存，按书籍ID保存最近解析的页面"""
+
+    def __init__(self, fetch: Callable[[str, Dict[str, str]], Any],
+                 ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        """
+        Args:
+            fetch: 请求函数 (url, headers) -> response，失败返回None
+            ttl: 缓存有效期（秒）
+            max_entries: 最多缓存的书籍数
+        """
+        config = Config.BOOK_PAGE_CACHE_CONFIG
+        self.fetch = fetch
+        self.enabled = config["enabled"]
+        self.ttl = ttl if ttl is not None else config["ttl"]
+        self.max_entries = max_entries or config["max_entries"]
+        self._pages: "OrderedDict[str, BookPage]" = OrderedDict()
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def get(self, book_id: str, headers: Dict[str, str]) -> Optional[BookPage]:
+        """
+        获取书籍页面，缓存有效时不再请求
+
+        Returns:
+            BookPage，请求失败返回None（失败结果不缓存）
+        """
+        book_id = str(book_id)
+        page = self._lookup(book_id)
+        if page:
+            return page
+
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(book_id, threading.Lock())
+        # 同一本书只允许一个线程请求页面，其余线程等待后直接使用缓存
+        with fetch_lock:
+            page = self._lookup(book_id)
+            if page:
+                return page
+
+            response = self.fetch(BOOK_PAGE_URL.format(book_id=book_id), headers)
+            if response is None or response.status_code != 200:
+                return None
+            page = BookPage(book_id, bs4.BeautifulSoup(response.text, 'html.parser'))
+
+            if self.enabled:
+                with self._lock:
+                    self._pages[book_id] = page
+                    self._pages.move_to_end(book_id)
+                    while len(self._pages) > self.max_entries:
+                        self._pages.popitem(last=False)
+            return page
+
+    def invalidate(self, book_id: Optional[str] = None):
+        """移除指定书籍的缓存，不指定时清空全部"""
+        with self._lock:
+            if book_id is None:
+                self._pages.clear()
+                self._fetch_locks.clear()
+            else:
+                self._pages.pop(str(book_id), None)
+                self._fetch_locks.pop(str(book_id), None)
+
+    def _lookup(self, book_id: str) -> Optional[BookPage]:
+        with self._lock:
+            page = self._pages.get(book_id)
+            if page is None:
+                return None
+            if time.monotonic() - page.fetched_at >= self.ttl:
+                del self._pages[book_id]
+                return None
+            self._pages.move_to_end(book_id)
+            return page
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+目录缓存模块
+按书籍ID保存上次获取的章节目录，刷新时对比出新增、移除和改名的章节，只下载变化部分
+"""
+
+import json
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        CATALOG_CACHE_CONFIG = {
+            "enabled": True,
+            "cache_dir": "catalog_cache"
+        }
+
+# 章节标题中的序号由解析时的位置生成，插入一章会改变其后所有章节的序号，对比时去掉
+_CHAPTER_NUMBER_RE = re.compile(r'^第[一二三四五六七八九十百千\d]+章\s*')
+
+
+def source_title(title: str) -> str:
+    """去掉章节序号后的标题"""
+    return _CHAPTER_NUMBER_RE.sub('', title or '').strip()
+
+
+def diff_catalog(old_chapters: List[Dict[str, Any]],
+                 new_chapters: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    对比新旧目录
+
+    章节按ID对应，标题去掉序号后比较，章节插入或删除导致的重新编号不算改名。
+
+    Returns:
+        {"added": 新增章节, "removed": 移除章节, "retitled": 标题变化的章节（新目录中的条目）}
+    """
+    old_titles = {ch["id"]: source_title(ch["title"]) for ch in old_chapters}
+    new_ids = set()
+    added = []
+    retitled = []
+
+    for chapter in new_chapters:
+        new_ids.add(chapter["id"])
+        old_title = old_titles.get(chapter["id"])
+        if old_title is None:
+            added.append(chapter)
+        elif old_title != source_title(chapter["title"]):
+            retitled.append(chapter)
+
+    removed = [ch for ch in old_chapters if ch["id"] not in new_ids]
+    return {"added": added, "removed": removed, "retitled": retitled}
+
+
+def stale_chapter_ids(diff: Dict[str, List[Dict[str, Any]]]) -> set:
+    """需要从已下载记录中移除的章节ID（改名的章节重新下载，移除的章节不再计入）"""
+    return {ch["id"] for ch in diff["retitled"] + diff["removed"]}
+
+
+def format_diff(diff: Dict[str, List[Dict[str, Any]]]) -> str:
+    """目录变化摘要"""
+    if not any(diff.values()):
+        return "目录无变化"
+    return f"目录更新：新增 {len(diff['added'])} 章，移除 {len(diff['removed'])} 章，改名 {len(diff['retitled'])} 章"
+
+
+class CatalogCache:
+    """章节目录缓存"""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        Args:
+            cache_dir: 缓存目录，每本书一个JSON文件
+        """
+        config = Config.CATALOG_CACHE_CONFIG
+        self.enabled = config["enabled"]
+        self.cache_dir = cache_dir or config["cache_dir"]
+
+    def load(self, book_id: str) -> Optional[Dict[str, Any]]:
+        """读取上次保存的目录，不存在返回None"""
+        if not self.enabled:
+            return None
+        cache_file = self._cache_file(book_id)
+        if not os.path.exists(cache_file):
+            return None
+        try:
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                catalog = json.load(f)
+            if isinstance(catalog, dict) and isinstance(catalog.get("chapters"), list):
+                return catalog
+        except Exception as e:
+            print(f"读取目录缓存失败: {str(e)}")
+        return None
+
+    def save(self, book_id: str, chapters: List[Dict[str, Any]]):
+        """保存目录（章节ID、标题、序号和获取时间）"""
+        if not self.enabled:
+            return
+        catalog = {
+            "book_id": str(book_id),
+            "fetched_at": time.time(),
+            "chapters": [
+                {"id": ch["id"], "title": ch["title"], "index": ch.get("index", idx)}
+                for idx, ch in enumerate(chapters)
+            ]
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            cache_file = self._cache_file(book_id)
+            temp_file = cache_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(catalog, f, ensure_ascii=False)
+            os.replace(temp_file, cache_file)
+        except Exception as e:
+            print(f"保存目录缓存失败: {str(e)}")
+
+    def compare(self, book_id: str, chapters: List[Dict[str, Any]]) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """
+        对比新获取的目录与缓存的目录（不更新缓存）
+
+        缓存应在本次下载结束后再用 save() 更新，下载中断时下次运行仍能得到同样的差异。
+
+        Returns:
+            与上次目录的差异，没有缓存（首次获取）时返回None
+        """
+        previous = self.load(book_id)
+        if previous is None:
+            return None
+        return diff_catalog(previous["chapters"], chapters)
+
+    def _cache_file(self, book_id: str) -> str:
+        return os.path.join(self.cache_dir, f"{book_id}.json")
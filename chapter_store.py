@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+章节内容库模块
+按书籍把处理后的章节内容保存到本地SQLite，续传时从内容库恢复已下载章节，
+输出文件由内容库和新下载的章节共同生成，不需要重新下载；
+下载结果超过内存预算时只保留在内容库中，写入文件时按章节顺序逐章读回
+"""
+
+import os
+import sqlite3
+import sys
+import threading
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        CHAPTER_STORE_CONFIG = {
+            "enabled": True,
+            "store_dir": ".chapter_store",
+            "memory_budget_mb": 64
+        }
+
+
+class ChapterStore:
+    """单本书的章节内容库"""
+
+    def __init__(self, save_path: str, book_id: str):
+        """
+        Args:
+            save_path: 保存路径，内容库与 chapter.json 放在同一目录下
+            book_id: 书籍ID
+        """
+        config = Config.CHAPTER_STORE_CONFIG
+        self.enabled = config["enabled"]
+        self.db_file = os.path.join(save_path, config["store_dir"], f"{book_id}.db")
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def put(self, chapter_id: str, index: int, result: Dict[str, Any]) -> bool:
+        """
+        保存一个章节
+
+        Args:
+            chapter_id: 章节ID
+            index: 章节序号
+            result: {"base_title", "api_title", "content"}
+
+        Returns:
+            是否已写入内容库
+        """
+        if not self.enabled:
+            return False
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO chapters (chapter_id, chapter_index, base_title, api_title, content)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (str(chapter_id), index, result["base_title"], result.get("api_title") or "", result["content"])
+                )
+                conn.commit()
+            return True
+        except Exception as e:
+            print(f"保存章节内容失败: {str(e)}")
+            return False
+
+    def get(self, chapter_id: str) -> Optional[Dict[str, Any]]:
+        """读取一个章节，内容库中没有时返回None"""
+        if not self.enabled or not os.path.exists(self.db_file):
+            return None
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT base_title, api_title, content FROM chapters WHERE chapter_id = ?",
+                    (str(chapter_id),)
+                ).fetchone()
+        except Exception as e:
+            print(f"读取章节内容失败: {str(e)}")
+            return None
+        if row is None:
+            return None
+        return {"base_title": row[0], "api_title": row[1], "content": row[2]}
+
+    def stored_ids(self) -> Set[str]:
+        """内容库中已有的章节ID"""
+        if not self.enabled or not os.path.exists(self.db_file):
+            return set()
+        try:
+            with self._lock:
+                return {row[0] for row in self._connect().execute("SELECT chapter_id FROM chapters")}
+        except Exception as e:
+            print(f"读取章节内容失败: {str(e)}")
+            return set()
+
+    def discard(self, chapter_ids: Iterable[str]):
+        """删除指定章节（例如目录中已移除或改名的章节）"""
+        chapter_ids = [(str(chapter_id),) for chapter_id in chapter_ids]
+        if not self.enabled or not chapter_ids or not os.path.exists(self.db_file):
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.executemany("DELETE FROM chapters WHERE chapter_id = ?", chapter_ids)
+                conn.commit()
+        except Exception as e:
+            print(f"清除章节内容失败: {str(e)}")
+
+    def clear(self):
+        """删除整个内容库"""
+        self.close()
+        for suffix in ('', '-wal', '-shm'):
+            path = self.db_file + suffix
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except Exception as e:
+                    print(f"清除章节内容失败: {str(e)}")
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_file), exist_ok=True)
+            conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            # WAL模式下每章提交不需要重写数据库，程序中断时已提交的章节不会丢失
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chapters ("
+                "chapter_id TEXT PRIMARY KEY, chapter_index INTEGER, "
+                "base_title TEXT, api_title TEXT, content TEXT)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+
+class ChapterResults(MutableMapping):
+    """
+    按章节序号保存的下载结果
+
+    通过 add() 保存的章节先写入内容库；内存中的正文超过预算时，最早的章节只保留在内容库中，
+    读取时再从内容库加载。内容库不可用时所有章节都保留在内存中。
+    """
+
+    def __init__(self, store: Optional[ChapterStore] = None, memory_budget_mb: Optional[float] = None):
+        """
+        Args:
+            store: 章节内容库
+            memory_budget_mb: 内存中正文的预算（MB），0表示不限制
+        """
+        if memory_budget_mb is None:
+            memory_budget_mb = Config.CHAPTER_STORE_CONFIG["memory_budget_mb"]
+        self.store = store
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self._memory: Dict[int, Dict[str, Any]] = {}
+        self._sizes: Dict[int, int] = {}
+        # 已写入内容库的章节，章节序号 -> 章节ID
+        self._stored: Dict[int, str] = {}
+        self._memory_size = 0
+        self._lock = threading.RLock()
+
+    def add(self, chapter_id: str, index: int, result: Dict[str, Any]):
+        """保存一个章节，写入内容库后按内存预算决定是否保留在内存中"""
+        stored = self.store is not None and self.store.put(chapter_id, index, result)
+        with self._lock:
+            self._put_memory(index, result)
+            if stored:
+                self._stored[index] = str(chapter_id)
+            else:
+                self._stored.pop(index, None)
+            self._spill()
+
+    def restore(self, chapters: List[Dict[str, Any]]) -> Set[str]:
+        """
+        登记内容库中已有的章节（不读取正文）
+
+        Returns:
+            内容库中有内容的章节ID
+        """
+        if self.store is None:
+            return set()
+        stored_ids = self.store.stored_ids()
+        restored = set()
+        with self._lock:
+            for chapter in chapters:
+                if str(chapter["id"]) in stored_ids:
+                    self._stored[chapter["index"]] = str(chapter["id"])
+                    restored.add(chapter["id"])
+        return restored
+
+    def items_in_order(self) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """按章节顺序逐章返回结果，只在内容库中的章节逐个读取"""
+        for index in sorted(self.keys()):
+            try:
+                yield index, self[index]
+            except KeyError:
+                continue
+
+    def release(self):
+        """释放已写入内容库的章节占用的内存"""
+        with self._lock:
+            for index in list(self._memory):
+                if index in self._stored:
+                    self._drop_memory(index)
+
+    @property
+    def spilled(self) -> bool:
+        """是否有章节只保存在内容库中"""
+        with self._lock:
+            return any(index not in self._memory for index in self._stored)
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        with self._lock:
+            result = self._memory.get(index)
+            chapter_id = self._stored.get(index)
+        if result is not None:
+            return result
+        if chapter_id is not None:
+            result = self.store.get(chapter_id)
+            if result is not None:
+                return result
+        raise KeyError(index)
+
+    def __setitem__(self, index: int, result: Dict[str, Any]):
+        # 没有章节ID，无法写入内容库，只保存在内存中
+        with self._lock:
+            self._put_memory(index, result)
+            self._stored.pop(index, None)
+
+    def __delitem__(self, index: int):
+        with self._lock:
+            if index not in self._memory and index not in self._stored:
+                raise KeyError(index)
+            self._drop_memory(index)
+            self._stored.pop(index, None)
+
+    def __contains__(self, index) -> bool:
+        with self._lock:
+            return index in self._memory or index in self._stored
+
+    def __iter__(self) -> Iterator[int]:
+        with self._lock:
+            return iter(list(self._memory.keys() | self._stored.keys()))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._memory.keys() | self._stored.keys())
+
+    def _put_memory(self, index: int, result: Dict[str, Any]):
+        self._drop_memory(index)
+        size = sys.getsizeof(result.get("content", ""))
+        self._memory[index] = result
+        self._sizes[index] = size
+        self._memory_size += size
+
+    def _drop_memory(self, index: int):
+        if self._memory.pop(index, None) is not None:
+            self._memory_size -= self._sizes.pop(index)
+
+    def _spill(self):
+        """超过预算时按保存顺序移出已写入内容库的章节"""
+        if not self.memory_budget or self._memory_size <= self.memory_budget:
+            return
+        for index in list(self._memory):
+            if self._memory_size <= self.memory_budget:
+                break
+            if index in self._stored:
+                self._drop_memory(index)
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+"""
+熔断器模块
+按端点名称熔断持续失败的API，打开后定时放行单个探测请求决定是否恢复
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        CIRCUIT_BREAKER_CONFIG = {
+            "enabled": True,
+            "failure_threshold": 5,
+            "recovery_timeout": 30
+        }
+
+
+class CircuitBreaker:
+    """单个端点的熔断器（关闭 -> 打开 -> 半开 -> 关闭/打开）"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    STATE_NAMES = {
+        CLOSED: "关闭",
+        OPEN: "打开",
+        HALF_OPEN: "半开"
+    }
+
+    def __init__(self, name: str, failure_threshold: Optional[int] = None,
+                 recovery_timeout: Optional[float] = None,
+                 on_state_change: Optional[Callable[[str, str, str], None]] = None):
+        """
+        Args:
+            name: 端点名称
+            failure_threshold: 连续失败多少次后打开
+            recovery_timeout: 打开后经过多少秒允许探测
+            on_state_change: 状态变化回调 (name, old_state, new_state)
+        """
+        config = Config.CIRCUIT_BREAKER_CONFIG
+        self.name = name
+        self.failure_threshold = failure_threshold or config["failure_threshold"]
+        self.recovery_timeout = recovery_timeout or config["recovery_timeout"]
+        self.on_state_change = on_state_change
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """当前状态"""
+        return self._state
+
+    def allow_request(self) -> bool:
+        """是否放行请求；半开状态下只放行一个探测请求"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.recovery_timeout:
+                    return False
+                transition = self._set_state(self.HALF_OPEN)
+            else:
+                transition = None
+            now = time.monotonic()
+            # 探测请求超过恢复时间仍无结果（例如被取消）时允许重新探测
+            if self._probe_in_flight and now - self._probe_started < self.recovery_timeout:
+                allowed = False
+            else:
+                self._probe_in_flight = True
+                self._probe_started = now
+                allowed = True
+        self._notify(transition)
+        return allowed
+
+    def record_success(self):
+        """记录成功"""
+        with self._lock:
+            self._failures = 0
+            self._probe_in_flight = False
+            transition = self._set_state(self.CLOSED)
+        self._notify(transition)
+
+    def record_failure(self):
+        """记录失败"""
+        with self._lock:
+            self._failures += 1
+            transition = None
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+                transition = self._set_state(self.OPEN)
+        self._notify(transition)
+
+    def _set_state(self, state):
+        """修改状态，返回 (old, new) 或 None（未变化）；调用方需持有锁"""
+        if state == self._state:
+            return None
+        old_state = self._state
+        self._state = state
+        return old_state, state
+
+    def _notify(self, transition):
+        if transition and self.on_state_change:
+            self.on_state_change(self.name, *transition)
+
+
+class CircuitBreakerManager:
+    """按端点名称管理熔断器"""
+
+    def __init__(self, on_state_change: Optional[Callable[[str, str, str], None]] = None):
+        self.on_state_change = on_state_change
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        """获取端点对应的熔断器，不存在则创建"""
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(name, on_state_change=self.on_state_change)
+                self._breakers[name] = breaker
+            return breaker
+
+    def is_closed(self, name: str) -> bool:
+        """端点熔断器是否处于关闭状态（不占用探测名额）"""
+        return self.get(name).state == CircuitBreaker.CLOSED
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+并发控制模块
+按端点自适应调整并发数（AIMD：加性增、乘性减）
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        MAX_WORKERS = 4
+        CONCURRENCY_CONFIG = {
+            "enabled": True,
+            "min_workers": 1,
+            "max_workers": None,
+            "headroom": 2,
+            "increase_step": 1,
+            "decrease_factor": 0.5,
+            "latency_threshold": 5.0,
+            "decrease_cooldown": 2.0
+        }
+
+
+def concurrency_cap() -> int:
+    """自适应并发的上限：max_workers，未设置时为 MAX_WORKERS 的 headroom 倍"""
+    config = Config.CONCURRENCY_CONFIG
+    return config["max_workers"] or Config.MAX_WORKERS * max(1, config.get("headroom", 1))
+
+
+def worker_count() -> int:
+    """单章下载线程池的大小：启用自适应并发时为并发上限，否则为 MAX_WORKERS"""
+    if Config.CONCURRENCY_CONFIG["enabled"]:
+        return concurrency_cap()
+    return Config.MAX_WORKERS
+
+
+class AIMDController:
+    """
+    AIMD并发控制器
+
+    从 MAX_WORKERS 开始，请求健康（成功且延迟正常）时每完成约一轮并发请求加一个并发位，
+    最多加到并发上限；遇到超时、429或5xx时并发数按比例缩减。
+    """
+
+    def __init__(self, initial_limit: Optional[int] = None, min_limit: Optional[int] = None,
+                 max_limit: Optional[int] = None, increase_step: Optional[float] = None,
+                 decrease_factor: Optional[float] = None, latency_threshold: Optional[float] = None,
+                 decrease_cooldown: Optional[float] = None):
+        config = Config.CONCURRENCY_CONFIG
+        self.min_limit = min_limit or config["min_workers"]
+        self.max_limit = max_limit or concurrency_cap()
+        self.increase_step = increase_step or config["increase_step"]
+        self.decrease_factor = decrease_factor or config["decrease_factor"]
+        self.latency_threshold = latency_threshold or config["latency_threshold"]
+        self.decrease_cooldown = decrease_cooldown if decrease_cooldown is not None else config["decrease_cooldown"]
+
+        initial_limit = initial_limit or Config.MAX_WORKERS
+        self._limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """当前并发上限"""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """当前在途请求数"""
+        return self._in_flight
+
+    def acquire(self):
+        """获取一个并发位，超过当前上限时阻塞等待"""
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait(0.5)
+            self._in_flight += 1
+
+    def release(self, latency: float, status_code: Optional[int] = None, error: Optional[Exception] = None):
+        """
+        释放并发位并根据请求结果调整并发上限
+
+        Args:
+            latency: 请求耗时（秒）
+            status_code: HTTP状态码，请求异常时为None
+            error: 请求异常
+        """
+        with self._cond:
+            self._in_flight = max(0, self._in_flight - 1)
+
+            if self._is_congested(latency, status_code, error):
+                now = time.time()
+                # 同一波拥塞只缩减一次
+                if now - self._last_decrease >= self.decrease_cooldown:
+                    self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+                    self._last_decrease = now
+            elif error is None:
+                # 每个成功请求增加 step/limit，约每轮并发加一个并发位
+                self._limit = min(float(self.max_limit), self._limit + self.increase_step / self._limit)
+
+            self._cond.notify_all()
+
+    def _is_congested(self, latency, status_code, error) -> bool:
+        """判断请求结果是否为拥塞信号"""
+        if error is not None:
+            return isinstance(error, (requests.exceptions.Timeout, requests.exceptions.ConnectionError))
+        if status_code is not None and (status_code == 429 or status_code >= 500):
+            return True
+        return latency > self.latency_threshold
+
+
+class ConcurrencyManager:
+    """按端点名称管理AIMD并发控制器"""
+
+    def __init__(self, initial_limit: Optional[int] = None):
+        self.initial_limit = initial_limit
+        self._controllers: Dict[str, AIMDController] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> AIMDController:
+        """获取端点对应的控制器，不存在则创建"""
+        with self._lock:
+            controller = self._controllers.get(name)
+            if controller is None:
+                controller = AIMDController(initial_limit=self.initial_limit)
+                self._controllers[name] = controller
+            return controller
+
+    def summary(self) -> str:
+        """当前各端点并发数，例如 "qyuing=6, fqweb=2" """
+        with self._lock:
+            return ", ".join(f"{name}={controller.limit}" for name, controller in self._controllers.items())
@@ -12,7 +12,7 @@ class Config:
     MAX_RETRIES = 3
     REQUEST_TIMEOUT = 15
     STATUS_FILE = "chapter.json"
-    REQUEST_RATE_LIMIT = 0.4
+    REQUEST_RATE_LIMIT = 0.4  # 每个工作线程两次请求的间隔（秒）
     
     # 认证配置
     AUTH_TOKEN = "wcnmd91jb"
@@ -29,7 +29,139 @@ class Config:
         "token": None,
         "max_batch_size": 290,
         "timeout": 10,
-        "enabled": True
+        "enabled": True,
+        "pipeline_depth": 3,  # 同时在途的批量请求数，1为逐批顺序请求
+        "stream": True  # 流式解析批量响应，逐章处理而不缓存整批内容
+    }
+    
+    # 自适应批量大小配置：按响应时间和体积调整批次大小，失败批次对半拆分重试
+    ADAPTIVE_BATCH_CONFIG = {
+        "enabled": True,
+        "min_size": 10,  # 最小批量大小
+        "target_latency": 5.0,  # 批量请求目标耗时（秒），超过则缩小批次
+        "max_payload_chars": 4 * 1024 * 1024,  # 单批响应正文字符数上限，超过则缩小批次
+        "increase_factor": 1.25,  # 满批次快速成功时的放大倍数
+        "decrease_factor": 0.5,  # 过慢或过大时的缩小倍数
+        "bisect": True,  # 响应无法解析或缺少章节时是否对半拆分重试（端点失败不拆分）
+        "max_splits": 16,  # 每次运行最多拆分的次数，用完后失败的章节直接转为单章下载
+        "stats_file": "batch_sizes.json"
+    }
+    
+    # 水印与广告过滤配置：规则文件中的规则追加到内置规则之后
+    TEXT_FILTER_CONFIG = {
+        "enabled": True,
+        "rules_file": "filter_rules.txt"  # 每行一个字面规则，[line_end]/[anywhere] 切换类型
+    }
+    
+    # 多进程内容处理配置：在子进程中处理章节正文，只传回清理后的文本
+    CONTENT_POOL_CONFIG = {
+        "enabled": False,
+        "max_workers": None  # 子进程数，None为CPU核心数
+    }
+    
+    # 自适应并发配置（AIMD，初始并发为 MAX_WORKERS）
+    CONCURRENCY_CONFIG = {
+        "enabled": True,
+        "min_workers": 1,
+        "max_workers": None,  # 并发上限，None为 MAX_WORKERS * headroom；单章下载线程池和连接池按上限创建
+        "headroom": 2,  # 初始并发为 MAX_WORKERS，健康时最多加到其倍数
+        "increase_step": 1,
+        "decrease_factor": 0.5,
+        "latency_threshold": 5.0,  # 超过该延迟（秒）视为拥塞
+        "decrease_cooldown": 2.0  # 两次缩减的最小间隔（秒）
+    }
+    
+    # 令牌桶限速配置，rate为None时按 MAX_WORKERS / REQUEST_RATE_LIMIT 计算
+    RATE_LIMIT_CONFIG = {
+        "enabled": True,
+        "endpoint_rate": None,  # 每个端点每秒请求数
+        "endpoint_burst": 8,
+        "host_rate": None,  # 每个主机每秒请求数
+        "host_burst": 16
+    }
+    
+    # 端点统计配置（EWMA），按延迟和成功率排序端点
+    ENDPOINT_STATS_CONFIG = {
+        "enabled": True,
+        "window": 20,  # 衰减窗口（样本数）
+        "stats_file": "endpoint_stats.json",
+        "latency_samples": 100  # 计算延迟分位数保留的样本数
+    }
+    
+    # 对冲请求配置：主端点超过p95延迟未返回时向下一个端点发送重复请求
+    HEDGE_CONFIG = {
+        "enabled": False,
+        "budget_ratio": 0.05,  # 对冲请求数不超过总请求数的比例
+        "percentile": 0.95,
+        "min_samples": 20  # 样本不足时不对冲
+    }
+    
+    # 熔断器配置：端点连续失败后短路跳过，定时放行单个探测请求
+    CIRCUIT_BREAKER_CONFIG = {
+        "enabled": True,
+        "failure_threshold": 5,  # 连续失败次数
+        "recovery_timeout": 30  # 打开后多久允许探测（秒）
+    }
+    
+    # 端点健康检查配置：并发探测、不重试，整体有截止时间
+    HEALTH_CHECK_CONFIG = {
+        "concurrent": True,
+        "timeout": 5,  # 单个端点探测超时（秒）
+        "deadline": 8  # 全部探测的截止时间（秒）
+    }
+    
+    # API源缓存配置：启动时优先使用缓存并在后台刷新
+    SOURCE_CACHE_CONFIG = {
+        "enabled": True,
+        "cache_file": "api_sources.json",
+        "ttl": 3600  # 缓存有效期（秒），过期后启动时同步刷新
+    }
+    
+    # 书籍页面缓存配置：一次下载中章节列表和书籍信息共用同一次页面请求与解析
+    BOOK_PAGE_CACHE_CONFIG = {
+        "enabled": True,
+        "ttl": 300,  # 缓存有效期（秒）
+        "max_entries": 8  # 最多缓存的书籍数
+    }
+    
+    # 目录缓存配置：保存每本书上次的目录，更新时只下载新增和改名的章节
+    CATALOG_CACHE_CONFIG = {
+        "enabled": True,
+        "cache_dir": "catalog_cache"
+    }
+    
+    # 下载状态日志配置：已完成章节追加写入日志，不再每次重写整个chapter.json
+    STATE_JOURNAL_CONFIG = {
+        "enabled": True,
+        "fsync_every": 50,  # 每追加多少条记录同步一次磁盘
+        "compact_every": 2000  # 日志超过多少条记录时合并回chapter.json
+    }
+    
+    # TXT增量写入配置：章节按顺序到达即追加写入，不再每轮重写整个文件
+    TXT_WRITER_CONFIG = {
+        "enabled": True,
+        # 最多等待多少个乱序到达的章节（只记录序号，正文在下载结果中），
+        # 应大于同时在途的批量章节数（max_batch_size * pipeline_depth）
+        "reorder_buffer": 1000
+    }
+    
+    # EPUB流式写入配置：章节到达即写入EPUB容器，不再在内存中构建整本书
+    EPUB_WRITER_CONFIG = {
+        "enabled": True,
+        "compress_level": 6  # 章节XHTML的压缩级别（0-9）
+    }
+    
+    # 章节内容库配置：已下载章节的内容保存在本地，续传时直接从内容库生成完整输出
+    CHAPTER_STORE_CONFIG = {
+        "enabled": True,
+        "store_dir": ".chapter_store",  # 位于保存路径下，与chapter.json放在一起
+        "memory_budget_mb": 64  # 内存中保留的正文上限，超出的章节只保存在内容库中，0表示不限制
+    }
+    
+    # 异步下载配置（需要安装aiohttp）
+    ASYNC_CONFIG = {
+        "enabled": False,
+        "max_concurrency": 200
     }
     
     # 用户代理配置
@@ -54,7 +186,8 @@ class Config:
         "verify_ssl": True,
         "allow_redirects": True,
         "stream": False,
-        "connection_pool_size": 10
+        "connection_pool_size": 10,  # 每个主机保持的连接数
+        "pool_connections": 10  # 缓存的主机连接池数量
     }
     
     @classmethod
@@ -69,7 +202,17 @@ class Config:
             "auth_token": cls.AUTH_TOKEN,
             "server_url": cls.SERVER_URL,
             "api_endpoints": cls.API_ENDPOINTS,
-            "batch_config": cls.BATCH_CONFIG
+            "batch_config": cls.BATCH_CONFIG,
+            "network_config": cls.NETWORK_CONFIG,
+            "async_config": cls.ASYNC_CONFIG,
+            "concurrency_config": cls.CONCURRENCY_CONFIG,
+            "rate_limit_config": cls.RATE_LIMIT_CONFIG,
+            "endpoint_stats_config": cls.ENDPOINT_STATS_CONFIG,
+            "hedge_config": cls.HEDGE_CONFIG,
+            "circuit_breaker_config": cls.CIRCUIT_BREAKER_CONFIG,
+            "content_pool_config": cls.CONTENT_POOL_CONFIG,
+            "txt_writer_config": cls.TXT_WRITER_CONFIG,
+            "epub_writer_config": cls.EPUB_WRITER_CONFIG
         }
     
     @classmethod
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+多进程内容处理模块
+在子进程中处理原始章节正文，只把清理后的文本传回主进程，避免正文处理占用下载线程的GIL
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        CONTENT_POOL_CONFIG = {
+            "enabled": False,
+            "max_workers": None
+        }
+
+
+class ContentProcessPool:
+    """章节内容处理进程池"""
+
+    def __init__(self, func: Callable[[str], str], max_workers: Optional[int] = None):
+        """
+        Args:
+            func: 处理函数 (content) -> text，必须是模块级函数以便传给子进程
+            max_workers: 子进程数，默认为CPU核心数
+        """
+        self.func = func
+        self.max_workers = max_workers or Config.CONTENT_POOL_CONFIG["max_workers"]
+        # 使用spawn启动子进程，避免在多线程进程中fork
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        self._pending = 0
+        self._condition = threading.Condition()
+
+    def process(self, content: str) -> str:
+        """在子进程中处理内容并等待结果；进程池不可用时在当前线程处理"""
+        try:
+            return self._executor.submit(self.func, content).result()
+        except Exception:
+            return self.func(content)
+
+    def submit(self, content: str, callback: Callable[[str], None]):
+        """提交内容处理，完成后以处理结果调用callback（在结果线程中执行）"""
+        def on_done(future):
+            try:
+                if future.cancelled():
+                    return
+                try:
+                    processed = future.result()
+                except Exception:
+                    processed = self._process_locally(content)
+                callback(processed)
+            finally:
+                with self._condition:
+                    self._pending -= 1
+                    self._condition.notify_all()
+
+        with self._condition:
+            self._pending += 1
+        try:
+            future = self._executor.submit(self.func, content)
+        except Exception:
+            # 进程池已损坏或关闭时在当前线程处理
+            with self._condition:
+                self._pending -= 1
+                self._condition.notify_all()
+            callback(self._process_locally(content))
+            return
+        future.add_done_callback(on_done)
+
+    def join(self):
+        """等待所有已提交的处理完成（包括回调）"""
+        with self._condition:
+            while self._pending:
+                self._condition.wait()
+
+    def shutdown(self):
+        """关闭进程池，未开始的处理会被取消"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _process_locally(self, content: str) -> str:
+        try:
+            return self.func(content)
+        except Exception:
+            return str(content)
@@ -5,8 +5,10 @@
 """
 
 import re
+import threading
 from typing import List, Dict, Any, Optional
 from bs4 import BeautifulSoup
+from text_filter import filter_text
 try:
     from config import Config
     from network import NetworkManager
@@ -33,12 +35,168 @@ except ImportError:
             return None
 
 
+# 广告和站点水印文本：(规则, 匹配所必需的字面文本)
+# 规则之间可能重叠（例如【】中的网址），前面的规则先移除会影响后面规则的匹配，必须按顺序逐个执行；
+# 必需文本不在正文中的规则不可能匹配，直接跳过，大多数章节不需要执行这些正则
+UNWANTED_PATTERNS = [
+    (r'本章未完.*?点击下一页继续阅读', ('本章未完', '点击下一页继续阅读')),
+    (r'请收藏本站：.*?手机版阅读网址：', ('请收藏本站：', '手机版阅读网址：')),
+    (r'一秒记住.*?为您提供精彩小说阅读', ('一秒记住', '为您提供精彩小说阅读')),
+    (r'天才一秒记住.*?地址：', ('天才一秒记住', '地址：')),
+    (r'笔趣阁.*?最快更新', ('笔趣阁', '最快更新')),
+    (r'www\.[^。]*?\.com', ()),
+    (r'http[s]?://[^\s]*', ()),
+    (r'【.*?】', ('【', '】')),
+    (r'（.*?广告.*?）', ('（', '广告', '）')),
+    (r'\(.*?广告.*?\)', ('(', '广告', ')')),
+]
+_UNWANTED_RES = [
+    (re.compile(pattern, re.IGNORECASE | re.DOTALL), required) for pattern, required in UNWANTED_PATTERNS
+]
+_WHITESPACE_RE = re.compile(r'\s+')
+# 连续重复的句号、逗号、感叹号、问号压缩为一个
+_REPEATED_PUNCTUATION_RE = re.compile(r'([。，！？])\1+')
+_SENTENCE_END_RE = re.compile(r'[。！？]')
+
+_CHAPTER_HREF_RE = re.compile(r'/chapter/|/read/|chapter_id=|chapterId=', re.IGNORECASE)
+_CHAPTER_TITLE_RE = re.compile(
+    r'第\s*\d+\s*章|chapter\s*\d+|第\s*[一二三四五六七八九十百千万]+\s*章', re.IGNORECASE
+)
+# 章节ID提取按优先级依次尝试（不能合并为一个正则，否则会变成取最左侧的匹配）
+_CHAPTER_ID_RES = [
+    re.compile(pattern) for pattern in (
+        r'chapter_id=(\d+)',
+        r'chapterId=(\d+)',
+        r'/chapter/(\d+)',
+        r'/read/(\d+)',
+        r'id=(\d+)'
+    )
+]
+
+
+def remove_unwanted(text: str) -> str:
+    """按顺序移除广告和站点水印文本"""
+    for pattern, required in _UNWANTED_RES:
+        if all(literal in text for literal in required):
+            text = pattern.sub('', text)
+    return text
+
+
+# 章节正文中已知会出现的标签（<p idx="N">段落、<article>、<header>/<footer>等），
+# 只包含这些标签时不构建DOM，直接扫描标签提取文本
+KNOWN_CONTENT_TAGS = {
+    'p', 'article', 'header', 'footer', 'section', 'div', 'span', 'br',
+    'h1', 'h2', 'h3', 'b', 'i', 'em', 'strong'
+}
+# 段落级标签，提取正文时在其前后换行，水印的行末规则按段落匹配
+BLOCK_TAGS = {'p', 'article', 'header', 'footer', 'section', 'div', 'br', 'h1', 'h2', 'h3'}
+_TAG_RE = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9]*)(?:\s[^<>]*)?/?>')
+# 快速路径只解码与BeautifulSoup结果相同的实体，其他以 & 开头的实体（缺少分号、未知名称、控制字符等）回退
+_ENTITY_RE = re.compile(r'&(?:([a-zA-Z][a-zA-Z0-9]*);|#([0-9]+);|#[xX]([0-9a-fA-F]+);|(?=[a-zA-Z#]))')
+_NAMED_ENTITIES = {'amp': '&', 'lt': '<', 'gt': '>', 'quot': '"', 'apos': "'", 'nbsp': '\xa0'}
+# BeautifulSoup把只由这些空白组成的文本替换为一个换行（含换行时）或空格
+_ASCII_SPACES = ' \n\t\x0c\r'
+
+
+class _UnknownEntity(Exception):
+    pass
+
+
+def _decode_entity(match) -> str:
+    name, decimal, hexadecimal = match.group(1, 2, 3)
+    if name is not None:
+        if name in _NAMED_ENTITIES:
+            return _NAMED_ENTITIES[name]
+        raise _UnknownEntity(match.group(0))
+    if decimal is None and hexadecimal is None:
+        raise _UnknownEntity(match.group(0))
+    codepoint = int(decimal) if decimal is not None else int(hexadecimal, 16)
+    if codepoint in (9, 10, 13) or 32 <= codepoint < 127 or (160 <= codepoint <= 0x10FFFF and
+                                                              not 0xD800 <= codepoint <= 0xDFFF):
+        return chr(codepoint)
+    raise _UnknownEntity(match.group(0))
+
+
+def _text_segment(text: str) -> Optional[str]:
+    """标签之间的一段文本：解码实体，只有空白时与BeautifulSoup一样替换为一个空白"""
+    if '<' in text or '>' in text:
+        return None
+    if '&' in text:
+        try:
+            text = _ENTITY_RE.sub(_decode_entity, text)
+        except _UnknownEntity:
+            return None
+    if text and not text.strip(_ASCII_SPACES):
+        return '\n' if '\n' in text else ' '
+    return text
+
+
+def strip_known_tags(content: str, block_separator: str = '') -> Optional[str]:
+    """
+    快速提取章节文本（等价于 BeautifulSoup(content, 'html.parser').get_text()）
+    
+    Args:
+        block_separator: 在段落级标签处插入的分隔符，默认不插入
+    
+    Returns:
+        提取的文本；遇到未知标签、注释、无法识别的尖括号或实体时返回None，由调用方回退到BeautifulSoup
+    """
+    parts = []
+    position = 0
+    for match in _TAG_RE.finditer(content):
+        tag = match.group(2).lower()
+        if tag not in KNOWN_CONTENT_TAGS:
+            return None
+        text = _text_segment(content[position:match.start()])
+        if text is None:
+            return None
+        parts.append(text)
+        if block_separator and tag in BLOCK_TAGS:
+            parts.append(block_separator)
+        position = match.end()
+    
+    text = _text_segment(content[position:])
+    if text is None:
+        return None
+    parts.append(text)
+    return ''.join(parts)
+
+
+def soup_text(content: str, block_separator: str = '') -> str:
+    """用BeautifulSoup提取文本，block_separator 插入到段落级标签前后"""
+    soup = BeautifulSoup(content, 'html.parser')
+    if block_separator:
+        for tag in soup.find_all(BLOCK_TAGS):
+            tag.insert_before(block_separator)
+            tag.insert_after(block_separator)
+    return soup.get_text()
+
+
+def clean_chapter_content(content: str) -> str:
+    """ContentProcessor.process_chapter_content 的模块级版本，可以在子进程中执行"""
+    return ContentProcessor(None).process_chapter_content(content)
+
+
 class ContentProcessor:
     """内容处理器"""
     
     def __init__(self, network_manager: NetworkManager):
         self.network_manager = network_manager
         self.config = Config()
+        # 本次运行中各解析路径处理的章节数
+        self.path_stats = {"fast": 0, "soup": 0}
+        self._stats_lock = threading.Lock()
+    
+    def reset_path_stats(self):
+        """重置解析路径统计"""
+        with self._stats_lock:
+            self.path_stats = {"fast": 0, "soup": 0}
+    
+    def path_stats_summary(self) -> str:
+        """解析路径统计摘要"""
+        with self._stats_lock:
+            stats = dict(self.path_stats)
+        return f"内容解析：快速路径 {stats['fast']} 章，BeautifulSoup {stats['soup']} 章"
     
     def extract_chapters(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
         """从HTML中提取章节信息"""
@@ -65,44 +223,14 @@ class ContentProcessor:
     
     def _is_chapter_link(self, href: str, title: str) -> bool:
         """判断是否为章节链接"""
-        # 检查URL模式
-        chapter_patterns = [
-            r'/chapter/',
-            r'/read/',
-            r'chapter_id=',
-            r'chapterId='
-        ]
-        
-        for pattern in chapter_patterns:
-            if re.search(pattern, href, re.IGNORECASE):
-                return True
-        
-        # 检查标题模式
-        title_patterns = [
-            r'第\s*\d+\s*章',
-            r'chapter\s*\d+',
-            r'第\s*[一二三四五六七八九十百千万]+\s*章'
-        ]
-        
-        for pattern in title_patterns:
-            if re.search(pattern, title, re.IGNORECASE):
-                return True
-        
-        return False
+        # 检查URL模式和标题模式
+        return bool(_CHAPTER_HREF_RE.search(href) or _CHAPTER_TITLE_RE.search(title))
     
     def _extract_chapter_id(self, href: str) -> Optional[str]:
         """从URL中提取章节ID"""
-        # 尝试不同的ID提取模式
-        patterns = [
-            r'chapter_id=(\d+)',
-            r'chapterId=(\d+)',
-            r'/chapter/(\d+)',
-            r'/read/(\d+)',
-            r'id=(\d+)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, href)
+        # 按优先级尝试不同的ID提取模式
+        for pattern in _CHAPTER_ID_RES:
+            match = pattern.search(href)
             if match:
                 return match.group(1)
         
@@ -113,9 +241,16 @@ class ContentProcessor:
         if not content:
             return ""
         
-        # 移除HTML标签
-        soup = BeautifulSoup(content, 'html.parser')
-        text = soup.get_text()
+        # 移除HTML标签：已知格式直接扫描标签，其他标记回退到BeautifulSoup；
+        # 段落之间换行，水印的行末规则才能在清理时按段落匹配
+        text = strip_known_tags(content, '\n')
+        if text is not None:
+            path = "fast"
+        else:
+            text = soup_text(content, '\n')
+            path = "soup"
+        with self._stats_lock:
+            self.path_stats[path] += 1
         
         # 清理文本
         text = self._clean_text(text)
@@ -127,38 +262,24 @@ class ContentProcessor:
     
     def _clean_text(self, text: str) -> str:
         """清理文本内容"""
+        # 移除规则文件中的水印和广告（行末规则需要在合并空白、丢失换行之前按行匹配）
+        text = filter_text(text)
+        
         # 移除多余的空白字符
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         
         # 移除特殊字符和广告文本
-        unwanted_patterns = [
-            r'本章未完.*?点击下一页继续阅读',
-            r'请收藏本站：.*?手机版阅读网址：',
-            r'一秒记住.*?为您提供精彩小说阅读',
-            r'天才一秒记住.*?地址：',
-            r'笔趣阁.*?最快更新',
-            r'www\.[^。]*?\.com',
-            r'http[s]?://[^\s]*',
-            r'【.*?】',
-            r'（.*?广告.*?）',
-            r'\(.*?广告.*?\)',
-        ]
-        
-        for pattern in unwanted_patterns:
-            text = re.sub(pattern, '', text, flags=re.IGNORECASE | re.DOTALL)
+        text = remove_unwanted(text)
         
         # 移除多余的标点符号
-        text = re.sub(r'[。]{2,}', '。', text)
-        text = re.sub(r'[，]{2,}', '，', text)
-        text = re.sub(r'[！]{2,}', '！', text)
-        text = re.sub(r'[？]{2,}', '？', text)
+        text = _REPEATED_PUNCTUATION_RE.sub(r'\1', text)
         
         return text.strip()
     
     def _format_paragraphs(self, text: str) -> str:
         """格式化段落"""
         # 按句号分割并重新组织段落
-        sentences = re.split(r'[。！？]', text)
+        sentences = _SENTENCE_END_RE.split(text)
         paragraphs = []
         current_paragraph = []
         
@@ -5,12 +5,14 @@
 """
 
 import requests
-import bs4
 import time
+import json
+from concurrent.futures import ThreadPoolExecutor
 try:
     from config import CONFIG
     from network import NetworkManager
     from content_processor import ContentProcessor
+    from book_page import BookPageCache
 except ImportError:
     # 提供基本配置作为后备
     CONFIG = {
@@ -21,15 +23,29 @@ except ImportError:
     }
     NetworkManager = None
     ContentProcessor = None
+    BookPageCache = None
 
 
 class DownloadEngine:
     """下载引擎类，负责核心下载逻辑"""
     
-    def __init__(self, network_manager=None, content_processor=None, progress_callback=None):
+    def __init__(self, network_manager=None, content_processor=None, progress_callback=None,
+                 book_page_cache=None):
         self.progress_callback = progress_callback
         self.network_manager = network_manager or NetworkManager()
         self.content_processor = content_processor or ContentProcessor(self.network_manager)
+        # 书籍页面缓存，可与其他下载引擎共用
+        self.book_page_cache = book_page_cache or BookPageCache(
+            lambda url, headers: self.network_manager.make_request(url, headers=headers)
+        )
+        # 可选的多进程内容处理池（content_pool.ContentProcessPool），由调用方在下载期间设置
+        self.content_pool = None
+        # 可选的令牌桶限速器、端点统计和端点熔断器，由调用方设置，线程池和异步引擎共用
+        self.rate_limiter = None
+        self.endpoint_stats = None
+        self.breakers = None
+        # 可选的按端点自适应并发控制（concurrency_controller.ConcurrencyManager），仅用于线程池下载
+        self.concurrency = None
     
     def log(self, message):
         """日志输出"""
@@ -38,53 +54,123 @@ class DownloadEngine:
         else:
             print(message)
     
+    def process_content(self, content):
+        """处理章节内容，设置了进程池时在子进程中处理"""
+        if self.content_pool:
+            return self.content_pool.process(content)
+        return self.content_processor.process_chapter_content(content)
+    
+    def build_chapter_requests(self, chapter_id):
+        """
+        生成章节下载请求列表
+        返回: [(api_name, request), ...]
+        """
+        sdk_url = f"https://novel.snssdk.com/api/novel/book/reader/full/v1/?device_platform=android&parent_id=0&aid=2329&platform_id=1&group_id={chapter_id}&item_id={chapter_id}"
+        requests_list = [
+            ("fanqie_sdk", {"method": "GET", "url": sdk_url}),
+            ("fqweb", {"method": "GET", "url": f"http://fqweb.jsj66.com/content?item_id={chapter_id}"}),
+            ("qyuing", {"method": "GET", "url": sdk_url}),
+            ("lsjk", {"method": "GET", "url": sdk_url})
+        ]
+        if self.endpoint_stats:
+            # 表现好的端点排在前面，得分相同保持原顺序
+            requests_list.sort(key=lambda item: self.endpoint_stats.score(item[0]))
+        return requests_list
+    
+    def parse_chapter_response(self, api_name, chapter_id, status_code, text):
+        """
+        解析章节响应
+        返回: (title, content) 或 None
+        """
+        data = json.loads(text)
+        
+        if api_name == "fqweb":
+            if data.get("isSuccess") and data.get("data", {}).get("code") == "0":
+                chapter_data = data["data"]["data"]
+                content = chapter_data["content"]
+                processed_content = self.process_content(content)
+                return chapter_data.get("title", f"章节{chapter_id}"), processed_content
+        
+        elif api_name in ["fanqie_sdk", "qyuing", "lsjk"]:
+            if data.get("code") == 0 and "data" in data:
+                content = data["data"]["content"]
+                processed_content = self.process_content(content)
+                return data["data"].get("title", f"章节{chapter_id}"), processed_content
+        
+        return None
+    
+    def batch_fallback(self, chapter_id, headers):
+        """
+        通过qyuing批量接口单独下载一个章节
+        返回: (title, content) 或 None
+        """
+        if not CONFIG["batch_config"]["enabled"]:
+            return None
+        batch_result = self.content_processor.batch_download_chapters([chapter_id], headers)
+        if batch_result and chapter_id in batch_result:
+            content = batch_result[chapter_id]
+            return f"章节{chapter_id}", self.process_content(content)
+        return None
+    
+    def record_endpoint(self, api_name, latency, success):
+        """记录端点请求结果"""
+        if self.endpoint_stats:
+            self.endpoint_stats.record(api_name, latency, success)
+    
+    def _attempt_endpoint(self, api_name, request, chapter_id, headers):
+        """请求单个端点并解析章节内容，返回 (title, content) 或 None"""
+        if self.rate_limiter:
+            self.rate_limiter.acquire(api_name, request["url"])
+        
+        controller = self.concurrency.get(api_name) if self.concurrency else None
+        if controller:
+            controller.acquire()
+        start_time = time.time()
+        response = None
+        result = None
+        try:
+            try:
+                response = self.network_manager.make_request(request["url"], headers=headers)
+            finally:
+                if controller:
+                    latency = time.time() - start_time
+                    if response is None:
+                        # make_request 重试后仍失败时返回None，按连接失败计为拥塞
+                        controller.release(latency, None, requests.exceptions.ConnectionError(request["url"]))
+                    else:
+                        controller.release(latency, response.status_code)
+            if response:
+                result = self.parse_chapter_response(api_name, chapter_id, response.status_code, response.text)
+        finally:
+            self.record_endpoint(api_name, time.time() - start_time, result is not None)
+            if self.breakers:
+                if result is not None:
+                    self.breakers.get(api_name).record_success()
+                else:
+                    self.breakers.get(api_name).record_failure()
+        return result
+    
     def down_text(self, chapter_id, headers, book_id=None):
         """
         下载章节内容，支持多个API源
         返回: (title, content) 或 (None, None)
         """
-        apis = [
-            ("fanqie_sdk", f"https://novel.snssdk.com/api/novel/book/reader/full/v1/?device_platform=android&parent_id=0&aid=2329&platform_id=1&group_id={chapter_id}&item_id={chapter_id}"),
-            ("fqweb", f"http://fqweb.jsj66.com/content?item_id={chapter_id}"),
-            ("qyuing", f"https://novel.snssdk.com/api/novel/book/reader/full/v1/?device_platform=android&parent_id=0&aid=2329&platform_id=1&group_id={chapter_id}&item_id={chapter_id}"),
-            ("lsjk", f"https://novel.snssdk.com/api/novel/book/reader/full/v1/?device_platform=android&parent_id=0&aid=2329&platform_id=1&group_id={chapter_id}&item_id={chapter_id}")
-        ]
-        
-        for api_name, url in apis:
+        for api_name, request in self.build_chapter_requests(chapter_id):
             try:
-                if api_name == "qyuing" and CONFIG["batch_config"]["enabled"]:
+                if api_name == "qyuing":
                     # 使用批量下载
-                    batch_result = self.content_processor.batch_download_chapters([chapter_id], headers)
-                    if batch_result and chapter_id in batch_result:
-                        content = batch_result[chapter_id]
-                        processed_content = self.content_processor.process_chapter_content(content)
-                        return f"章节{chapter_id}", processed_content
+                    result = self.batch_fallback(chapter_id, headers)
+                    if result is not None:
+                        return result
                 
-                # 单个章节下载
-                response = self.network_manager.make_request(url, headers=headers)
-                if not response:
+                # 熔断器打开时跳过该端点的单章请求
+                if self.breakers and not self.breakers.get(api_name).allow_request():
                     continue
                 
-                data = response.json()
-                
-                if api_name == "fanqie_sdk":
-                    if data.get("code") == 0 and "data" in data:
-                        content = data["data"]["content"]
-                        processed_content = self.content_processor.process_chapter_content(content)
-                        return data["data"].get("title", f"章节{chapter_id}"), processed_content
-                
-                elif api_name == "fqweb":
-                    if data.get("isSuccess") and data.get("data", {}).get("code") == "0":
-                        chapter_data = data["data"]["data"]
-                        content = chapter_data["content"]
-                        processed_content = self.content_processor.process_chapter_content(content)
-                        return chapter_data.get("title", f"章节{chapter_id}"), processed_content
-                
-                elif api_name in ["qyuing", "lsjk"]:
-                    if data.get("code") == 0 and "data" in data:
-                        content = data["data"]["content"]
-                        processed_content = self.content_processor.process_chapter_content(content)
-                        return data["data"].get("title", f"章节{chapter_id}"), processed_content
+                # 单个章节下载
+                result = self._attempt_endpoint(api_name, request, chapter_id, headers)
+                if result is not None:
+                    return result
                 
             except Exception as e:
                 self.log(f"API {api_name} 请求失败: {str(e)}")
@@ -92,75 +178,99 @@ class DownloadEngine:
         
         return None, None
     
+    def _fetch_directory_ids(self, book_id, headers):
+        """从目录API获取全部章节ID，请求失败返回None"""
+        api_url = f"https://fanqienovel.com/api/reader/directory/detail?bookId={book_id}"
+        api_response = self.network_manager.make_request(api_url, headers=headers)
+        if not api_response:
+            return None
+        
+        api_data = api_response.json()
+        return api_data.get("data", {}).get("allItemIds", [])
+    
+    def _merge_chapters(self, chapters, chapter_ids):
+        """以目录API的章节ID顺序为准，合并网页中解析出的章节标题"""
+        # 按章节ID建立索引，重复ID以页面中第一次出现的为准
+        web_titles = {ch["id"]: ch["title"] for ch in reversed(chapters)}
+        
+        final_chapters = []
+        for idx, chapter_id in enumerate(chapter_ids):
+            web_title = web_titles.get(chapter_id)
+            
+            if web_title is not None:
+                final_chapters.append({
+                    "id": chapter_id,
+                    "title": web_title,
+                    "index": idx
+                })
+            else:
+                final_chapters.append({
+                    "id": chapter_id,
+                    "title": f"第{idx+1}章",
+                    "index": idx
+                })
+        
+        return final_chapters
+    
+    def _build_chapters(self, page, chapter_ids):
+        """由书籍页面和目录章节ID生成章节列表；目录获取失败时使用网页章节"""
+        if not page:
+            return None
+        chapters = page.chapters(self.content_processor.extract_chapters)
+        if chapter_ids is None:
+            return chapters
+        return self._merge_chapters(chapters, chapter_ids)
+    
     def get_chapters_from_api(self, book_id, headers):
         """从API获取章节列表"""
         try:
-            page_url = f'https://fanqienovel.com/page/{book_id}'
-            response = self.network_manager.make_request(page_url, headers=headers)
-            if not response:
+            page = self.book_page_cache.get(book_id, headers)
+            if not page:
                 return None
-            
-            soup = bs4.BeautifulSoup(response.text, 'html.parser')
-            chapters = self.content_processor.extract_chapters(soup)
-            
-            api_url = f"https://fanqienovel.com/api/reader/directory/detail?bookId={book_id}"
-            api_response = self.network_manager.make_request(api_url, headers=headers)
-            if not api_response:
-                return chapters
-            
-            api_data = api_response.json()
-            chapter_ids = api_data.get("data", {}).get("allItemIds", [])
-            
-            final_chapters = []
-            for idx, chapter_id in enumerate(chapter_ids):
-                web_chapter = next((ch for ch in chapters if ch["id"] == chapter_id), None)
-                
-                if web_chapter:
-                    final_chapters.append({
-                        "id": chapter_id,
-                        "title": web_chapter["title"],
-                        "index": idx
-                    })
-                else:
-                    final_chapters.append({
-                        "id": chapter_id,
-                        "title": f"第{idx+1}章",
-                        "index": idx
-                    })
-            
-            return final_chapters
+            return self._build_chapters(page, self._fetch_directory_ids(book_id, headers))
         except Exception as e:
             self.log(f"获取章节列表失败: {str(e)}")
             return None
     
+    def bootstrap_book(self, book_id, headers, include_enhanced=True):
+        """
+        并发获取书籍页面、目录API和增强书籍信息，耗时取决于最慢的一个请求
+        
+        Args:
+            include_enhanced: 是否同时请求fqweb增强书籍信息
+            
+        返回: {"chapters": 章节列表或None, "book_info": (书名, 作者, 简介), "enhanced_info": 增强信息或None}
+        """
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            page_future = executor.submit(self.book_page_cache.get, book_id, headers)
+            ids_future = executor.submit(self._fetch_directory_ids, book_id, headers)
+            enhanced_future = executor.submit(self.get_book_info_enhanced, book_id, headers) if include_enhanced else None
+        
+        page = None
+        try:
+            page = page_future.result()
+        except Exception as e:
+            self.log(f"获取书籍页面失败: {str(e)}")
+        
+        chapters = None
+        try:
+            chapters = self._build_chapters(page, ids_future.result())
+        except Exception as e:
+            self.log(f"获取章节列表失败: {str(e)}")
+        
+        return {
+            "chapters": chapters,
+            "book_info": page.info if page else (None, None, None),
+            "enhanced_info": enhanced_future.result() if enhanced_future else None
+        }
+    
     def get_book_info(self, book_id, headers):
         """获取书名、作者、简介"""
-        url = f'https://fanqienovel.com/page/{book_id}'
         try:
-            response = self.network_manager.make_request(url, headers=headers)
-            if not response:
+            page = self.book_page_cache.get(book_id, headers)
+            if not page:
                 return None, None, None
-
-            soup = bs4.BeautifulSoup(response.text, 'html.parser')
-            
-            name_element = soup.find('h1')
-            name = name_element.text if name_element else "未知书名"
-            
-            author_name = "未知作者"
-            author_name_element = soup.find('div', class_='author-name')
-            if author_name_element:
-                author_name_span = author_name_element.find('span', class_='author-name-text')
-                if author_name_span:
-                    author_name = author_name_span.text
-            
-            description = "无简介"
-            description_element = soup.find('div', class_='page-abstract-content')
-            if description_element:
-                description_p = description_element.find('p')
-                if description_p:
-                    description = description_p.text
-            
-            return name, author_name, description
+            return page.info
         except Exception as e:
             self.log(f"获取书籍信息失败: {str(e)}")
             return None, None, None
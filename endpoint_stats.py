@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+端点统计模块
+记录各API端点的延迟和成功率（EWMA），按表现排序并在多次运行间持久化
+"""
+
+import json
+import os
+import threading
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        REQUEST_TIMEOUT = 15
+        ENDPOINT_STATS_CONFIG = {
+            "enabled": True,
+            "window": 20,
+            "stats_file": "endpoint_stats.json",
+            "latency_samples": 100
+        }
+
+
+class EndpointStats:
+    """端点延迟与成功率统计"""
+
+    def __init__(self, stats_file: Optional[str] = None, window: Optional[int] = None):
+        """
+        Args:
+            stats_file: 统计数据保存文件
+            window: EWMA衰减窗口（样本数），越大越平滑
+        """
+        config = Config.ENDPOINT_STATS_CONFIG
+        self.stats_file = stats_file or config["stats_file"]
+        window = window or config["window"]
+        self.alpha = 2.0 / (window + 1)
+        self._stats: Dict[str, Dict[str, float]] = {}
+        # 最近成功请求的延迟样本，用于计算分位数（不持久化）
+        self._latencies: Dict[str, deque] = {}
+        self._latency_samples = config.get("latency_samples", 100)
+        self._lock = threading.Lock()
+        self.load()
+
+    def record(self, name: str, latency: float, success: bool):
+        """记录一次请求结果"""
+        with self._lock:
+            if success:
+                samples = self._latencies.get(name)
+                if samples is None:
+                    samples = self._latencies[name] = deque(maxlen=self._latency_samples)
+                samples.append(latency)
+
+            stats = self._stats.get(name)
+            if stats is None:
+                self._stats[name] = {
+                    "latency": latency,
+                    "success": 1.0 if success else 0.0,
+                    "samples": 1
+                }
+                return
+            stats["latency"] += self.alpha * (latency - stats["latency"])
+            stats["success"] += self.alpha * ((1.0 if success else 0.0) - stats["success"])
+            stats["samples"] += 1
+
+    def score(self, name: str) -> float:
+        """
+        端点的预期代价（秒），越小越好
+
+        失败按一次完整超时计入；没有统计数据的端点得分为0，会被优先尝试。
+        """
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                return 0.0
+            return stats["latency"] + (1.0 - stats["success"]) * Config.REQUEST_TIMEOUT
+
+    def latency_percentile(self, name: str, percentile: float = 0.95, min_samples: int = 1) -> Optional[float]:
+        """最近成功请求延迟的分位数，样本不足时返回None"""
+        with self._lock:
+            samples = sorted(self._latencies.get(name, ()))
+        if len(samples) < max(min_samples, 1):
+            return None
+        index = min(len(samples) - 1, int(percentile * len(samples)))
+        return samples[index]
+
+    def rank(self, endpoints: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """按得分从好到差排序端点，得分相同保持原顺序"""
+        return sorted(endpoints, key=lambda endpoint: self.score(endpoint["name"]))
+
+    def load(self):
+        """从文件加载上次运行的统计数据"""
+        if not os.path.exists(self.stats_file):
+            return
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                with self._lock:
+                    self._stats = {
+                        name: stats for name, stats in data.items()
+                        if isinstance(stats, dict) and {"latency", "success", "samples"} <= stats.keys()
+                    }
+        except Exception as e:
+            print(f"加载端点统计失败: {str(e)}")
+
+    def save(self):
+        """保存统计数据"""
+        try:
+            with self._lock:
+                data = {name: dict(stats) for name, stats in self._stats.items()}
+            temp_file = self.stats_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(temp_file, self.stats_file)
+        except Exception as e:
+            print(f"保存端点统计失败: {str(e)}")
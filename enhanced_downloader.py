@@ -15,16 +15,34 @@ import json
 import re
 import random
 import requests
-import bs4
 from ebooklib import epub
 from fake_useragent import UserAgent
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from typing import Optional, Callable, Dict
+from async_download_engine import AsyncDownloadEngine
+from concurrency_controller import ConcurrencyManager, worker_count
+from rate_limiter import RateLimiter
+from endpoint_stats import EndpointStats
+from hedging import HedgePolicy
+from circuit_breaker import CircuitBreaker, CircuitBreakerManager
+from api_sources import ApiSourceLoader
+from book_page import BookPageCache
+from catalog_cache import CatalogCache, format_diff, stale_chapter_ids
+from batch_pipeline import pipeline_batches
+from batch_sizing import BatchEndpointError, BatchScheduler, BatchSizer
+from json_stream import iter_object_items
+from content_pool import ContentProcessPool
+from text_filter import filter_text
+from state_journal import open_journal
+from chapter_store import ChapterResults, ChapterStore
+from txt_writer import OrderedTxtWriter
+from epub_writer import EPUB_STYLE, StreamingEpubWriter
 
 # 导入新的模块化组件
 try:
     from config import CONFIG, Config
-    from network import NetworkManager
+    from network import NetworkManager, create_pooled_session
     from content_processor import ContentProcessor
     from download_engine import DownloadEngine
     from file_output import FileOutputManager
@@ -43,13 +61,84 @@ except ImportError as e:
             "name": "qyuing",
             "enabled": True,
             "max_batch_size": 290,
-            "timeout": 10
+            "timeout": 10,
+            "pipeline_depth": 1,
+            "stream": False
+        },
+        "async_config": {
+            "enabled": False,
+            "max_concurrency": 200
+        },
+        "concurrency_config": {
+            "enabled": False,
+            "max_workers": 4
+        },
+        "rate_limit_config": {
+            "enabled": False
+        },
+        "endpoint_stats_config": {
+            "enabled": False
+        },
+        "hedge_config": {
+            "enabled": False
+        },
+        "circuit_breaker_config": {
+            "enabled": False
+        },
+        "content_pool_config": {
+            "enabled": False
+        },
+        "txt_writer_config": {
+            "enabled": False
+        },
+        "epub_writer_config": {
+            "enabled": False
         }
     }
+    
+    def create_pooled_session(pool_size=None):
+        return requests.Session()
 
 # 全局锁
 print_lock = threading.Lock()
 
+
+def format_chapter_content(content):
+    """
+    处理章节内容：提取段落、去除标签并统一缩进
+    
+    模块级函数，可以在内容处理进程池的子进程中执行。
+    """
+    paragraphs = []
+    if '<p idx=' in content:
+        paragraphs = re.findall(r'<p idx="\d+">(.*?)</p>', content, re.DOTALL)
+    else:
+        paragraphs = content.split('\n')
+    
+    if paragraphs:
+        first_para = paragraphs[0].strip()
+        if not first_para.startswith('    '):
+            paragraphs[0] = '    ' + first_para
+    
+    cleaned_content = "\n".join(p.strip() for p in paragraphs if p.strip())
+    formatted_content = '\n'.join('    ' + line if line.strip() else line 
+                                for line in cleaned_content.split('\n'))
+    
+    formatted_content = re.sub(r'<header>.*?</header>', '', formatted_content, flags=re.DOTALL)
+    formatted_content = re.sub(r'<footer>.*?</footer>', '', formatted_content, flags=re.DOTALL)
+    formatted_content = re.sub(r'</?article>', '', formatted_content)
+    formatted_content = re.sub(r'<[^>]+>', '', formatted_content)
+    formatted_content = re.sub(r'\\u003c|\\u003e', '', formatted_content)
+    
+    # 移除水印和广告，整行都是水印的行一并删除（规则都是单行文本，过滤不改变行数）
+    lines = formatted_content.split('\n')
+    filtered = filter_text(formatted_content).split('\n')
+    formatted_content = '\n'.join(new for old, new in zip(lines, filtered) if new.strip() or not old.strip())
+    
+    # 压缩多余的空行
+    return re.sub(r'\n{3,}', '\n\n', formatted_content).strip()
+
+
 class EnhancedNovelDownloader:
     def __init__(self, progress_callback: Optional[Callable] = None):
         """
@@ -60,12 +149,52 @@ class EnhancedNovelDownloader:
         """
         self.progress_callback = progress_callback
         self.downloaded = set()
-        self.chapter_results = {}
+        self.chapter_results = ChapterResults()
         self.lock = threading.Lock()
         self.is_cancelled = False
+        # 所有下载线程共享的连接池会话
+        self.session = create_pooled_session()
+        # 按端点自适应调整并发数
+        self.concurrency = None
+        if CONFIG["concurrency_config"]["enabled"]:
+            self.concurrency = ConcurrencyManager(initial_limit=CONFIG["max_workers"])
+        # 按端点和主机共享的令牌桶限速器
+        self.rate_limiter = RateLimiter() if CONFIG["rate_limit_config"]["enabled"] else None
+        # 端点延迟/成功率统计，用于按表现排序端点
+        self.endpoint_stats = EndpointStats() if CONFIG["endpoint_stats_config"]["enabled"] else None
+        # 对冲请求依赖端点延迟统计
+        self.hedge_policy = None
+        self._hedge_executor = None
+        if CONFIG["hedge_config"]["enabled"] and self.endpoint_stats:
+            self.hedge_policy = HedgePolicy(self.endpoint_stats)
+            # 每个下载线程最多同时有主请求和对冲请求各一个在途
+            self._hedge_executor = ThreadPoolExecutor(max_workers=worker_count() * 2)
+        # 端点熔断器
+        self.breakers = None
+        if CONFIG["circuit_breaker_config"]["enabled"]:
+            self.breakers = CircuitBreakerManager(on_state_change=self._on_breaker_state_change)
+        
+        # 初始化API端点（优先使用本地缓存，后台刷新）
+        self.source_loader = ApiSourceLoader(self.session, logger=self.log)
+        self.source_loader.load(self.get_headers)
+        
+        # 书籍页面缓存，章节列表和书籍信息共用一次请求与解析
+        self.book_pages = BookPageCache(self._fetch_page)
+        
+        # 目录缓存，用于增量更新
+        self.catalog_cache = CatalogCache()
+        
+        # 按批量端点记录的自适应批量大小
+        self.batch_sizer = BatchSizer(CONFIG["batch_config"]["max_batch_size"])
+        
+        # 可选的多进程内容处理池，仅在下载期间存在
+        self.content_pool = None
         
-        # 初始化API端点
-        self.fetch_api_endpoints_from_server()
+        # 当前书籍的章节内容库，用于续传
+        self.chapter_store = None
+        
+        # TXT/EPUB增量写入器，仅在下载期间存在
+        self.output_writer = None
     
     def log(self, message: str):
         """记录日志"""
@@ -80,7 +209,7 @@ class EnhancedNovelDownloader:
         if self.progress_callback:
             self.progress_callback(progress, message)
     
-    def make_request(self, url, headers=None, params=None, data=None, method='GET', verify=False, timeout=None):
+    def make_request(self, url, headers=None, params=None, data=None, method='GET', verify=False, timeout=None, stream=False):
         """通用的请求函数"""
         if headers is None:
             headers = self.get_headers()
@@ -90,17 +219,17 @@ class EnhancedNovelDownloader:
                 'headers': headers,
                 'params': params,
                 'verify': verify,
-                'timeout': timeout if timeout is not None else CONFIG["request_timeout"]
+                'timeout': timeout if timeout is not None else CONFIG["request_timeout"],
+                'stream': stream
             }
             
             if data:
                 request_params['json'] = data
 
-            session = requests.Session()
             if method.upper() == 'GET':
-                response = session.get(url, **request_params)
+                response = self.session.get(url, **request_params)
             elif method.upper() == 'POST':
-                response = session.post(url, **request_params)
+                response = self.session.post(url, **request_params)
             else:
                 raise ValueError(f"不支持的HTTP方法: {method}")
             
@@ -130,47 +259,7 @@ class EnhancedNovelDownloader:
 
     def fetch_api_endpoints_from_server(self):
         """从服务器获取API列表"""
-        try:
-            headers = self.get_headers()
-            headers["X-Auth-Token"] = CONFIG["auth_token"]
-            
-            response = requests.get(
-                CONFIG["server_url"],
-                headers=headers,
-                timeout=10,
-                verify=False
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                sources = data.get("sources", [])
-                
-                CONFIG["api_endpoints"] = []
-                
-                for source in sources:
-                    if source["enabled"]:
-                        if source["name"] == CONFIG["batch_config"]["name"]:
-                            base_url = source["single_url"].split('?')[0]
-                            batch_endpoint = base_url.split('/')[-1]
-                            base_url = base_url.rsplit('/', 1)[0] if '/' in base_url else base_url
-                            
-                            CONFIG["batch_config"]["base_url"] = base_url
-                            CONFIG["batch_config"]["batch_endpoint"] = f"/{batch_endpoint}"
-                            CONFIG["batch_config"]["token"] = source.get("token", "")
-                            CONFIG["batch_config"]["enabled"] = True
-                        else:
-                            endpoint = {"url": source["single_url"], "name": source["name"]}
-                            if source["name"] == "fanqie_sdk":
-                                endpoint["params"] = source.get("params", {})
-                                endpoint["data"] = source.get("data", {})
-                            CONFIG["api_endpoints"].append(endpoint)
-                
-                self.log("成功从服务器获取API列表!")
-                return True
-            else:
-                self.log(f"获取API列表失败，状态码: {response.status_code}")
-        except Exception as e:
-            self.log(f"获取API列表异常: {str(e)}")
+        return self.source_loader.fetch(self.get_headers())
 
     def extract_chapters(self, soup):
         """解析章节列表"""
@@ -201,7 +290,15 @@ class EnhancedNovelDownloader:
         return chapters
 
     def batch_download_chapters(self, item_ids, headers):
-        """批量下载章节内容"""
+        """
+        批量下载章节内容
+        
+        Returns:
+            {item_id: 内容}，响应无法解析时返回None
+        
+        Raises:
+            BatchEndpointError: 连接错误、超时或状态码不是200
+        """
         if not CONFIG["batch_config"]["enabled"] or CONFIG["batch_config"]["name"] != "qyuing":
             self.log("批量下载功能仅限qyuing API")
             return None
@@ -209,13 +306,13 @@ class EnhancedNovelDownloader:
         batch_config = CONFIG["batch_config"]
         url = f"{batch_config['base_url']}{batch_config['batch_endpoint']}"
         
+        batch_headers = headers.copy()
+        if batch_config["token"]:
+            batch_headers["token"] = batch_config["token"]
+        batch_headers["Content-Type"] = "application/json"
+        
+        payload = {"item_ids": item_ids}
         try:
-            batch_headers = headers.copy()
-            if batch_config["token"]:
-                batch_headers["token"] = batch_config["token"]
-            batch_headers["Content-Type"] = "application/json"
-            
-            payload = {"item_ids": item_ids}
             response = self.make_request(
                 url,
                 headers=batch_headers,
@@ -224,18 +321,92 @@ class EnhancedNovelDownloader:
                 timeout=batch_config["timeout"],
                 verify=False
             )
-            
-            if response.status_code == 200:
-                data = response.json()
-                if isinstance(data, dict) and "data" in data:
-                    return data["data"]
-                return data
-            else:
-                self.log(f"批量下载失败，状态码: {response.status_code}")
+        except requests.exceptions.RequestException as e:
+            raise BatchEndpointError(f"批量下载异常: {str(e)}") from e
+        
+        if response.status_code != 200:
+            self.log(f"批量下载失败，状态码: {response.status_code}")
+            raise BatchEndpointError(f"批量下载失败，状态码: {response.status_code}")
+        
+        try:
+            data = response.json()
+        except ValueError:
+            self.log("批量下载响应无法解析")
+            return None
+        if isinstance(data, dict) and "data" in data:
+            return data["data"]
+        return data
+
+    def iter_batch_chapters(self, item_ids, headers):
+        """
+        流式批量下载章节内容，边接收边解析，逐个返回 (item_id, content)
+        
+        连接错误、超时或状态码不是200时抛出 BatchEndpointError；响应体不会整体缓存在内存中。
+        """
+        batch_config = CONFIG["batch_config"]
+        url = f"{batch_config['base_url']}{batch_config['batch_endpoint']}"
+        
+        batch_headers = headers.copy()
+        if batch_config["token"]:
+            batch_headers["token"] = batch_config["token"]
+        batch_headers["Content-Type"] = "application/json"
+        
+        payload = {"item_ids": item_ids}
+        try:
+            response = self.make_request(
+                url,
+                headers=batch_headers,
+                method='POST',
+                data=json.dumps(payload),
+                timeout=batch_config["timeout"],
+                verify=False,
+                stream=True
+            )
+        except requests.exceptions.RequestException as e:
+            raise BatchEndpointError(f"批量下载异常: {str(e)}") from e
+        
+        with response:
+            if response.status_code != 200:
+                raise BatchEndpointError(f"批量下载失败，状态码: {response.status_code}")
+            yield from iter_object_items(response.iter_content(chunk_size=65536))
+
+    def fetch_batch_into(self, item_ids, headers, on_chapter):
+        """
+        批量下载章节并逐章交给 on_chapter(item_id, content) 处理
+        
+        Returns:
+            {item_id: 正文长度}，仅包含 on_chapter 接受的章节；响应无法解析返回None
+        
+        Raises:
+            BatchEndpointError: 端点本身失败（没有收到任何章节前的连接错误、超时或非200响应）
+        """
+        if CONFIG["batch_config"].get("stream"):
+            items = self.iter_batch_chapters(item_ids, headers)
+        else:
+            batch_results = self.batch_download_chapters(item_ids, headers)
+            if not batch_results or not isinstance(batch_results, dict):
                 return None
+            items = batch_results.items()
+        
+        received = {}
+        try:
+            for item_id, content in items:
+                if isinstance(content, dict):
+                    content = content.get("content", "")
+                if content and on_chapter(item_id, content):
+                    received[item_id] = len(content)
+        except BatchEndpointError:
+            raise
+        except requests.exceptions.RequestException as e:
+            self.log(f"批量下载异常: {str(e)[:50]}")
+            if not received:
+                raise BatchEndpointError(str(e)) from e
         except Exception as e:
-            self.log(f"批量下载异常！")
-            return None
+            self.log(f"批量下载异常: {str(e)[:50]}")
+            # 中途断开或响应损坏时保留已处理的章节，其余章节拆分后重试
+            if not received:
+                return None
+        return received
 
     def process_chapter_content(self, content):
         """处理章节内容"""
@@ -243,192 +414,338 @@ class EnhancedNovelDownloader:
             return ""
         
         try:
-            paragraphs = []
-            if '<p idx=' in content:
-                paragraphs = re.findall(r'<p idx="\d+">(.*?)</p>', content, re.DOTALL)
-            else:
-                paragraphs = content.split('\n')
-            
-            if paragraphs:
-                first_para = paragraphs[0].strip()
-                if not first_para.startswith('    '):
-                    paragraphs[0] = '    ' + first_para
-            
-            cleaned_content = "\n".join(p.strip() for p in paragraphs if p.strip())
-            formatted_content = '\n'.join('    ' + line if line.strip() else line 
-                                        for line in cleaned_content.split('\n'))
-            
-            formatted_content = re.sub(r'<header>.*?</header>', '', formatted_content, flags=re.DOTALL)
-            formatted_content = re.sub(r'<footer>.*?</footer>', '', formatted_content, flags=re.DOTALL)
-            formatted_content = re.sub(r'</?article>', '', formatted_content)
-            formatted_content = re.sub(r'<[^>]+>', '', formatted_content)
-            formatted_content = re.sub(r'\\u003c|\\u003e', '', formatted_content)
-            
-            # 压缩多余的空行
-            formatted_content = re.sub(r'\n{3,}', '\n\n', formatted_content).strip()
-            return formatted_content
+            # 启用进程池时在子进程中处理
+            if self.content_pool:
+                return self.content_pool.process(content)
+            return format_chapter_content(content)
         except Exception as e:
             self.log(f"内容处理错误: {str(e)}")
             return str(content)
 
-    def down_text(self, chapter_id, headers, book_id=None):
-        """下载章节内容"""
-        for idx, endpoint in enumerate(CONFIG["api_endpoints"]):
-            if self.is_cancelled:
-                return None, None
-                
+    def build_chapter_requests(self, chapter_id):
+        """
+        按端点顺序生成章节下载请求，启用端点统计时表现好的端点排在前面
+        
+        Returns:
+            [(api_name, request), ...]，request包含 method/url/params/data
+        """
+        endpoints = CONFIG["api_endpoints"]
+        if self.endpoint_stats:
+            endpoints = self.endpoint_stats.rank(endpoints)
+        
+        requests_list = []
+        for endpoint in endpoints:
             current_endpoint = endpoint["url"]
             api_name = endpoint["name"]
             
-            try:
-                time.sleep(random.uniform(0.1, 0.5))
-                
-                if api_name == "fanqie_sdk":
-                    params = endpoint.get("params", {"sdk_type": "4", "novelsdk_aid": "638505"})
-                    data = {
+            if api_name == "fanqie_sdk":
+                request = {
+                    "method": "POST",
+                    "url": current_endpoint,
+                    "params": endpoint.get("params", {"sdk_type": "4", "novelsdk_aid": "638505"}),
+                    "data": {
                         "item_id": chapter_id,
                         "need_book_info": 1,
                         "show_picture": 1,
                         "sdk_type": 1
                     }
-                    
-                    response = self.make_request(
-                        current_endpoint,
-                        headers=headers.copy(),
-                        params=params,
-                        method='POST',
-                        data=data,
-                        timeout=CONFIG["request_timeout"],
-                        verify=False
-                    )
-                    
-                    if response and response.status_code == 200:
-                        try:
-                            data = response.json()
-                            content = data.get("data", {}).get("content", "")
-                            if content:
-                                processed = self.process_chapter_content(content)
-                                return data.get("data", {}).get("title", ""), processed
-                        except json.JSONDecodeError:
-                            continue
-
-                elif api_name == "fqweb":
-                    url = f"http://fqweb.jsj66.com/content?item_id={chapter_id}"
-                    
-                    response = self.make_request(
-                        url,
-                        headers=headers.copy(),
-                        timeout=CONFIG["request_timeout"],
-                        verify=False
-                    )
-                    
-                    if response and response.status_code == 200:
-                        try:
-                            data = response.json()
-                            if data.get("data", {}).get("code") in ["0", 0]:
-                                content = data.get("data", {}).get("data", {}).get("content", "")
-                                if content:
-                                    processed = self.process_chapter_content(content)
-                                    return "", processed
-                        except:
-                            continue
-
-                elif api_name == "qyuing":
-                    # 修复URL格式化问题
-                    if "{chapter_id}" in current_endpoint:
-                        url = current_endpoint.format(chapter_id=chapter_id)
-                    else:
-                        url = f"{current_endpoint}?chapter_id={chapter_id}"
-                    
-                    response = self.make_request(
-                        url,
-                        headers=headers.copy(),
-                        timeout=CONFIG["request_timeout"],
-                        verify=False
-                    )
-                    
-                    if response and response.status_code == 200:
-                        try:
-                            data = response.json()
-                            if data.get("code") == 0:
-                                content = data.get("data", {}).get(chapter_id, {}).get("content", "")
-                                if content:
-                                    return "", self.process_chapter_content(content)
-                        except:
-                            continue
-
-                elif api_name == "lsjk":
-                    # 修复URL格式化问题
-                    if "{chapter_id}" in current_endpoint:
-                        url = current_endpoint.format(chapter_id=chapter_id)
-                    else:
-                        url = f"{current_endpoint}?chapter_id={chapter_id}"
-                    
-                    response = self.make_request(
-                        url,
-                        headers=headers.copy(),
-                        timeout=CONFIG["request_timeout"],
-                        verify=False
-                    )
-                    
-                    if response and response.text:
-                        try:
-                            paragraphs = re.findall(r'<p idx="\d+">(.*?)</p>', response.text)
-                            cleaned = "\n".join(p.strip() for p in paragraphs if p.strip())
-                            formatted = '\n'.join('    ' + line if line.strip() else line 
-                                                for line in cleaned.split('\n'))
-                            return "", formatted
-                        except:
-                            continue
+                }
+            elif api_name == "fqweb":
+                request = {"method": "GET", "url": f"http://fqweb.jsj66.com/content?item_id={chapter_id}"}
+            elif api_name in ("qyuing", "lsjk"):
+                # 修复URL格式化问题
+                if "{chapter_id}" in current_endpoint:
+                    url = current_endpoint.format(chapter_id=chapter_id)
+                else:
+                    url = f"{current_endpoint}?chapter_id={chapter_id}"
+                request = {"method": "GET", "url": url}
+            else:
+                request = None
+            
+            requests_list.append((api_name, request))
+        return requests_list
 
+    def parse_chapter_response(self, api_name, chapter_id, status_code, text):
+        """
+        解析各API返回的章节内容
+        
+        Returns:
+            (title, content)，解析失败返回None
+        """
+        # 非200响应即使带有正文也视为失败，计入端点统计和熔断器
+        if status_code != 200:
+            return None
+        
+        if api_name == "lsjk":
+            if not text:
+                return None
+            paragraphs = re.findall(r'<p idx="\d+">(.*?)</p>', text)
+            cleaned = "\n".join(p.strip() for p in paragraphs if p.strip())
+            if not cleaned:
+                return None
+            formatted = '\n'.join('    ' + line if line.strip() else line 
+                                for line in cleaned.split('\n'))
+            return "", formatted
+        
+        try:
+            data = json.loads(text)
+        except (json.JSONDecodeError, TypeError):
+            return None
+        
+        if api_name == "fanqie_sdk":
+            content = data.get("data", {}).get("content", "")
+            if content:
+                return data.get("data", {}).get("title", ""), self.process_chapter_content(content)
+        elif api_name == "fqweb":
+            if data.get("data", {}).get("code") in ["0", 0]:
+                content = data.get("data", {}).get("data", {}).get("content", "")
+                if content:
+                    return "", self.process_chapter_content(content)
+        elif api_name == "qyuing":
+            if data.get("code") == 0:
+                content = data.get("data", {}).get(chapter_id, {}).get("content", "")
+                if content:
+                    return "", self.process_chapter_content(content)
+        return None
+
+    def _request_endpoint(self, api_name, request, headers):
+        """
+        在端点并发控制下发送章节请求
+        
+        Returns:
+            (response, latency)
+        """
+        controller = None
+        if self.concurrency:
+            controller = self.concurrency.get(api_name)
+            controller.acquire()
+        
+        start_time = time.time()
+        try:
+            response = self.make_request(
+                request["url"],
+                headers=headers.copy(),
+                params=request.get("params"),
+                method=request["method"],
+                data=request.get("data"),
+                timeout=CONFIG["request_timeout"],
+                verify=False
+            )
+        except Exception as e:
+            latency = time.time() - start_time
+            if controller:
+                controller.release(latency, None, e)
+            self._record_endpoint(api_name, latency, False)
+            raise
+        
+        latency = time.time() - start_time
+        if controller:
+            controller.release(latency, response.status_code)
+        return response, latency
+
+    def _record_endpoint(self, api_name, latency, success):
+        """记录端点请求结果"""
+        if self.endpoint_stats:
+            self.endpoint_stats.record(api_name, latency, success)
+
+    def _single_progress_message(self, completed, total):
+        """单章下载进度消息，启用自适应并发时附带各端点当前并发数"""
+        message = f"单章下载进度: {completed}/{total}"
+        if self.concurrency:
+            summary = self.concurrency.summary()
+            if summary:
+                message += f" (并发: {summary})"
+        return message
+
+    def _on_breaker_state_change(self, api_name, old_state, new_state):
+        """熔断器状态变化时记录日志"""
+        names = CircuitBreaker.STATE_NAMES
+        self.log(f"API {api_name} 熔断器状态: {names[old_state]} -> {names[new_state]}")
+
+    def _breaker_closed(self, api_name):
+        """端点熔断器是否关闭（未启用熔断器视为关闭）"""
+        return not self.breakers or self.breakers.is_closed(api_name)
+
+    def _attempt_endpoint(self, api_name, request, chapter_id, headers):
+        """请求单个端点并解析章节内容，返回 (title, content) 或 None"""
+        if self.rate_limiter:
+            self.rate_limiter.acquire(api_name, request["url"])
+        if self.hedge_policy:
+            self.hedge_policy.record_request()
+        
+        try:
+            response, latency = self._request_endpoint(api_name, request, headers)
+            result = self.parse_chapter_response(api_name, chapter_id, response.status_code, response.text)
+        except Exception:
+            if self.breakers:
+                self.breakers.get(api_name).record_failure()
+            raise
+        
+        self._record_endpoint(api_name, latency, result is not None)
+        if self.breakers:
+            if result is not None:
+                self.breakers.get(api_name).record_success()
+            else:
+                self.breakers.get(api_name).record_failure()
+        return result
+
+    def _attempt_hedged(self, primary, backup, chapter_id, headers):
+        """
+        对冲请求：主端点超过其p95延迟仍未返回时，向备用端点发送重复请求，
+        先返回有效内容的一方胜出，另一方被取消（已发出的阻塞请求结果会被丢弃）
+        
+        Returns:
+            (result, backup_used)
+        """
+        api_name, request = primary
+        primary_future = self._hedge_executor.submit(self._attempt_endpoint, api_name, request, chapter_id, headers)
+        
+        delay = self.hedge_policy.hedge_delay(api_name)
+        if delay is None:
+            return primary_future.result(), False
+        try:
+            return primary_future.result(timeout=delay), False
+        except FuturesTimeoutError:
+            pass
+        
+        if not self.hedge_policy.try_acquire():
+            return primary_future.result(), False
+        
+        backup_name, backup_request = backup
+        backup_future = self._hedge_executor.submit(self._attempt_endpoint, backup_name, backup_request, chapter_id, headers)
+        pending = {primary_future, backup_future}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = future.result()
+                except Exception:
+                    result = None
+                if result is not None:
+                    for other in pending:
+                        other.cancel()
+                    return result, True
+        return None, True
+
+    def down_text(self, chapter_id, headers, book_id=None):
+        """下载章节内容"""
+        chapter_requests = self.build_chapter_requests(chapter_id)
+        hedged_names = set()
+        for idx, (api_name, request) in enumerate(chapter_requests):
+            if self.is_cancelled:
+                return None, None
+            
+            if request is None or api_name in hedged_names:
+                continue
+            # 熔断器打开时直接跳过该端点
+            if self.breakers and not self.breakers.get(api_name).allow_request():
+                continue
+            
+            try:
+                backup = None
+                if self.hedge_policy:
+                    backup = next((item for item in chapter_requests[idx + 1:]
+                                   if item[1] is not None and self._breaker_closed(item[0])), None)
+                
+                if backup:
+                    result, backup_used = self._attempt_hedged((api_name, request), backup, chapter_id, headers)
+                    if backup_used:
+                        # 备用端点已作为对冲请求尝试过
+                        hedged_names.add(backup[0])
+                else:
+                    result = self._attempt_endpoint(api_name, request, chapter_id, headers)
+                if result is not None:
+                    return result
             except Exception as e:
-                if idx < len(CONFIG["api_endpoints"]) - 1:
+                if idx < len(chapter_requests) - 1:
                     with print_lock:
                         print(f"API {api_name} 请求异常: {str(e)[:50]}...，尝试切换")
-                time.sleep(1)
             
-            if idx < len(CONFIG["api_endpoints"]) - 1:
+            if idx < len(chapter_requests) - 1:
                 self.log("正在切换到下一个api")
         
         with print_lock:
             print(f"章节 {chapter_id} 所有API均失败")
         return None, None
 
+    def _fetch_page(self, url, headers):
+        """请求书籍页面，供页面缓存使用"""
+        response = self.session.get(url, headers=headers, timeout=CONFIG["request_timeout"])
+        if response.status_code != 200:
+            self.log(f"网络请求失败，状态码: {response.status_code}")
+        return response
+
+    def _fetch_directory_ids(self, book_id, headers):
+        """从目录API获取全部章节ID"""
+        api_url = f"https://fanqienovel.com/api/reader/directory/detail?bookId={book_id}"
+        api_response = self.session.get(api_url, headers=headers, timeout=CONFIG["request_timeout"])
+        api_data = api_response.json()
+        return api_data.get("data", {}).get("allItemIds", [])
+
+    def _merge_chapters(self, chapters, chapter_ids):
+        """以目录API的章节ID顺序为准，合并网页中解析出的章节标题"""
+        # 按章节ID建立索引，重复ID以页面中第一次出现的为准
+        web_titles = {ch["id"]: ch["title"] for ch in reversed(chapters)}
+        
+        final_chapters = []
+        for idx, chapter_id in enumerate(chapter_ids):
+            web_title = web_titles.get(chapter_id)
+            
+            if web_title is not None:
+                final_chapters.append({
+                    "id": chapter_id,
+                    "title": web_title,
+                    "index": idx
+                })
+            else:
+                final_chapters.append({
+                    "id": chapter_id,
+                    "title": f"第{idx+1}章",
+                    "index": idx
+                })
+        
+        return final_chapters
+
     def get_chapters_from_api(self, book_id, headers):
         """从API获取章节列表"""
         try:
-            page_url = f'https://fanqienovel.com/page/{book_id}'
-            response = requests.get(page_url, headers=headers, timeout=CONFIG["request_timeout"])
-            soup = bs4.BeautifulSoup(response.text, 'html.parser')
-            chapters = self.extract_chapters(soup)  
-            
-            api_url = f"https://fanqienovel.com/api/reader/directory/detail?bookId={book_id}"
-            api_response = requests.get(api_url, headers=headers, timeout=CONFIG["request_timeout"])
-            api_data = api_response.json()
-            chapter_ids = api_data.get("data", {}).get("allItemIds", [])
-            
-            final_chapters = []
-            for idx, chapter_id in enumerate(chapter_ids):
-                web_chapter = next((ch for ch in chapters if ch["id"] == chapter_id), None)
-                
-                if web_chapter:
-                    final_chapters.append({
-                        "id": chapter_id,
-                        "title": web_chapter["title"],
-                        "index": idx
-                    })
-                else:
-                    final_chapters.append({
-                        "id": chapter_id,
-                        "title": f"第{idx+1}章",
-                        "index": idx
-                    })
-            
-            return final_chapters
+            page = self.book_pages.get(book_id, headers)
+            chapters = page.chapters(self.extract_chapters) if page else []
+            return self._merge_chapters(chapters, self._fetch_directory_ids(book_id, headers))
         except Exception as e:
             self.log(f"获取章节列表失败: {str(e)}")
             return None
 
+    def bootstrap_book(self, book_id, headers):
+        """
+        并发获取书籍页面、目录API和增强书籍信息，耗时取决于最慢的一个请求
+        
+        返回: {"chapters": 章节列表或None, "book_info": (书名, 作者, 简介), "enhanced_info": 增强信息或None}
+        """
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            page_future = executor.submit(self.book_pages.get, book_id, headers)
+            ids_future = executor.submit(self._fetch_directory_ids, book_id, headers)
+            enhanced_future = executor.submit(self.get_book_info_enhanced, book_id, headers)
+        
+        page = None
+        try:
+            page = page_future.result()
+        except Exception as e:
+            self.log(f"获取书籍页面失败: {str(e)}")
+        
+        chapters = None
+        try:
+            web_chapters = page.chapters(self.extract_chapters) if page else []
+            chapters = self._merge_chapters(web_chapters, ids_future.result())
+        except Exception as e:
+            self.log(f"获取章节列表失败: {str(e)}")
+        
+        return {
+            "chapters": chapters,
+            "book_info": page.info if page else (None, None, None),
+            "enhanced_info": enhanced_future.result()
+        }
+
     def create_epub_book(self, name, author_name, description, chapter_results, chapters):
         """创建EPUB文件"""
         book = epub.EpubBook()
@@ -478,7 +795,7 @@ class EnhancedNovelDownloader:
                         f.write(content + '\n\n')
                     
                     downloaded.add(chapter["id"])
-                    self.save_status(save_path, downloaded)
+                    open_journal(os.path.join(save_path, CONFIG["status_file"])).record(chapter["id"])
                     return chapter["index"], content
                 except Exception as e:
                     self.log(f"写入文件失败: {str(e)}")
@@ -487,33 +804,11 @@ class EnhancedNovelDownloader:
 
     def get_book_info(self, book_id, headers):
         """获取书名、作者、简介"""
-        url = f'https://fanqienovel.com/page/{book_id}'
         try:
-            response = requests.get(url, headers=headers, timeout=CONFIG["request_timeout"])
-            if response.status_code != 200:
-                self.log(f"网络请求失败，状态码: {response.status_code}")
+            page = self.book_pages.get(book_id, headers)
+            if not page:
                 return None, None, None
-
-            soup = bs4.BeautifulSoup(response.text, 'html.parser')
-            
-            name_element = soup.find('h1')
-            name = name_element.text if name_element else "未知书名"
-            
-            author_name = "未知作者"
-            author_name_element = soup.find('div', class_='author-name')
-            if author_name_element:
-                author_name_span = author_name_element.find('span', class_='author-name-text')
-                if author_name_span:
-                    author_name = author_name_span.text
-            
-            description = "无简介"
-            description_element = soup.find('div', class_='page-abstract-content')
-            if description_element:
-                description_p = description_element.find('p')
-                if description_p:
-                    description = description_p.text
-            
-            return name, author_name, description
+            return page.info
         except Exception as e:
             self.log(f"获取书籍信息失败: {str(e)}")
             return None, None, None
@@ -525,7 +820,7 @@ class EnhancedNovelDownloader:
         """
         try:
             url = f"http://fqweb.jsj66.com/info?book_id={book_id}"
-            response = requests.get(url, headers=headers, timeout=CONFIG["request_timeout"])
+            response = self.session.get(url, headers=headers, timeout=CONFIG["request_timeout"])
             
             if response.status_code != 200:
                 self.log(f"API请求失败，状态码: {response.status_code}")
@@ -584,31 +879,19 @@ class EnhancedNovelDownloader:
             return None
 
     def load_status(self, save_path):
-        """加载下载状态"""
-        status_file = os.path.join(save_path, CONFIG["status_file"])
-        if os.path.exists(status_file):
-            try:
-                with open(status_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        return set(data)
-                    return set()
-            except:
-                pass
-        return set()
+        """加载下载状态（快照加日志）"""
+        return open_journal(os.path.join(save_path, CONFIG["status_file"])).load()
 
     def save_status(self, save_path, downloaded):
-        """保存下载状态"""
-        status_file = os.path.join(save_path, CONFIG["status_file"])
-        with open(status_file, 'w', encoding='utf-8') as f:
-            json.dump(list(downloaded), f, ensure_ascii=False, indent=2)
+        """保存下载状态，只追加上次保存后新完成的章节"""
+        open_journal(os.path.join(save_path, CONFIG["status_file"])).save(downloaded)
 
     def cancel_download(self):
         """取消下载"""
         self.is_cancelled = True
         self.log("用户取消下载")
 
-    def run_download(self, book_id, save_path, file_format='txt', start_chapter=None, end_chapter=None):
+    def run_download(self, book_id, save_path, file_format='txt', start_chapter=None, end_chapter=None, use_async=None):
         """
         运行下载
         
@@ -618,6 +901,7 @@ class EnhancedNovelDownloader:
             file_format: 文件格式 ('txt' 或 'epub')
             start_chapter: 起始章节（可选，从0开始）
             end_chapter: 结束章节（可选，包含）
+            use_async: 单章下载是否使用异步引擎（可选，默认读取 async_config）
         """
         
         def signal_handler(sig, frame):
@@ -637,20 +921,33 @@ class EnhancedNovelDownloader:
         
         self.is_cancelled = False
         self.downloaded = set()
-        self.chapter_results = {}
+        self.chapter_results = ChapterResults()
+        self.chapter_store = None
+        self.output_writer = None
+        
+        if use_async is None:
+            use_async = CONFIG["async_config"]["enabled"]
+        if use_async and not AsyncDownloadEngine.is_available():
+            self.log("未安装aiohttp，单章下载回退到线程池模式")
+            use_async = False
+        
+        if CONFIG["content_pool_config"]["enabled"]:
+            self.content_pool = ContentProcessPool(format_chapter_content)
         
         try:
             self.update_progress(0, "开始下载...")
             
             headers = self.get_headers()
-            chapters = self.get_chapters_from_api(book_id, headers)
+            # 书籍页面、目录和增强信息并发获取
+            book = self.bootstrap_book(book_id, headers)
+            chapters = book["chapters"]
             if not chapters:
                 raise Exception("未找到任何章节，请检查小说ID是否正确。")
             
             self.update_progress(10, "获取书籍信息...")
             
-            # 优先尝试使用增强API获取详细信息
-            enhanced_info = self.get_book_info_enhanced(book_id, headers)
+            # 优先使用增强API获取的详细信息
+            enhanced_info = book["enhanced_info"]
             if enhanced_info:
                 name = enhanced_info['book_name']
                 author_name = enhanced_info['author']
@@ -659,7 +956,7 @@ class EnhancedNovelDownloader:
             else:
                 # 回退到原方法
                 self.log("增强API失败，使用网页爬取方式")
-                name, author_name, description = self.get_book_info(book_id, headers)
+                name, author_name, description = book["book_info"]
                 enhanced_info = None
             
             if not name:
@@ -672,10 +969,34 @@ class EnhancedNovelDownloader:
                 chapters = chapters[start_chapter:end_chapter+1]
                 self.log(f"选择下载章节 {start_chapter+1}-{end_chapter+1}")
 
+            # 与上次目录对比，改名的章节重新下载，移除的章节不再计入；目录缓存在下载结束后更新
+            catalog_diff = self.catalog_cache.compare(book_id, book["chapters"])
             self.downloaded = self.load_status(save_path)
+            # 已下载章节的内容从内容库恢复，内容库中没有的章节需要重新下载
+            self.chapter_store = ChapterStore(save_path, book_id)
+            if catalog_diff is not None:
+                self.log(format_diff(catalog_diff))
+                stale_ids = stale_chapter_ids(catalog_diff)
+                self.downloaded -= stale_ids
+                # 内容库与下载状态保持一致
+                self.chapter_store.discard(stale_ids)
+            # 正文超过内存预算时只保留在内容库中，写入文件时逐章读回
+            self.chapter_results = ChapterResults(self.chapter_store)
+            if self.chapter_store.enabled:
+                # 内容库逐章写入，下载状态按轮保存：中断前已写入内容库的章节即使不在下载状态中也已完成
+                restored = self.chapter_results.restore(chapters)
+                missing = {ch["id"] for ch in chapters if ch["id"] in self.downloaded} - restored
+                if restored:
+                    self.log(f"从内容库恢复 {len(restored)} 个章节")
+                if missing:
+                    self.log(f"{len(missing)} 个已下载章节没有保存内容，重新下载")
+                    self.downloaded -= missing
+                self.downloaded |= restored
             todo_chapters = [ch for ch in chapters if ch["id"] not in self.downloaded]
             
             if not todo_chapters:
+                self.save_status(save_path, self.downloaded)
+                self.catalog_cache.save(book_id, book["chapters"])
                 self.update_progress(100, "所有章节已是最新，无需下载")
                 return
 
@@ -683,9 +1004,21 @@ class EnhancedNovelDownloader:
             os.makedirs(save_path, exist_ok=True)
             
             output_file_path = os.path.join(save_path, f"{name}.{file_format}")
-            if file_format == 'txt' and not os.path.exists(output_file_path):
+            header = f"小说名: {name}\n作者: {author_name}\n内容简介: {description}\n\n"
+            if file_format == 'txt' and CONFIG["txt_writer_config"]["enabled"]:
+                # 章节按顺序到达即追加写入
+                self.output_writer = OrderedTxtWriter(output_file_path, header,
+                                                      [ch["index"] for ch in chapters], self.chapter_results)
+            elif file_format == 'txt' and not os.path.exists(output_file_path):
                 with open(output_file_path, 'w', encoding='utf-8') as f:
-                    f.write(f"小说名: {name}\n作者: {author_name}\n内容简介: {description}\n\n")
+                    f.write(header)
+            elif file_format == 'epub' and CONFIG["epub_writer_config"]["enabled"]:
+                # 章节到达即写入EPUB容器，下载结束时写入目录
+                self.output_writer = self._open_epub_writer(output_file_path, name, author_name, description, enhanced_info)
+            if self.output_writer:
+                # 已恢复的章节先写入
+                for index in sorted(self.chapter_results.keys()):
+                    self.output_writer.add(index)
 
             success_count = 0
             failed_chapters = []
@@ -694,45 +1027,63 @@ class EnhancedNovelDownloader:
             # 批量下载模式
             if CONFIG["batch_config"]["enabled"] and CONFIG["batch_config"]["name"] == "qyuing":
                 self.update_progress(30, "启用qyuing API批量下载模式...")
-                batch_size = CONFIG["batch_config"]["max_batch_size"]
+                batch_config = CONFIG["batch_config"]
+                # 批次大小随响应情况调整，响应无法解析或缺少章节时拆分后重新排队
+                scheduler = BatchScheduler(todo_chapters, self.batch_sizer, batch_config["name"])
+                chapters_by_id = {chap["id"]: chap for chap in todo_chapters}
+                
+                def save_batch_chapter(chap, processed):
+                    nonlocal success_count
+                    result = {
+                        "base_title": chap["title"],
+                        "api_title": "",
+                        "content": processed
+                    }
+                    # 先写入内容库，chapter.json中记录的章节都能恢复内容
+                    self.chapter_results.add(chap["id"], chap["index"], result)
+                    with lock:
+                        self.downloaded.add(chap["id"])
+                        success_count += 1
+                    if self.output_writer:
+                        self.output_writer.add(chap["index"])
+                
+                def store_batch_chapter(item_id, content):
+                    """批量响应中每解析出一章就立即处理并保存"""
+                    chap = chapters_by_id.get(item_id)
+                    if chap is None:
+                        return False
+                    if self.content_pool:
+                        # 交给进程池处理，不阻塞接收下一章
+                        self.content_pool.submit(content, lambda processed: save_batch_chapter(chap, processed))
+                    else:
+                        save_batch_chapter(chap, self.process_chapter_content(content))
+                    return True
                 
-                total_batches = (len(todo_chapters) + batch_size - 1) // batch_size
-                for i in range(0, len(todo_chapters), batch_size):
+                # 多个批量请求同时在途，按完成顺序处理
+                for batch, batch_results in pipeline_batches(
+                    scheduler.next_batch,
+                    scheduler.timed(lambda item_ids: self.fetch_batch_into(item_ids, headers, store_batch_chapter)),
+                    depth=batch_config.get("pipeline_depth", 1),
+                    is_cancelled=lambda: self.is_cancelled,
+                    rate_limiter=self.rate_limiter,
+                    rate_key=(batch_config["name"], batch_config.get("base_url") or "")
+                ):
                     if self.is_cancelled:
+                        self.batch_sizer.save()
                         return
-                        
-                    batch = todo_chapters[i:i + batch_size]
-                    item_ids = [chap["id"] for chap in batch]
                     
-                    current_batch = i // batch_size + 1
-                    progress = 30 + (current_batch / total_batches) * 40  # 30%-70%
-                    self.update_progress(progress, f"批量下载第 {current_batch}/{total_batches} 批")
+                    # 章节内容已在接收时处理，这里只收集需要转为单章下载的章节
+                    failed = scheduler.resolve(batch, batch_results)
+                    if failed:
+                        self.log(f"批量下载失败，{len(failed)} 个章节转为单章下载")
+                        failed_chapters.extend(failed)
                     
-                    batch_results = self.batch_download_chapters(item_ids, headers)
-                    if not batch_results:
-                        self.log(f"第 {current_batch} 批下载失败")
-                        failed_chapters.extend(batch)
-                        continue
-                    
-                    for chap in batch:
-                        content = batch_results.get(chap["id"], "")
-                        if isinstance(content, dict):
-                            content = content.get("content", "")
-                        
-                        if content:
-                            processed = self.process_chapter_content(content)
-                            with lock:
-                                self.chapter_results[chap["index"]] = {
-                                    "base_title": chap["title"],
-                                    "api_title": "",
-                                    "content": processed
-                                }
-                                self.downloaded.add(chap["id"])
-                                success_count += 1
-                        else:
-                            with lock:
-                                failed_chapters.append(chap)
+                    progress = 30 + (scheduler.resolved / len(todo_chapters)) * 40  # 30%-70%
+                    self.update_progress(progress, f"批量下载 {scheduler.resolved}/{len(todo_chapters)} 章")
                 
+                if self.content_pool:
+                    self.content_pool.join()
+                self.batch_sizer.save()
                 todo_chapters = failed_chapters.copy()
                 failed_chapters = []
                 self.write_downloaded_chapters_in_order(output_file_path, name, author_name, description, file_format, enhanced_info)
@@ -742,25 +1093,31 @@ class EnhancedNovelDownloader:
             if todo_chapters:
                 self.update_progress(70, f"开始单章下载模式，剩余 {len(todo_chapters)} 个章节...")
                 
-                def download_task(chapter):
+                def handle_result(chapter, title, content):
                     nonlocal success_count
+                    if content:
+                        result = {
+                            "base_title": chapter["title"],
+                            "api_title": title,
+                            "content": content
+                        }
+                        self.chapter_results.add(chapter["id"], chapter["index"], result)
+                        with lock:
+                            self.downloaded.add(chapter["id"])
+                            success_count += 1
+                        if self.output_writer:
+                            self.output_writer.add(chapter["index"])
+                    else:
+                        with lock:
+                            failed_chapters.append(chapter)
+
+                def download_task(chapter):
                     if self.is_cancelled:
                         return
                         
                     try:
                         title, content = self.down_text(chapter["id"], headers, book_id)
-                        if content:
-                            with lock:
-                                self.chapter_results[chapter["index"]] = {
-                                    "base_title": chapter["title"],
-                                    "api_title": title,
-                                    "content": content
-                                }
-                                self.downloaded.add(chapter["id"])
-                                success_count += 1
-                        else:
-                            with lock:
-                                failed_chapters.append(chapter)
+                        handle_result(chapter, title, content)
                     except Exception as e:
                         self.log(f"章节 {chapter['id']} 下载失败！")
                         with lock:
@@ -771,19 +1128,25 @@ class EnhancedNovelDownloader:
                     self.log(f"第 {attempt} 次尝试，剩余 {len(todo_chapters)} 个章节...")
                     attempt += 1
                     
-                    with ThreadPoolExecutor(max_workers=CONFIG["max_workers"]) as executor:
-                        futures = [executor.submit(download_task, ch) for ch in todo_chapters]
-                        
-                        completed = 0
-                        for future in as_completed(futures):
-                            if self.is_cancelled:
-                                break
-                            completed += 1
-                            progress = 70 + (completed / len(todo_chapters)) * 25  # 70%-95%
-                            self.update_progress(progress, f"单章下载进度: {completed}/{len(todo_chapters)}")
+                    if use_async:
+                        self._download_round_async(todo_chapters, headers, handle_result)
+                    else:
+                        # 自适应并发时线程池按上限创建，实际并发由各端点控制器限制
+                        with ThreadPoolExecutor(max_workers=worker_count()) as executor:
+                            futures = [executor.submit(download_task, ch) for ch in todo_chapters]
+                            
+                            completed = 0
+                            for future in as_completed(futures):
+                                if self.is_cancelled:
+                                    break
+                                completed += 1
+                                progress = 70 + (completed / len(todo_chapters)) * 25  # 70%-95%
+                                self.update_progress(progress, self._single_progress_message(completed, len(todo_chapters)))
                     
                     self.write_downloaded_chapters_in_order(output_file_path, name, author_name, description, file_format, enhanced_info)
                     self.save_status(save_path, self.downloaded)
+                    if self.endpoint_stats:
+                        self.endpoint_stats.save()
                     todo_chapters = failed_chapters.copy()
                     failed_chapters = []
                     
@@ -791,6 +1154,8 @@ class EnhancedNovelDownloader:
                         time.sleep(1)
 
             if not self.is_cancelled:
+                # 改名和移除的章节已从下载状态中去掉，之后再更新目录缓存
+                self.catalog_cache.save(book_id, book["chapters"])
                 self.update_progress(100, f"下载完成！成功下载 {success_count} 个章节")
             
         except Exception as e:
@@ -800,23 +1165,92 @@ class EnhancedNovelDownloader:
                 self.write_downloaded_chapters_in_order(output_file_path, name, author_name, description, file_format, enhanced_info)
                 self.save_status(save_path, self.downloaded)
             raise
+        finally:
+            # 页面缓存只在本次下载内有效
+            self.book_pages.invalidate(book_id)
+            if self.output_writer:
+                self.output_writer.close()
+                self.output_writer = None
+            if self.chapter_store:
+                # 下载结果都已在内容库中，下载结束后不再占用内存
+                self.chapter_results.release()
+                self.chapter_store.close()
+            if self.content_pool:
+                self.content_pool.shutdown()
+                self.content_pool = None
+
+    def _download_round_async(self, chapters, headers, on_result):
+        """使用异步引擎完成一轮单章下载"""
+        def on_progress(completed, total):
+            progress = 70 + (completed / total) * 25  # 70%-95%
+            self.update_progress(progress, f"单章下载进度: {completed}/{total}")
+        
+        engine = AsyncDownloadEngine(
+            self.build_chapter_requests,
+            self.parse_chapter_response,
+            max_concurrency=CONFIG["async_config"]["max_concurrency"],
+            timeout=CONFIG["request_timeout"],
+            is_cancelled=lambda: self.is_cancelled,
+            rate_limiter=self.rate_limiter,
+            record_attempt=self._record_endpoint,
+            hedge_policy=self.hedge_policy,
+            breakers=self.breakers
+        )
+        engine.download(chapters, headers, on_result, on_progress)
 
     def write_downloaded_chapters_in_order(self, output_file_path, name, author_name, description, file_format, enhanced_info=None):
         """按章节顺序写入"""
         if not self.chapter_results:
             return
             
-        if file_format == 'txt':
+        if self.output_writer:
+            # 增量写入器已写入到达的章节，这里只补上缺失的章节并同步到磁盘
+            self.output_writer.checkpoint()
+        elif file_format == 'txt':
             with open(output_file_path, 'w', encoding='utf-8') as f:
                 f.write(f"小说名: {name}\n作者: {author_name}\n内容简介: {description}\n\n")
-                for idx in sorted(self.chapter_results.keys()):
-                    result = self.chapter_results[idx]
+                for idx, result in self.chapter_results.items_in_order():
                     title = f'{result["base_title"]} {result["api_title"]}' if result["api_title"] else result["base_title"]
                     f.write(f"{title}\n{result['content']}\n\n")
         elif file_format == 'epub':
             # 传递增强信息到EPUB创建方法
             self._create_epub_with_enhanced_info(output_file_path, name, author_name, description, enhanced_info)
 
+    def _fetch_cover(self, enhanced_info):
+        """下载封面，返回 (文件名, 图片数据)，没有封面或下载失败返回None"""
+        if not enhanced_info or not enhanced_info.get('thumb_url'):
+            return None
+        try:
+            response = self.session.get(enhanced_info['thumb_url'], timeout=10)
+            if response.status_code == 200:
+                ext = 'jpg'
+                ct = response.headers.get('content-type', '')
+                if 'png' in ct:
+                    ext = 'png'
+                elif 'webp' in ct:
+                    ext = 'webp'
+                elif 'heic' in ct:
+                    # EPUB不支持heic格式，转换为jpg
+                    ext = 'jpg'
+                    self.log("检测到HEIC格式封面，转换为JPG格式")
+                self.log(f"成功添加封面 (格式: {ext})")
+                return f"cover.{ext}", response.content
+        except Exception as e:
+            self.log(f"封面下载失败: {e}")
+        return None
+
+    def _open_epub_writer(self, output_file_path, name, author_name, description, enhanced_info):
+        """创建流式EPUB写入器，先写入书籍信息页和封面"""
+        subjects = [enhanced_info.get('category'), enhanced_info.get('tags')] if enhanced_info else []
+        writer = StreamingEpubWriter(output_file_path, self.chapter_results, name, author_name, description,
+                                     subjects, identifier=f'book_{name}_{int(time.time())}')
+        writer.add_page('info.xhtml', '书籍信息',
+                        self._generate_enhanced_book_info_html(name, author_name, description, enhanced_info))
+        cover = self._fetch_cover(enhanced_info)
+        if cover:
+            writer.set_cover(*cover)
+        return writer
+
     def _create_epub_with_enhanced_info(self, output_file_path, name, author_name, description, enhanced_info):
         """使用增强信息创建EPUB文件"""
         book = epub.EpubBook()
@@ -833,19 +1267,7 @@ class EnhancedNovelDownloader:
             if enhanced_info.get('tags'):
                 book.add_metadata('DC', 'subject', enhanced_info['tags'])
 
-        # 创建CSS样式
-        style = '''
-        body { font-family: "Microsoft YaHei", "SimSun", serif; line-height: 1.8; margin: 20px; }
-        h1 { text-align: center; color: #333; border-bottom: 2px solid #ccc; padding-bottom: 10px; }
-        h2 { color: #555; margin-top: 30px; }
-        .book-info { background-color: #f9f9f9; padding: 15px; border-left: 4px solid #4CAF50; margin: 20px 0; }
-        .chapter { margin-top: 30px; }
-        .chapter-title { font-size: 1.2em; font-weight: bold; color: #2c3e50; border-bottom: 1px solid #eee; padding-bottom: 5px; }
-        .info-row { margin: 8px 0; }
-        .info-label { font-weight: bold; color: #2c3e50; }
-        '''
-        
-        nav_css = epub.EpubItem(uid="nav", file_name="style/nav.css", media_type="text/css", content=style)
+        nav_css = epub.EpubItem(uid="nav", file_name="style/nav.css", media_type="text/css", content=EPUB_STYLE)
         book.add_item(nav_css)
 
         # 创建详细信息页面
@@ -859,28 +1281,12 @@ class EnhancedNovelDownloader:
         spine = ['nav', info_chapter]
 
         # 添加封面（如果有）
-        if enhanced_info and enhanced_info.get('thumb_url'):
-            try:
-                response = requests.get(enhanced_info['thumb_url'], timeout=10)
-                if response.status_code == 200:
-                    ext = 'jpg'
-                    ct = response.headers.get('content-type', '')
-                    if 'png' in ct:
-                        ext = 'png'
-                    elif 'webp' in ct:
-                        ext = 'webp'
-                    elif 'heic' in ct:
-                        # EPUB不支持heic格式，转换为jpg
-                        ext = 'jpg'
-                        self.log("检测到HEIC格式封面，转换为JPG格式")
-                    book.set_cover(f"cover.{ext}", response.content)
-                    self.log(f"成功添加封面 (格式: {ext})")
-            except Exception as e:
-                self.log(f"封面下载失败: {e}")
+        cover = self._fetch_cover(enhanced_info)
+        if cover:
+            book.set_cover(*cover)
 
         # 添加章节
-        for idx in sorted(self.chapter_results.keys()):
-            result = self.chapter_results[idx]
+        for idx, result in self.chapter_results.items_in_order():
             title = f'{result["base_title"]} {result["api_title"]}' if result["api_title"] else result["base_title"]
             
             chapter = epub.EpubHtml(
@@ -1149,9 +1555,6 @@ def main():
     
     downloader.progress_callback = progress_callback
     
-    print("正在从服务器获取API列表...")
-    downloader.fetch_api_endpoints_from_server()
-    
     while True:
         book_id = input("\n请输入小说ID（输入q退出）：").strip()
         if book_id.lower() == 'q':
@@ -0,0 +1,284 @@
+# -*- coding: utf-8 -*-
+"""
+EPUB流式写入模块
+章节到达后立即生成XHTML写入zip容器，结束时再写入OPF、NCX和导航页，
+内存占用与书的长度无关，生成文件与下载同时进行
+"""
+
+import os
+import re
+import threading
+import time
+import uuid
+import zipfile
+from html import escape
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:
+    etree = None
+    lxml_html = None
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        EPUB_WRITER_CONFIG = {
+            "enabled": True,
+            "compress_level": 6
+        }
+
+
+EPUB_STYLE = '''
+        body { font-family: "Microsoft YaHei", "SimSun", serif; line-height: 1.8; margin: 20px; }
+        h1 { text-align: center; color: #333; border-bottom: 2px solid #ccc; padding-bottom: 10px; }
+        h2 { color: #555; margin-top: 30px; }
+        .book-info { background-color: #f9f9f9; padding: 15px; border-left: 4px solid #4CAF50; margin: 20px 0; }
+        .chapter { margin-top: 30px; }
+        .chapter-title { font-size: 1.2em; font-weight: bold; color: #2c3e50; border-bottom: 1px solid #eee; padding-bottom: 5px; }
+        .info-row { margin: 8px 0; }
+        .info-label { font-weight: bold; color: #2c3e50; }
+        '''
+
+_XML_NAME_RE = re.compile(r'^[A-Za-z_][\w.\-]*(?::[A-Za-z_][\w.\-]*)?$')
+
+_ROOT = 'EPUB/'
+_STYLE_FILE = 'style/nav.css'
+
+_MEDIA_TYPES = {
+    'jpg': 'image/jpeg',
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'webp': 'image/webp',
+    'gif': 'image/gif',
+}
+
+_CONTAINER_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<container version="1.0" xmlns="urn:oasis:names:tc:opendocument:xmlns:container">
+  <rootfiles>
+    <rootfile full-path="EPUB/content.opf" media-type="application/oebps-package+xml"/>
+  </rootfiles>
+</container>
+'''
+
+_PAGE_XHTML = '''<?xml version="1.0" encoding="utf-8"?>
+<!DOCTYPE html>
+<html xmlns="http://www.w3.org/1999/xhtml" xmlns:epub="http://www.idpf.org/2007/ops" lang="{lang}" xml:lang="{lang}">
+<head>
+<title>{title}</title>
+<link rel="stylesheet" type="text/css" href="{style}"/>
+</head>
+<body>
+{body}
+</body>
+</html>
+'''
+
+
+def chapter_title(result: Dict[str, Any]) -> str:
+    """章节显示标题"""
+    return f'{result["base_title"]} {result["api_title"]}' if result["api_title"] else result["base_title"]
+
+
+def chapter_body(title: str, content: str) -> str:
+    """章节正文XHTML，每个非空行为一个段落"""
+    paragraphs = ''.join(f'<p>{escape(para.strip())}</p>\n' for para in content.split('\n') if para.strip())
+    return f'<div class="chapter">\n<h2 class="chapter-title">{escape(title)}</h2>\n{paragraphs}</div>'
+
+
+def body_xhtml(document: str) -> str:
+    """把HTML文档或片段的body内容转换为格式良好的XHTML片段"""
+    if lxml_html is None:
+        return document
+    root = lxml_html.document_fromstring(document)
+    body = root.find('body')
+    if body is None:
+        return ''
+    # HTML解析器接受的属性名不一定是合法的XML名称（例如未转义的 < 后面的文本）
+    for element in body.iter():
+        for name in list(element.attrib):
+            if not _XML_NAME_RE.match(name):
+                del element.attrib[name]
+    parts = [escape(body.text or '', quote=False)]
+    for child in body:
+        parts.append(etree.tostring(child, encoding='unicode', method='xml'))
+    return ''.join(parts)
+
+
+class StreamingEpubWriter:
+    """边下载边写入的EPUB文件"""
+
+    def __init__(self, output_file: str, results: Mapping[int, Dict[str, Any]],
+                 title: str, author: str, description: str = '',
+                 subjects: Iterable[str] = (), language: str = 'zh-CN',
+                 identifier: Optional[str] = None, style: str = EPUB_STYLE):
+        """
+        Args:
+            output_file: 输出文件，写入过程中使用 .part 临时文件，关闭时替换
+            results: 章节序号 -> 下载结果，add() 时从这里读取正文
+            title: 书名
+            author: 作者
+            description: 简介
+            subjects: 分类、标签等主题
+            language: 语言
+            identifier: 书籍标识，默认随机生成
+            style: 所有页面共用的CSS
+        """
+        self.output_file = output_file
+        self.temp_file = output_file + '.part'
+        self.results = results
+        self.title = title
+        self.author = author
+        self.description = description
+        self.subjects = [subject for subject in subjects if subject]
+        self.language = language
+        self.identifier = identifier or f'urn:uuid:{uuid.uuid4()}'
+        self.compress_level = Config.EPUB_WRITER_CONFIG["compress_level"]
+        # 书籍信息等章节前的页面：(文件名, 标题)
+        self._pages: List[Tuple[str, str]] = []
+        # 章节序号 -> (文件名, 标题)，正文写入后不再保留
+        self._chapters: Dict[int, Tuple[str, str]] = {}
+        self._cover: Optional[Tuple[str, str]] = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+        self._zip = zipfile.ZipFile(self.temp_file, 'w')
+        # mimetype必须是第一个文件且不压缩
+        self._zip.writestr('mimetype', 'application/epub+zip', compress_type=zipfile.ZIP_STORED)
+        self._write('META-INF/container.xml', _CONTAINER_XML)
+        self._write(_ROOT + _STYLE_FILE, style)
+
+    def add_page(self, file_name: str, title: str, document: str):
+        """添加章节前的页面（例如书籍信息页），document 可以是完整HTML文档或片段"""
+        with self._lock:
+            self._write(_ROOT + file_name, self._page(title, body_xhtml(document)))
+            self._pages.append((file_name, title))
+
+    def set_cover(self, file_name: str, data: bytes):
+        """设置封面图片"""
+        extension = file_name.rsplit('.', 1)[-1].lower()
+        media_type = _MEDIA_TYPES.get(extension, 'image/jpeg')
+        with self._lock:
+            self._zip.writestr(_ROOT + file_name, data, compress_type=zipfile.ZIP_STORED)
+            self._cover = (file_name, media_type)
+
+    def add(self, index: int):
+        """通知章节已到达，立即写入其XHTML"""
+        try:
+            result = self.results[index]
+        except KeyError:
+            return
+        title = chapter_title(result)
+        file_name = f'chap_{index}.xhtml'
+        page = self._page(title, chapter_body(title, result['content']))
+        with self._lock:
+            if self._closed or index in self._chapters:
+                return
+            self._write(_ROOT + file_name, page)
+            self._chapters[index] = (file_name, title)
+
+    def checkpoint(self):
+        """把已写入的章节同步到磁盘（EPUB在关闭时才完整）"""
+        with self._lock:
+            if self._closed:
+                return
+            self._zip.fp.flush()
+            os.fsync(self._zip.fp.fileno())
+
+    def close(self):
+        """写入导航、NCX和OPF，完成EPUB文件"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            try:
+                chapters = [self._chapters[index] for index in sorted(self._chapters)]
+                self._write(_ROOT + 'nav.xhtml', self._nav(chapters))
+                self._write(_ROOT + 'toc.ncx', self._ncx(chapters))
+                self._write(_ROOT + 'content.opf', self._opf(chapters))
+            finally:
+                self._zip.close()
+            os.replace(self.temp_file, self.output_file)
+
+    def abort(self):
+        """放弃写入并删除临时文件"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._zip.close()
+        if os.path.exists(self.temp_file):
+            os.remove(self.temp_file)
+
+    def _write(self, name: str, text: str):
+        self._zip.writestr(name, text.encode('utf-8'), compress_type=zipfile.ZIP_DEFLATED,
+                           compresslevel=self.compress_level)
+
+    def _page(self, title: str, body: str) -> str:
+        return _PAGE_XHTML.format(lang=self.language, title=escape(title), style=_STYLE_FILE, body=body)
+
+    def _toc_entries(self, chapters: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        return self._pages + chapters
+
+    def _nav(self, chapters: List[Tuple[str, str]]) -> str:
+        items = ''.join(
+            f'<li><a href="{escape(file_name)}">{escape(title)}</a></li>\n'
+            for file_name, title in self._toc_entries(chapters)
+        )
+        body = f'<nav epub:type="toc" id="id" role="doc-toc">\n<h2>{escape(self.title)}</h2>\n<ol>\n{items}</ol>\n</nav>'
+        return self._page(self.title, body)
+
+    def _ncx(self, chapters: List[Tuple[str, str]]) -> str:
+        points = ''.join(
+            f'<navPoint id="navpoint-{order}" playOrder="{order}"><navLabel><text>{escape(title)}</text></navLabel>'
+            f'<content src="{escape(file_name)}"/></navPoint>\n'
+            for order, (file_name, title) in enumerate(self._toc_entries(chapters), 1)
+        )
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<ncx xmlns="http://www.daisy.org/z3986/2005/ncx/" version="2005-1">\n'
+            f'<head><meta name="dtb:uid" content="{escape(self.identifier)}"/>'
+            '<meta name="dtb:depth" content="1"/><meta name="dtb:totalPageCount" content="0"/>'
+            '<meta name="dtb:maxPageNumber" content="0"/></head>\n'
+            f'<docTitle><text>{escape(self.title)}</text></docTitle>\n'
+            f'<navMap>\n{points}</navMap>\n</ncx>\n'
+        )
+
+    def _opf(self, chapters: List[Tuple[str, str]]) -> str:
+        metadata = [
+            f'<dc:identifier id="id">{escape(self.identifier)}</dc:identifier>',
+            f'<dc:title>{escape(self.title)}</dc:title>',
+            f'<dc:language>{escape(self.language)}</dc:language>',
+            f'<dc:creator id="creator">{escape(self.author)}</dc:creator>',
+            f'<meta property="dcterms:modified">{time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())}</meta>',
+        ]
+        if self.description:
+            metadata.append(f'<dc:description>{escape(self.description)}</dc:description>')
+        metadata.extend(f'<dc:subject>{escape(subject)}</dc:subject>' for subject in self.subjects)
+
+        manifest = [
+            '<item href="nav.xhtml" id="nav" media-type="application/xhtml+xml" properties="nav"/>',
+            '<item href="toc.ncx" id="ncx" media-type="application/x-dtbncx+xml"/>',
+            f'<item href="{_STYLE_FILE}" id="style_nav" media-type="text/css"/>',
+        ]
+        if self._cover:
+            file_name, media_type = self._cover
+            metadata.append('<meta name="cover" content="cover-img"/>')
+            manifest.append(f'<item href="{escape(file_name)}" id="cover-img" media-type="{media_type}" '
+                            'properties="cover-image"/>')
+        spine = ['<itemref idref="nav"/>']
+        for number, (file_name, _) in enumerate(self._toc_entries(chapters)):
+            manifest.append(f'<item href="{escape(file_name)}" id="page_{number}" media-type="application/xhtml+xml"/>')
+            spine.append(f'<itemref idref="page_{number}"/>')
+
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<package xmlns="http://www.idpf.org/2007/opf" unique-identifier="id" version="3.0">\n'
+            '<metadata xmlns:dc="http://purl.org/dc/elements/1.1/" xmlns:opf="http://www.idpf.org/2007/opf">\n'
+            + '\n'.join(metadata) +
+            '\n</metadata>\n<manifest>\n' + '\n'.join(manifest) +
+            '\n</manifest>\n<spine toc="ncx">\n' + '\n'.join(spine) +
+            '\n</spine>\n</package>\n'
+        )
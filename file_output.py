@@ -7,6 +7,7 @@
 import os
 import time
 from ebooklib import epub
+from epub_writer import StreamingEpubWriter
 
 
 class FileOutputManager:
@@ -49,8 +50,21 @@ class FileOutputManager:
     def save_as_epub(self, filepath, book_data, chapters, chapter_results):
         """保存为EPUB文件"""
         try:
-            book = self.create_epub_book(book_data, chapters, chapter_results)
-            epub.write_epub(filepath, book, {})
+            # 逐章写入EPUB容器，不在内存中构建整本书
+            writer = StreamingEpubWriter(
+                filepath, chapter_results,
+                book_data.get('name', '未知书名'),
+                book_data.get('author', '未知作者'),
+                book_data.get('description', '无简介'),
+                identifier=f'book_{book_data.get("name", "unknown")}_{int(time.time())}'
+            )
+            try:
+                for idx in range(len(chapters)):
+                    writer.add(idx)
+                writer.close()
+            except Exception:
+                writer.abort()
+                raise
             self.log(f"EPUB文件保存成功: {filepath}")
             return True
         except Exception as e:
@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog, font, scrolledtext
 import threading
+import multiprocessing
 import os
 import time
 import json
@@ -8,6 +9,7 @@ import requests
 from PIL import Image, ImageTk
 from io import BytesIO
 from tomato_novel_api import TomatoNovelAPI
+from text_filter import filter_text
 from ebooklib import epub
 from updater import AutoUpdater, get_current_version
 
@@ -1698,35 +1700,11 @@ class ModernNovelDownloaderGUI:
         if not text:
             return text
         
-        # 常见的水印模式
-        watermarks = [
-            '兔兔',
-            '【兔兔】',
-            '（兔兔）',
-            'tutuxka',
-            'TUTUXKA',
-            '兔小说',
-            '兔读',
-            '兔书',
-            # 可以根据需要添加更多水印模式
-        ]
+        # 水印规则见 text_filter（内置规则 + filter_rules.txt），一次扫描全部移除
+        text = filter_text(text)
         
-        # 过滤末尾的水印
-        for watermark in watermarks:
-            if text.strip().endswith(watermark):
-                text = text.strip()[:-len(watermark)].strip()
-        
-        # 过滤行末的水印
-        lines = text.split('\n')
-        filtered_lines = []
-        for line in lines:
-            for watermark in watermarks:
-                if line.strip().endswith(watermark):
-                    line = line.strip()[:-len(watermark)].strip()
-            if line.strip():  # 只保留非空行
-                filtered_lines.append(line)
-        
-        return '\n'.join(filtered_lines)
+        # 只保留非空行
+        return '\n'.join(line for line in text.split('\n') if line.strip())
     
     def _save_as_txt(self, filepath, book_data, chapters):
         """保存为TXT格式，包含详细信息"""
@@ -2011,6 +1989,8 @@ class ModernNovelDownloaderGUI:
 
 # 主程序入口
 if __name__ == "__main__":
+    # 打包后的程序启动内容处理子进程时需要
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = ModernNovelDownloaderGUI(root)
     root.mainloop()
\ No newline at end of file
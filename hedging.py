@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+对冲请求模块
+主端点超过其p95延迟仍未返回时，向下一个端点发送重复请求，并限制额外请求的总量
+"""
+
+import threading
+from typing import Optional
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        HEDGE_CONFIG = {
+            "enabled": False,
+            "budget_ratio": 0.05,
+            "percentile": 0.95,
+            "min_samples": 20
+        }
+
+
+class HedgePolicy:
+    """对冲策略：决定何时发送对冲请求，并维护全局对冲预算"""
+
+    def __init__(self, endpoint_stats, budget_ratio: Optional[float] = None,
+                 percentile: Optional[float] = None, min_samples: Optional[int] = None):
+        """
+        Args:
+            endpoint_stats: 端点统计（endpoint_stats.EndpointStats），提供延迟分位数
+            budget_ratio: 对冲请求数占总请求数的上限
+            percentile: 触发对冲的延迟分位数
+            min_samples: 计算分位数所需的最少样本数
+        """
+        config = Config.HEDGE_CONFIG
+        self.endpoint_stats = endpoint_stats
+        self.budget_ratio = budget_ratio if budget_ratio is not None else config["budget_ratio"]
+        self.percentile = percentile or config["percentile"]
+        self.min_samples = min_samples or config["min_samples"]
+        self._requests = 0
+        self._hedges = 0
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        """记录一次普通请求，用于计算预算"""
+        with self._lock:
+            self._requests += 1
+
+    def hedge_delay(self, api_name: str) -> Optional[float]:
+        """发送对冲请求前等待的秒数，样本不足时返回None（不对冲）"""
+        return self.endpoint_stats.latency_percentile(api_name, self.percentile, self.min_samples)
+
+    def try_acquire(self) -> bool:
+        """预算内则占用一次对冲额度"""
+        with self._lock:
+            if self._hedges + 1 > self._requests * self.budget_ratio:
+                return False
+            self._hedges += 1
+            return True
+
+    @property
+    def hedge_count(self) -> int:
+        """已发送的对冲请求数"""
+        return self._hedges
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+流式JSON解析模块
+逐个解析大型JSON对象中的键值对，内存占用与单个值而不是整个响应体相当
+"""
+
+import codecs
+import json
+from typing import Any, Iterable, Iterator, Tuple, Union
+
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = frozenset('0123456789+-.eE')
+
+
+class _Reader:
+    """从分块数据中按需读取文本的缓冲区"""
+
+    def __init__(self, chunks: Iterable[Union[bytes, str]]):
+        self._chunks = iter(chunks)
+        self._decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """读取下一块数据，已读完返回False"""
+        if self.eof:
+            return False
+        for chunk in self._chunks:
+            if isinstance(chunk, bytes):
+                chunk = self._decoder.decode(chunk)
+            if chunk:
+                # 丢弃已解析的部分，缓冲区只保留当前值
+                self.buffer = self.buffer[self.pos:] + chunk
+                self.pos = 0
+                return True
+        self.buffer = self.buffer[self.pos:] + self._decoder.decode(b'', final=True)
+        self.pos = 0
+        self.eof = True
+        return False
+
+    def peek(self) -> str:
+        """跳过空白并返回下一个字符，数据结束返回空字符串"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char: str):
+        if self.peek() != char:
+            raise ValueError(f"JSON格式错误：期望 {char!r}，位置 {self.pos}")
+        self.pos += 1
+
+    def value(self, decoder: json.JSONDecoder) -> Any:
+        """解析一个完整的JSON值，数据不足时继续读取"""
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buffer, self.pos)
+                if self.eof or not self._number_truncated(value, end):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            if not self.fill():
+                continue
+
+    def _number_truncated(self, value: Any, end: int) -> bool:
+        """
+        数字是否可能在块边界被截断
+
+        "1." 或 "-3e" 会被解析为前面的整数，数字之后直到缓冲区末尾都是数字字符时需要继续读取；
+        字符串、对象、数组和字面量自带结束符，解析成功即完整。
+        """
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return False
+        return all(char in _NUMBER_CHARS for char in self.buffer[end:])
+
+
+def iter_object_items(chunks: Iterable[Union[bytes, str]], key: str = "data") -> Iterator[Tuple[str, Any]]:
+    """
+    流式解析JSON对象，逐个返回 object[key] 中的键值对
+
+    顶层对象没有该键时，返回顶层对象自身的键值对（这种情况下会先缓存顶层内容）。
+
+    Args:
+        chunks: 响应体数据块（例如 response.iter_content()）
+        key: 需要逐项解析的子对象键名
+
+    Yields:
+        (item_key, value)
+    """
+    reader = _Reader(chunks)
+    decoder = json.JSONDecoder()
+    top_level = []
+    found = False
+
+    reader.expect('{')
+    while reader.peek() != '}':
+        if top_level or found:
+            reader.expect(',')
+        name = reader.value(decoder)
+        reader.expect(':')
+
+        if name == key and reader.peek() == '{':
+            found = True
+            reader.expect('{')
+            first = True
+            while reader.peek() != '}':
+                if not first:
+                    reader.expect(',')
+                first = False
+                item_key = reader.value(decoder)
+                reader.expect(':')
+                yield item_key, reader.value(decoder)
+            reader.expect('}')
+        else:
+            top_level.append((name, reader.value(decoder)))
+
+        if reader.peek() == '':
+            raise ValueError("JSON数据不完整")
+
+    if not found:
+        yield from top_level
@@ -8,9 +8,46 @@ import requests
 import random
 import time
 import json
-from typing import Dict, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, List, Optional, Any, Union
+from requests.adapters import HTTPAdapter
 from fake_useragent import UserAgent
 from config import Config
+from concurrency_controller import worker_count
+
+
+def create_pooled_session(pool_size: Optional[int] = None) -> requests.Session:
+    """
+    创建带连接池的长连接会话
+    
+    同一个会话可在多个下载线程间共享，按主机复用TCP/TLS连接，
+    避免每次请求都重新握手。
+    
+    Args:
+        pool_size: 每个主机的最大连接数，默认读取 NETWORK_CONFIG["connection_pool_size"]
+        
+    Returns:
+        配置好连接池的Session对象
+    """
+    network_config = Config.NETWORK_CONFIG
+    if pool_size is None:
+        pool_size = network_config.get("connection_pool_size", 10)
+    # 连接数不少于工作线程数，否则多出的线程会反复新建连接
+    pool_size = max(pool_size, Config.MAX_WORKERS)
+    if Config.CONCURRENCY_CONFIG["enabled"]:
+        # 自适应并发时线程池按并发上限创建
+        pool_size = max(pool_size, worker_count())
+    
+    adapter = HTTPAdapter(
+        pool_connections=network_config.get("pool_connections", 10),
+        pool_maxsize=pool_size,
+        max_retries=0
+    )
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['Connection'] = 'keep-alive'
+    return session
 
 
 class NetworkManager:
@@ -19,7 +56,9 @@ class NetworkManager:
     def __init__(self):
         self.config = Config()
         self.ua = UserAgent()
-        self.session = requests.Session()
+        self.session = create_pooled_session()
+        # 最近一次健康检查的端点延迟（秒）
+        self.probe_latencies: Dict[str, float] = {}
         
     def get_headers(self) -> Dict[str, str]:
         """生成随机请求头"""
@@ -150,15 +189,76 @@ class NetworkManager:
         except:
             return False
     
-    def get_working_endpoints(self) -> List[str]:
-        """获取可用的API端点"""
+    def probe_endpoint(self, endpoint: Union[str, Dict[str, Any]], timeout: Optional[float] = None) -> Optional[float]:
+        """
+        探测端点是否可用（单次请求，不重试）
+        
+        Args:
+            endpoint: 端点URL，或包含url字段的端点配置
+            timeout: 超时时间
+            
+        Returns:
+            响应延迟（秒），不可用返回None
+        """
+        url = endpoint["url"] if isinstance(endpoint, dict) else endpoint
+        if timeout is None:
+            timeout = self.config.HEALTH_CHECK_CONFIG["timeout"]
+        
+        start_time = time.time()
+        try:
+            response = self.session.get(url, headers=self.get_headers(), timeout=timeout)
+            if response.status_code == 200:
+                return time.time() - start_time
+        except requests.exceptions.RequestException:
+            pass
+        return None
+    
+    def get_working_endpoints(self, concurrent: Optional[bool] = None, deadline: Optional[float] = None) -> List[str]:
+        """
+        获取可用的API端点
+        
+        Args:
+            concurrent: 是否并发探测（默认读取 HEALTH_CHECK_CONFIG）
+            deadline: 并发探测的整体截止时间（秒），超时未返回的端点视为不可用
+            
+        Returns:
+            可用端点列表，并发探测时按延迟从快到慢排序；全部不可用时返回原列表
+        """
         endpoints = self.get_api_endpoints()
-        working_endpoints = []
+        health_config = self.config.HEALTH_CHECK_CONFIG
+        if concurrent is None:
+            concurrent = health_config["concurrent"]
         
-        for endpoint in endpoints:
-            if self.test_endpoint(endpoint):
-                working_endpoints.append(endpoint)
-                
+        if not concurrent:
+            working_endpoints = []
+            for endpoint in endpoints:
+                if self.test_endpoint(endpoint):
+                    working_endpoints.append(endpoint)
+            return working_endpoints if working_endpoints else endpoints
+        
+        if not endpoints:
+            return endpoints
+        if deadline is None:
+            deadline = health_config["deadline"]
+        
+        executor = ThreadPoolExecutor(max_workers=len(endpoints))
+        futures = {executor.submit(self.probe_endpoint, endpoint): endpoint for endpoint in endpoints}
+        done, _ = wait(futures, timeout=deadline)
+        # 不等待超过截止时间的探测
+        executor.shutdown(wait=False, cancel_futures=True)
+        
+        results = []
+        self.probe_latencies = {}
+        for future in done:
+            latency = future.result()
+            if latency is not None:
+                endpoint = futures[future]
+                url = endpoint["url"] if isinstance(endpoint, dict) else endpoint
+                self.probe_latencies[url] = latency
+                results.append((latency, endpoint))
+        
+        results.sort(key=lambda item: item[0])
+        working_endpoints = [endpoint for _, endpoint in results]
         return working_endpoints if working_endpoints else endpoints
     
     def close(self):
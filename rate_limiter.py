@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+限速模块
+基于令牌桶的线程安全限速器，按端点和主机分别限速
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        MAX_WORKERS = 4
+        REQUEST_RATE_LIMIT = 0.4
+        RATE_LIMIT_CONFIG = {
+            "enabled": True,
+            "endpoint_rate": None,
+            "endpoint_burst": 8,
+            "host_rate": None,
+            "host_burst": 16
+        }
+
+
+def default_rate() -> float:
+    """默认每秒请求数：每个工作线程每 REQUEST_RATE_LIMIT 秒一个请求"""
+    return Config.MAX_WORKERS / Config.REQUEST_RATE_LIMIT
+
+
+class TokenBucket:
+    """令牌桶"""
+
+    def __init__(self, rate: float, burst: float):
+        """
+        Args:
+            rate: 每秒补充的令牌数
+            burst: 桶容量，即允许的突发请求数
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1) -> float:
+        """
+        预定令牌
+
+        Returns:
+            需要等待的秒数，0表示可立即发送
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # 允许令牌为负，后来的请求排在已预定请求之后
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class RateLimiter:
+    """按端点名称和主机管理令牌桶"""
+
+    def __init__(self, endpoint_rate: Optional[float] = None, endpoint_burst: Optional[float] = None,
+                 host_rate: Optional[float] = None, host_burst: Optional[float] = None):
+        config = Config.RATE_LIMIT_CONFIG
+        self.endpoint_rate = endpoint_rate or config["endpoint_rate"] or default_rate()
+        self.endpoint_burst = endpoint_burst or config["endpoint_burst"]
+        self.host_rate = host_rate or config["host_rate"] or default_rate()
+        self.host_burst = host_burst or config["host_burst"]
+        self._endpoint_buckets: Dict[str, TokenBucket] = {}
+        self._host_buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _get_bucket(self, buckets: Dict[str, TokenBucket], key: str, rate: float, burst: float) -> TokenBucket:
+        with self._lock:
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(rate, burst)
+                buckets[key] = bucket
+            return bucket
+
+    def reserve(self, endpoint_name: str, url: str) -> float:
+        """同时预定端点和主机的令牌，返回需要等待的秒数"""
+        host = urlparse(url).netloc
+        endpoint_bucket = self._get_bucket(self._endpoint_buckets, endpoint_name,
+                                           self.endpoint_rate, self.endpoint_burst)
+        host_bucket = self._get_bucket(self._host_buckets, host, self.host_rate, self.host_burst)
+        return max(endpoint_bucket.reserve(), host_bucket.reserve())
+
+    def acquire(self, endpoint_name: str, url: str):
+        """阻塞直到请求在限速额度内"""
+        wait = self.reserve(endpoint_name, url)
+        if wait > 0:
+            time.sleep(wait)
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+下载状态日志模块
+chapter.json 作为快照，已完成的章节ID逐条追加到日志文件，按组同步到磁盘，
+日志过长时合并回快照；加载时读取快照后重放日志
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Iterable, Optional, Set
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        STATE_JOURNAL_CONFIG = {
+            "enabled": True,
+            "fsync_every": 50,
+            "compact_every": 2000
+        }
+
+
+class StatusJournal:
+    """单个状态文件的追加日志"""
+
+    def __init__(self, status_file: str, fsync_every: Optional[int] = None, compact_every: Optional[int] = None):
+        """
+        Args:
+            status_file: 状态快照文件（chapter.json），日志文件为其后加 .journal
+            fsync_every: 每追加多少条记录同步一次磁盘
+            compact_every: 日志超过多少条记录时合并回快照
+        """
+        config = Config.STATE_JOURNAL_CONFIG
+        self.enabled = config["enabled"]
+        self.status_file = status_file
+        self.journal_file = status_file + '.journal'
+        self.fsync_every = max(1, fsync_every or config["fsync_every"])
+        self.compact_every = max(1, compact_every or config["compact_every"])
+        self._recorded: Set = set()
+        self._journal = None
+        self._journal_entries = 0
+        self._unsynced = 0
+        self._lock = threading.RLock()
+
+    def load(self) -> Set:
+        """读取快照并重放日志，返回已下载的章节ID"""
+        with self._lock:
+            self._close_journal()
+            recorded = set()
+            if os.path.exists(self.status_file):
+                try:
+                    with open(self.status_file, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    if isinstance(data, list):
+                        recorded.update(data)
+                except Exception:
+                    pass
+
+            entries = 0
+            if os.path.exists(self.journal_file):
+                try:
+                    with open(self.journal_file, 'r', encoding='utf-8') as f:
+                        for line in f:
+                            # 中断时最后一行可能不完整，之后的内容不再可信
+                            if not line.endswith('\n'):
+                                break
+                            try:
+                                recorded.add(json.loads(line))
+                            except ValueError:
+                                break
+                            entries += 1
+                except Exception:
+                    pass
+
+            self._recorded = recorded
+            self._journal_entries = entries
+            if entries or os.path.exists(self.journal_file):
+                # 每次加载合并一次，日志只包含本次运行的记录
+                self._compact()
+            return set(recorded)
+
+    def record(self, chapter_id):
+        """记录一个已完成的章节"""
+        self.record_many((chapter_id,))
+
+    def record_many(self, chapter_ids: Iterable):
+        """追加记录多个已完成的章节，已记录的会被跳过"""
+        with self._lock:
+            new_ids = [chapter_id for chapter_id in dict.fromkeys(chapter_ids) if chapter_id not in self._recorded]
+            if not new_ids:
+                return
+            self._recorded.update(new_ids)
+            if not self.enabled:
+                self._compact()
+                return
+            try:
+                journal = self._open_journal()
+                journal.write(''.join(json.dumps(chapter_id, ensure_ascii=False) + '\n' for chapter_id in new_ids))
+                journal.flush()
+                self._journal_entries += len(new_ids)
+                self._unsynced += len(new_ids)
+                if self._journal_entries >= self.compact_every:
+                    self._compact()
+                elif self._unsynced >= self.fsync_every:
+                    self._sync()
+            except Exception as e:
+                print(f"保存状态失败: {str(e)}")
+
+    def save(self, downloaded: Iterable):
+        """
+        检查点：只追加上次保存后新增的章节并同步到磁盘
+
+        章节被移出已下载集合（例如目录更新后需要重新下载）时，日志无法表达删除，改为重写快照。
+        """
+        downloaded = set(downloaded)
+        with self._lock:
+            if not self._recorded <= downloaded:
+                self._recorded = downloaded
+                self._compact()
+                return
+            self.record_many(downloaded - self._recorded)
+            try:
+                self._sync()
+            except Exception as e:
+                print(f"保存状态失败: {str(e)}")
+
+    def clear(self):
+        """删除快照和日志"""
+        with self._lock:
+            self._close_journal()
+            self._recorded = set()
+            self._journal_entries = 0
+            for path in (self.status_file, self.journal_file):
+                if os.path.exists(path):
+                    try:
+                        os.remove(path)
+                    except Exception as e:
+                        print(f"清除状态失败: {str(e)}")
+
+    def close(self):
+        """同步并关闭日志文件"""
+        with self._lock:
+            self._close_journal()
+
+    def _open_journal(self):
+        if self._journal is None:
+            directory = os.path.dirname(self.status_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._journal = open(self.journal_file, 'a', encoding='utf-8')
+        return self._journal
+
+    def _sync(self):
+        if self._journal is not None and self._unsynced:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+        self._unsynced = 0
+
+    def _close_journal(self):
+        if self._journal is not None:
+            try:
+                self._sync()
+            except Exception:
+                pass
+            self._journal.close()
+            self._journal = None
+        self._unsynced = 0
+
+    def _compact(self):
+        """把当前状态写入快照并清空日志"""
+        try:
+            temp_file = self.status_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(list(self._recorded), f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_file, self.status_file)
+            # 快照落盘后日志中的记录都已包含在快照里
+            self._close_journal()
+            if os.path.exists(self.journal_file):
+                os.remove(self.journal_file)
+            self._journal_entries = 0
+        except Exception as e:
+            print(f"保存状态失败: {str(e)}")
+
+
+_journals: Dict[str, StatusJournal] = {}
+_journals_lock = threading.Lock()
+
+
+def open_journal(status_file: str) -> StatusJournal:
+    """获取状态文件对应的日志（同一文件在进程内共用一个实例）"""
+    key = os.path.abspath(status_file)
+    with _journals_lock:
+        journal = _journals.get(key)
+        if journal is None:
+            journal = _journals[key] = StatusJournal(status_file)
+        return journal
@@ -5,7 +5,7 @@
 """
 
 import os
-import json
+from state_journal import open_journal
 try:
     from config import CONFIG
 except ImportError:
@@ -19,36 +19,23 @@ class StateManager:
         pass
     
     def load_status(self, save_path):
-        """加载下载状态"""
-        status_file = os.path.join(save_path, CONFIG["status_file"])
-        if os.path.exists(status_file):
-            try:
-                with open(status_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        return set(data)
-                    return set()
-            except Exception:
-                return set()
-        return set()
+        """加载下载状态（快照加日志）"""
+        return self._journal(save_path).load()
     
     def save_status(self, save_path, downloaded):
-        """保存下载状态"""
-        status_file = os.path.join(save_path, CONFIG["status_file"])
-        try:
-            with open(status_file, 'w', encoding='utf-8') as f:
-                json.dump(list(downloaded), f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            print(f"保存状态失败: {str(e)}")
+        """保存下载状态，只追加上次保存后新完成的章节"""
+        self._journal(save_path).save(downloaded)
+    
+    def record_chapter(self, save_path, chapter_id):
+        """记录单个已完成的章节"""
+        self._journal(save_path).record(chapter_id)
     
     def clear_status(self, save_path):
         """清除下载状态"""
-        status_file = os.path.join(save_path, CONFIG["status_file"])
-        if os.path.exists(status_file):
-            try:
-                os.remove(status_file)
-            except Exception as e:
-                print(f"清除状态失败: {str(e)}")
+        self._journal(save_path).clear()
+    
+    def _journal(self, save_path):
+        return open_journal(os.path.join(save_path, CONFIG["status_file"]))
     
     def get_status_info(self, save_path):
         """获取状态信息"""
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""异步下载引擎测试（本地桩服务器）"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from async_download_engine import AsyncDownloadEngine
+
+pytestmark = pytest.mark.skipif(not AsyncDownloadEngine.is_available(), reason="未安装aiohttp")
+
+
+class _ChapterHandler(BaseHTTPRequestHandler):
+    requested = []
+
+    def do_GET(self):
+        self.requested.append(time.monotonic())
+        body = self.path.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _ChapterHandler.requested = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _ChapterHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_blocking_result_callbacks_do_not_stall_requests(server):
+    chapters = [{"id": str(idx)} for idx in range(6)]
+    engine = AsyncDownloadEngine(
+        lambda chapter_id: [("stub", {"method": "GET", "url": f"{server}/{chapter_id}"})],
+        lambda api_name, chapter_id, status, text: ("", text) if status == 200 else None,
+        max_concurrency=10
+    )
+    results = {}
+    threads = set()
+    progress = []
+    first_done = []
+
+    def on_result(chapter, title, content):
+        # 模拟写入内容库和文件
+        time.sleep(0.1)
+        threads.add(threading.current_thread())
+        results[chapter["id"]] = content
+        if not first_done:
+            first_done.append(time.monotonic())
+
+    engine.download(chapters, {}, on_result, lambda completed, total: progress.append(completed))
+    assert results == {str(idx): f"/{idx}" for idx in range(6)}
+    assert progress == list(range(1, 7))
+    # 回调在同一个结果线程中执行，不在事件循环线程中
+    assert len(threads) == 1 and threading.current_thread() not in threads
+    # 第一个回调完成前所有请求都已发出
+    assert max(_ChapterHandler.requested) < first_done[0]
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""自适应批量大小与批次拆分测试"""
+
+import pytest
+
+import batch_sizing
+from batch_pipeline import pipeline_batches
+from batch_sizing import ENDPOINT_FAILURE, BatchEndpointError, BatchScheduler, BatchSizer
+
+
+@pytest.fixture
+def sizer(tmp_path):
+    return BatchSizer(max_size=100, stats_file=str(tmp_path / "batch_sizes.json"))
+
+
+def chapters(count):
+    return [{"id": str(i), "index": i} for i in range(count)]
+
+
+def run(scheduler, fetch):
+    """按调度器跑完所有批次，返回 (请求次数, 转为单章下载的章节ID)"""
+    calls = []
+
+    def counted(item_ids):
+        calls.append(item_ids)
+        return fetch(item_ids)
+
+    failed = []
+    for batch, results in pipeline_batches(scheduler.next_batch, scheduler.timed(counted), depth=2):
+        failed.extend(scheduler.resolve(batch, results))
+    return len(calls), sorted(chap["id"] for chap in failed)
+
+
+def test_endpoint_failure_is_not_bisected(sizer):
+    scheduler = BatchScheduler(chapters(290), sizer, "qyuing")
+
+    def dead_endpoint(item_ids):
+        raise BatchEndpointError("连接超时")
+
+    calls, failed = run(scheduler, dead_endpoint)
+    assert calls == 3
+    assert len(failed) == 290
+    assert scheduler.splits == 0
+    assert scheduler.resolved == 290
+
+
+def test_malformed_response_is_bisected_to_bad_chapter(sizer):
+    scheduler = BatchScheduler(chapters(64), sizer, "qyuing")
+
+    def poisoned(item_ids):
+        if "37" in item_ids:
+            return None
+        return {item_id: "正文" for item_id in item_ids}
+
+    calls, failed = run(scheduler, poisoned)
+    assert failed == ["37"]
+    # 64 -> 32 -> 16 -> 8 -> 4 -> 2 -> 1：每层一次拆分
+    assert scheduler.splits == 6
+    assert calls == 1 + 2 * 6
+    assert scheduler.resolved == 64
+
+
+def test_partial_response_requeues_only_missing(sizer):
+    scheduler = BatchScheduler(chapters(10), sizer, "qyuing")
+    requested = []
+
+    def partial(item_ids):
+        requested.append(list(item_ids))
+        if len(requested) == 1:
+            return {item_id: "正文" for item_id in item_ids if int(item_id) % 2}
+        return {item_id: "正文" for item_id in item_ids}
+
+    calls, failed = run(scheduler, partial)
+    assert failed == []
+    assert sorted(sum(requested[1:], [])) == ["0", "2", "4", "6", "8"]
+    assert scheduler.resolved == 10
+
+
+def test_split_budget_caps_requests(sizer, monkeypatch):
+    monkeypatch.setitem(batch_sizing.Config.ADAPTIVE_BATCH_CONFIG, "max_splits", 3)
+    scheduler = BatchScheduler(chapters(100), sizer, "qyuing")
+
+    calls, failed = run(scheduler, lambda item_ids: None)
+    assert scheduler.splits == 3
+    assert calls == 1 + 2 * 3
+    assert len(failed) == 100
+
+
+def test_bisect_disabled(sizer, monkeypatch):
+    monkeypatch.setitem(batch_sizing.Config.ADAPTIVE_BATCH_CONFIG, "bisect", False)
+    scheduler = BatchScheduler(chapters(50), sizer, "qyuing")
+    calls, failed = run(scheduler, lambda item_ids: None)
+    assert calls == 1
+    assert len(failed) == 50
+
+
+def test_timed_records_endpoint_failure(sizer):
+    scheduler = BatchScheduler(chapters(1), sizer, "qyuing")
+
+    def dead_endpoint(item_ids):
+        raise BatchEndpointError("状态码: 502")
+
+    assert scheduler.timed(dead_endpoint)(["0"]) is ENDPOINT_FAILURE
+    assert not ENDPOINT_FAILURE
+
+
+def test_sizer_shrinks_when_slow_and_grows_when_fast(sizer):
+    sizer.record("qyuing", 100, sizer.target_latency + 1, 1000, True)
+    assert sizer.size("qyuing") == 50
+    sizer.record("qyuing", 50, 0.1, 1000, True)
+    assert sizer.size("qyuing") == 62
+    # 不是满批次时不放大
+    sizer.record("qyuing", 10, 0.1, 1000, True)
+    assert sizer.size("qyuing") == 62
+
+
+def test_sizer_shrinks_on_large_payload(sizer):
+    sizer.record("qyuing", 100, 0.1, sizer.max_payload_chars + 1, True)
+    assert sizer.size("qyuing") == 50
+
+
+def test_sizer_persists_sizes(sizer):
+    sizer.record("qyuing", 100, sizer.target_latency + 1, 0, False)
+    sizer.save()
+    assert BatchSizer(max_size=100, stats_file=sizer.stats_file).size("qyuing") == 50
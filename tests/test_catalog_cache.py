@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""目录缓存对比测试"""
+
+from catalog_cache import CatalogCache, diff_catalog, format_diff, stale_chapter_ids
+
+
+def catalog(*titles):
+    """按位置生成章节序号的目录，与解析网页时一致"""
+    return [{"id": chapter_id, "title": f"第{idx + 1}章 {title}", "index": idx}
+            for idx, (chapter_id, title) in enumerate(titles)]
+
+
+def test_added_removed_and_retitled():
+    old = catalog(("1", "开端"), ("2", "相遇"), ("3", "离别"))
+    new = catalog(("1", "开端"), ("3", "再会"), ("4", "终章"))
+    diff = diff_catalog(old, new)
+    assert [ch["id"] for ch in diff["added"]] == ["4"]
+    assert [ch["id"] for ch in diff["removed"]] == ["2"]
+    assert [ch["id"] for ch in diff["retitled"]] == ["3"]
+    assert stale_chapter_ids(diff) == {"2", "3"}
+
+
+def test_inserted_chapter_does_not_retitle_later_chapters():
+    old = catalog(("1", "开端"), ("2", "相遇"), ("3", "离别"))
+    new = catalog(("1", "开端"), ("9", "插曲"), ("2", "相遇"), ("3", "离别"))
+    diff = diff_catalog(old, new)
+    assert [ch["id"] for ch in diff["added"]] == ["9"]
+    assert diff["retitled"] == []
+    assert diff["removed"] == []
+
+
+def test_placeholder_titles_match_across_renumbering():
+    old = [{"id": "1", "title": "第1章"}, {"id": "2", "title": "第2章"}]
+    new = [{"id": "0", "title": "第1章"}, {"id": "1", "title": "第2章"}, {"id": "2", "title": "第3章"}]
+    assert stale_chapter_ids(diff_catalog(old, new)) == set()
+
+
+def test_unchanged_catalog():
+    chapters = catalog(("1", "开端"), ("2", "相遇"))
+    diff = diff_catalog(chapters, chapters)
+    assert format_diff(diff) == "目录无变化"
+
+
+def test_compare_does_not_update_cache(tmp_path):
+    cache = CatalogCache(cache_dir=str(tmp_path))
+    old = catalog(("1", "开端"), ("2", "相遇"))
+    new = catalog(("1", "开端"), ("2", "重逢"))
+    assert cache.compare("book", old) is None
+
+    cache.save("book", old)
+    assert stale_chapter_ids(cache.compare("book", new)) == {"2"}
+    # 下载中断没有保存目录时，下次运行得到同样的差异
+    assert stale_chapter_ids(cache.compare("book", new)) == {"2"}
+
+    cache.save("book", new)
+    assert not any(cache.compare("book", new).values())
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""端点熔断器测试"""
+
+import pytest
+
+import circuit_breaker
+from circuit_breaker import CircuitBreaker, CircuitBreakerManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", fake)
+    return fake
+
+
+def test_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker("a", failure_threshold=3, recovery_timeout=10)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow_request()
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker("a", failure_threshold=3, recovery_timeout=10)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_allows_single_probe(clock):
+    breaker = CircuitBreaker("a", failure_threshold=1, recovery_timeout=10)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # 探测请求未完成前不再放行
+    assert not breaker.allow_request()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker("a", failure_threshold=1, recovery_timeout=10)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now += 5
+    assert not breaker.allow_request()
+
+
+def test_stale_probe_is_replaced(clock):
+    breaker = CircuitBreaker("a", failure_threshold=1, recovery_timeout=10)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow_request()
+    # 探测请求被取消，没有记录结果
+    clock.now += 10
+    assert breaker.allow_request()
+
+
+def test_manager_reports_transitions(clock):
+    transitions = []
+    manager = CircuitBreakerManager(on_state_change=lambda *args: transitions.append(args))
+    breaker = manager.get("a")
+    assert manager.get("a") is breaker
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert not manager.is_closed("a")
+    assert manager.is_closed("b")
+    clock.now += breaker.recovery_timeout
+    breaker.allow_request()
+    breaker.record_success()
+    assert transitions == [
+        ("a", CircuitBreaker.CLOSED, CircuitBreaker.OPEN),
+        ("a", CircuitBreaker.OPEN, CircuitBreaker.HALF_OPEN),
+        ("a", CircuitBreaker.HALF_OPEN, CircuitBreaker.CLOSED),
+    ]
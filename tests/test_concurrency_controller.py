@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""AIMD并发控制测试"""
+
+import requests
+
+from concurrency_controller import AIMDController, Config, concurrency_cap, worker_count
+
+
+def test_default_limit_starts_below_cap_and_grows_while_healthy(monkeypatch):
+    monkeypatch.setitem(Config.CONCURRENCY_CONFIG, "max_workers", None)
+    controller = AIMDController(decrease_cooldown=0)
+    assert controller.max_limit == concurrency_cap() > Config.MAX_WORKERS
+    assert controller.limit == Config.MAX_WORKERS
+
+    for _ in range(200):
+        controller.acquire()
+        controller.release(0.1, 200)
+    assert controller.limit == controller.max_limit
+
+
+def test_congestion_cuts_the_limit():
+    controller = AIMDController(initial_limit=8, min_limit=1, max_limit=16, decrease_factor=0.5,
+                                latency_threshold=5.0, decrease_cooldown=0)
+    controller.acquire()
+    controller.release(0.1, 429)
+    assert controller.limit == 4
+    controller.acquire()
+    controller.release(0.1, None, requests.exceptions.Timeout())
+    assert controller.limit == 2
+    controller.acquire()
+    controller.release(6.0, 200)
+    assert controller.limit == 1
+
+
+def test_worker_count_follows_cap(monkeypatch):
+    monkeypatch.setitem(Config.CONCURRENCY_CONFIG, "max_workers", 12)
+    monkeypatch.setitem(Config.CONCURRENCY_CONFIG, "enabled", True)
+    assert worker_count() == 12
+    monkeypatch.setitem(Config.CONCURRENCY_CONFIG, "enabled", False)
+    assert worker_count() == Config.MAX_WORKERS
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""广告文本清理测试"""
+
+import random
+import re
+
+from content_processor import UNWANTED_PATTERNS, remove_unwanted
+
+
+def sequential_remove(text):
+    """逐条 re.sub 的参考实现"""
+    for pattern, _ in UNWANTED_PATTERNS:
+        text = re.sub(pattern, '', text, flags=re.IGNORECASE | re.DOTALL)
+    return text
+
+
+def test_overlapping_rules_apply_in_order():
+    # 网址规则先执行，吃掉了后面的】，【】规则不再匹配
+    assert remove_unwanted('开头【http://x.com】结尾') == '开头【'
+
+
+def test_matches_sequential_passes_on_random_text():
+    pieces = ['正文', '。', ' ', '【', '】', '（', '）', '(', ')', '广告', 'http://a.b', 'WWW.', '.com',
+              '本章未完', '点击下一页继续阅读', '笔趣阁', '最快更新', '天才一秒记住', '一秒记住', '地址：',
+              '为您提供精彩小说阅读', '请收藏本站：', '手机版阅读网址：']
+    rng = random.Random(0)
+    for _ in range(2000):
+        text = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 12)))
+        assert remove_unwanted(text) == sequential_remove(text), text
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""流式EPUB写入测试"""
+
+import os
+import zipfile
+
+import ebooklib
+from ebooklib import epub
+
+from epub_writer import StreamingEpubWriter
+
+
+def results(count):
+    return {idx: {"base_title": f"第{idx + 1}章", "api_title": "标题" if idx % 2 else "",
+                  "content": f"第一段{idx}\n第二段 <{idx}> & 结尾"} for idx in range(count)}
+
+
+def spine_files(book):
+    return [book.get_item_with_id(idref).file_name for idref, _ in book.spine]
+
+
+def test_streamed_book_reads_back_in_order(tmp_path):
+    output = str(tmp_path / 'book.epub')
+    chapters = results(4)
+    del chapters[2]
+    writer = StreamingEpubWriter(output, chapters, '测试书', '作者', '简介', subjects=['玄幻', ''])
+    writer.add_page('info.xhtml', '书籍信息', '<html><body><h1>书籍信息</h1><p>简介 &amp; 标签</p></body></html>')
+    # 章节乱序到达，缺失和重复的章节被忽略
+    for index in (3, 0, 2, 1, 0):
+        writer.add(index)
+    writer.close()
+    assert not os.path.exists(output + '.part')
+
+    with zipfile.ZipFile(output) as archive:
+        first = archive.infolist()[0]
+        assert first.filename == 'mimetype'
+        assert first.compress_type == zipfile.ZIP_STORED
+        assert archive.read('mimetype') == b'application/epub+zip'
+        names = archive.namelist()
+        assert 'EPUB/nav.xhtml' in names
+        assert 'EPUB/toc.ncx' in names
+
+    book = epub.read_epub(output, {'ignore_ncx': False})
+    assert book.get_metadata('DC', 'title')[0][0] == '测试书'
+    assert book.get_metadata('DC', 'creator')[0][0] == '作者'
+    assert [subject for subject, _ in book.get_metadata('DC', 'subject')] == ['玄幻']
+    assert spine_files(book) == ['nav.xhtml', 'info.xhtml', 'chap_0.xhtml', 'chap_1.xhtml', 'chap_3.xhtml']
+    assert list(book.get_items_of_type(ebooklib.ITEM_NAVIGATION))
+    chapter = book.get_item_with_href('chap_1.xhtml').get_content().decode('utf-8')
+    assert '第2章 标题' in chapter
+    assert '<p>第二段 &lt;1&gt; &amp; 结尾</p>' in chapter
+
+
+def test_abort_removes_partial_file(tmp_path):
+    output = str(tmp_path / 'book.epub')
+    writer = StreamingEpubWriter(output, results(2), '测试书', '作者')
+    writer.add(0)
+    writer.abort()
+    assert not os.path.exists(output)
+    assert not os.path.exists(output + '.part')
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""流式JSON解析测试"""
+
+import json
+import random
+
+import pytest
+
+from json_stream import iter_object_items
+
+
+def chunked(data: bytes, size: int):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_items_from_data_object():
+    body = json.dumps({"code": 0, "data": {"1": {"content": "第一章"}, "2": {"content": "第二章"}}})
+    assert list(iter_object_items([body.encode()])) == [
+        ("1", {"content": "第一章"}),
+        ("2", {"content": "第二章"}),
+    ]
+
+
+def test_top_level_items_without_data_key():
+    body = json.dumps({"1": "a", "2": "b"}).encode()
+    assert list(iter_object_items(chunked(body, 3))) == [("1", "a"), ("2", "b")]
+
+
+@pytest.mark.parametrize("chunks, expected", [
+    ([b'{"a": 1.', b'5, "data": {"x": 2}}'], 1.5),
+    ([b'{"a": -3e', b'10, "data": {"x": 2}}'], -3e10),
+    ([b'{"a": 12', b'34, "data": {"x": 2}}'], 1234),
+    ([b'{"a": 1', b'.', b'2', b'5e', b'-', b'2', b', "data": {"x": 2}}'], 1.25e-2),
+])
+def test_number_split_at_chunk_boundary(chunks, expected):
+    # 顶层没有被逐项解析的键时才会返回顶层条目，这里检查data之前的数字被完整读取
+    body = b''.join(chunks)
+    assert json.loads(body)["a"] == expected
+    assert list(iter_object_items(chunks, key="missing")) == [("a", expected), ("data", {"x": 2})]
+    assert list(iter_object_items(chunks)) == [("x", 2)]
+
+
+def test_number_split_inside_data():
+    chunks = [b'{"data": {"1": 4', b'2.', b'5e1, "2": 7', b'}}']
+    assert list(iter_object_items(chunks)) == [("1", 425.0), ("2", 7)]
+
+
+def test_number_at_end_of_stream():
+    assert list(iter_object_items([b'{"a": 1', b'0}'], key="missing")) == [("a", 10)]
+
+
+def test_multibyte_characters_split_across_chunks():
+    body = json.dumps({"data": {"1": "番茄小说" * 50}}, ensure_ascii=False).encode('utf-8')
+    assert list(iter_object_items(chunked(body, 7))) == [("1", "番茄小说" * 50)]
+
+
+def test_every_chunk_size_matches_json_loads():
+    rng = random.Random(16)
+    data = {str(i): rng.choice([
+        rng.randint(-10 ** 6, 10 ** 6),
+        rng.uniform(-1e6, 1e6),
+        rng.random() * 1e-8,
+        {"content": "正文" * rng.randint(0, 5), "title": None, "vip": rng.random() < 0.5},
+        [1, 2.5, "x"],
+    ]) for i in range(40)}
+    body = json.dumps({"code": 0, "data": data}, ensure_ascii=False).encode('utf-8')
+    for size in range(1, 24):
+        assert dict(iter_object_items(chunked(body, size))) == data
+
+
+def test_truncated_body_raises():
+    body = json.dumps({"data": {"1": "a", "2": "b"}}).encode()
+    with pytest.raises(ValueError):
+        list(iter_object_items([body[:-5]]))
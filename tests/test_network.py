@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""端点并发探测测试（本地桩服务器）"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from network import NetworkManager
+
+# 路径 -> (延迟秒数, 状态码)
+_ROUTES = {
+    "/fast": (0, 200),
+    "/medium": (0.2, 200),
+    "/slow": (2.0, 200),
+    "/down": (0, 500),
+}
+
+
+class _ProbeHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        delay, status = _ROUTES[self.path]
+        time.sleep(delay)
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    # 超过截止时间的探测请求还在处理中，关闭时不等待
+    daemon_threads = True
+
+
+@pytest.fixture
+def server():
+    server = _Server(('127.0.0.1', 0), _ProbeHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_concurrent_probe_drops_slow_endpoints_at_deadline(server):
+    manager = NetworkManager()
+    endpoints = [{"name": name, "url": server + name} for name in ("/slow", "/medium", "/down", "/fast")]
+    manager.config.API_ENDPOINTS = endpoints
+
+    start = time.monotonic()
+    working = manager.get_working_endpoints(concurrent=True, deadline=1.0)
+    elapsed = time.monotonic() - start
+
+    # 不等待慢端点返回
+    assert elapsed < 1.8
+    assert [endpoint["name"] for endpoint in working] == ["/fast", "/medium"]
+    assert set(manager.probe_latencies) == {server + "/fast", server + "/medium"}
+    assert manager.probe_latencies[server + "/fast"] < manager.probe_latencies[server + "/medium"]
+
+
+def test_all_endpoints_failing_returns_original_list(server):
+    manager = NetworkManager()
+    endpoints = [{"name": "down", "url": server + "/down"}, {"name": "slow", "url": server + "/slow"}]
+    manager.config.API_ENDPOINTS = endpoints
+    assert manager.get_working_endpoints(concurrent=True, deadline=0.5) == endpoints
+    assert manager.probe_latencies == {}
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""令牌桶限速器测试"""
+
+import pytest
+
+import rate_limiter
+from rate_limiter import RateLimiter, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, "monotonic", fake)
+    return fake
+
+
+def test_burst_is_immediate_then_paced(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # 令牌耗尽后按速率排队，后来的请求排在已预定请求之后
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+
+
+def test_tokens_refill_up_to_burst(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    for _ in range(3):
+        bucket.reserve()
+    clock.now += 60
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+
+
+def test_endpoint_and_host_limits_combine(clock):
+    limiter = RateLimiter(endpoint_rate=10, endpoint_burst=1, host_rate=1, host_burst=2)
+    assert limiter.reserve("a", "http://example.com/x") == 0.0
+    # 端点a的桶已空
+    assert limiter.reserve("a", "http://example.com/y") == pytest.approx(0.1)
+    # 端点b有令牌，但主机的桶已空
+    assert limiter.reserve("b", "http://example.com/z") == pytest.approx(1.0)
+    # 其他主机不受影响
+    assert limiter.reserve("c", "http://other.example.com/") == 0.0
+
+
+def test_acquire_sleeps_for_reserved_wait(clock, monkeypatch):
+    slept = []
+    monkeypatch.setattr(rate_limiter.time, "sleep", slept.append)
+    limiter = RateLimiter(endpoint_rate=4, endpoint_burst=1, host_rate=100, host_burst=100)
+    limiter.acquire("a", "http://example.com/")
+    limiter.acquire("a", "http://example.com/")
+    assert slept == [pytest.approx(0.25)]
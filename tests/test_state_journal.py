@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""下载状态日志测试"""
+
+import json
+import os
+
+from state_journal import StatusJournal
+
+
+def snapshot(status_file):
+    with open(status_file, 'r', encoding='utf-8') as f:
+        return set(json.load(f))
+
+
+def journal_lines(journal):
+    if not os.path.exists(journal.journal_file):
+        return []
+    with open(journal.journal_file, 'r', encoding='utf-8') as f:
+        return f.read().splitlines()
+
+
+def test_records_survive_reload(tmp_path):
+    status_file = str(tmp_path / 'chapter.json')
+    journal = StatusJournal(status_file, fsync_every=2, compact_every=100)
+    assert journal.load() == set()
+    journal.record('1')
+    journal.record_many(['2', '3', '2'])
+    assert journal_lines(journal) == ['"1"', '"2"', '"3"']
+    journal.close()
+
+    reloaded = StatusJournal(status_file, compact_every=100)
+    assert reloaded.load() == {'1', '2', '3'}
+    # 加载时合并回快照，日志清空
+    assert snapshot(status_file) == {'1', '2', '3'}
+    assert not os.path.exists(reloaded.journal_file)
+
+
+def test_torn_last_line_is_ignored(tmp_path):
+    status_file = str(tmp_path / 'chapter.json')
+    with open(status_file, 'w', encoding='utf-8') as f:
+        json.dump(['1'], f)
+    with open(status_file + '.journal', 'w', encoding='utf-8') as f:
+        f.write('"2"\n"3"\n"4')
+    assert StatusJournal(status_file).load() == {'1', '2', '3'}
+
+
+def test_corrupt_line_stops_replay(tmp_path):
+    status_file = str(tmp_path / 'chapter.json')
+    with open(status_file + '.journal', 'w', encoding='utf-8') as f:
+        f.write('"1"\n{"2\n"3"\n')
+    assert StatusJournal(status_file).load() == {'1'}
+
+
+def test_compacts_when_journal_grows(tmp_path):
+    status_file = str(tmp_path / 'chapter.json')
+    journal = StatusJournal(status_file, compact_every=3)
+    journal.load()
+    journal.record_many(['1', '2'])
+    assert journal_lines(journal) == ['"1"', '"2"']
+    journal.record('3')
+    assert snapshot(status_file) == {'1', '2', '3'}
+    assert journal_lines(journal) == []
+    journal.record('4')
+    assert journal_lines(journal) == ['"4"']
+    journal.close()
+    assert StatusJournal(status_file).load() == {'1', '2', '3', '4'}
+
+
+def test_save_appends_only_new_chapters(tmp_path):
+    status_file = str(tmp_path / 'chapter.json')
+    journal = StatusJournal(status_file, compact_every=100)
+    journal.load()
+    journal.save({'1', '2'})
+    journal.save({'1', '2', '3'})
+    assert sorted(journal_lines(journal)) == ['"1"', '"2"', '"3"']
+    assert not os.path.exists(status_file)
+
+
+def test_save_with_removals_rewrites_snapshot(tmp_path):
+    status_file = str(tmp_path / 'chapter.json')
+    journal = StatusJournal(status_file, compact_every=100)
+    journal.load()
+    journal.record_many(['1', '2', '3'])
+    journal.save({'1', '3'})
+    assert snapshot(status_file) == {'1', '3'}
+    assert journal_lines(journal) == []
+    journal.close()
+    assert StatusJournal(status_file).load() == {'1', '3'}
+
+
+def test_clear_removes_snapshot_and_journal(tmp_path):
+    status_file = str(tmp_path / 'chapter.json')
+    journal = StatusJournal(status_file, compact_every=100)
+    journal.load()
+    journal.record('1')
+    journal.save({'1', '2'})
+    journal.clear()
+    assert not os.path.exists(status_file)
+    assert not os.path.exists(journal.journal_file)
+    assert StatusJournal(status_file).load() == set()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""章节标签快速提取测试"""
+
+import random
+
+from bs4 import BeautifulSoup
+
+from content_processor import ContentProcessor, strip_known_tags
+
+CHAPTER_HTML = (
+    '<header><div class="tt-title">第1章 开端</div></header>\n'
+    '<article>\n'
+    '<p idx="1">　　他推开门，看见&ldquo;老李&rdquo;</p>\r\n'
+    '<p idx="2">　　&quot;走吧&quot;，她说&nbsp;&amp;&nbsp;笑了。</p>\n'
+    '<p idx="3">第三段<br/>换行&#12290;&#x3002;</p>\n'
+    '</article>\n'
+    '<footer>  </footer>'
+)
+
+
+def soup_text(content):
+    return BeautifulSoup(content, 'html.parser').get_text()
+
+
+def test_representative_chapter_matches_beautifulsoup():
+    content = CHAPTER_HTML.replace('&ldquo;', '“').replace('&rdquo;', '”')
+    text = strip_known_tags(content)
+    assert text is not None
+    assert text == soup_text(content)
+
+
+def test_whitespace_only_text_between_tags_matches_beautifulsoup():
+    for content in ('<p>a</p>\r\n<p>b</p>', '<p>a</p>  <p>b</p>', '<p>\t&#13;</p>', '<p>a\r\n</p>'):
+        assert strip_known_tags(content) == soup_text(content)
+
+
+def test_unknown_tags_comments_and_entities_fall_back():
+    for content in ('<p>a</p><script>x</script>', '<p>a<!-- 注释 --></p>', '<p>a &amp b</p>',
+                    '<p>&ldquo;</p>', '<p>&copy2</p>', '<p>&#1;</p>', 'a > b'):
+        assert strip_known_tags(content) is None
+
+    processor = ContentProcessor(None)
+    processor.process_chapter_content('<p>正文。</p><table><tr><td>表格</td></tr></table>')
+    processor.process_chapter_content('<p>正文。</p>')
+    assert processor.path_stats == {"fast": 1, "soup": 1}
+
+
+def test_random_markup_matches_beautifulsoup():
+    pieces = ['<p idx="1">', '</p>', '<br/>', '<div class="x">', '</div>', '<span>', '</span>', '<b>', '</b>',
+              ' ', '\n', '\r\n', '\r', '\t', '\x0c', '\xa0', '　', '正文', 'a', ';', '#', '&', '&amp;', '&lt;',
+              '&gt;', '&quot;', '&apos;', '&nbsp;', '&#160;', '&#9;', '&#13;', '&#x41;', '&#128;', '&amp',
+              '&AMP;', '&copy;', '&#', '&中', '<!-- c -->', '<script>', '>']
+    rng = random.Random(0)
+    fast = 0
+    for _ in range(5000):
+        content = ''.join(rng.choice(pieces) for _ in range(rng.randint(1, 10)))
+        text = strip_known_tags(content)
+        if text is not None:
+            fast += 1
+            assert text == soup_text(content), content
+    assert fast > 1000
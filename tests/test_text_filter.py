@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""水印过滤测试"""
+
+from content_processor import clean_chapter_content
+from enhanced_downloader import format_chapter_content
+from text_filter import TextFilter, load_rules
+
+
+def test_line_end_rules_only_match_at_line_end():
+    text_filter = TextFilter(line_end=['兔兔', '【兔兔】'])
+    assert text_filter.apply('他说：兔兔很可爱。\n天亮了。兔兔 【兔兔】\n') == '他说：兔兔很可爱。\n天亮了。\n'
+
+
+def test_anywhere_rules_and_longest_match():
+    text_filter = TextFilter(anywhere=['广告', '广告位招租'])
+    assert text_filter.apply('正文广告位招租正文广告') == '正文正文'
+
+
+def test_load_rules_sections(tmp_path):
+    rules_file = tmp_path / 'rules.txt'
+    rules_file.write_text('# 注释\n水印甲\n[anywhere]\n广告乙\n[line_end]\n水印丙\n', encoding='utf-8')
+    assert load_rules(str(rules_file)) == {"line_end": ["水印甲", "水印丙"], "anywhere": ["广告乙"]}
+
+
+def test_clean_text_removes_watermarks_in_the_middle_of_a_chapter():
+    content = '第一段内容。兔兔\n第二段提到兔兔的名字。\n第三段。tutuxka\n第四段。'
+    cleaned = clean_chapter_content(content)
+    assert 'tutuxka' not in cleaned
+    assert '第一段内容。第二段' in cleaned.replace('\n', '').replace(' ', '')
+    assert '兔兔的名字' in cleaned
+
+
+def test_format_chapter_content_drops_watermark_only_lines():
+    content = '<p idx="1">第一段兔兔</p><p idx="2">兔兔</p><p idx="3">第三段</p>'
+    assert format_chapter_content(content).split('\n') == ['第一段', '    第三段']
+
+
+def test_paragraph_wrapped_watermarks_are_removed():
+    content = '<p idx="1">第一段内容。兔兔</p><p idx="2">第二段提到兔兔的名字。</p><p idx="3">第三段。（兔兔）</p>'
+    assert clean_chapter_content(content) == '第一段内容。第二段提到兔兔的名字。第三段。'
+    # 含未知标签时走BeautifulSoup，同样按段落匹配
+    fallback = content + '<table><tr><td>表格</td></tr></table>'
+    assert clean_chapter_content(fallback) == '第一段内容。第二段提到兔兔的名字。第三段。\n\n表格。'
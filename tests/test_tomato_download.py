@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""GUI下载流程测试（网络请求由桩函数代替）"""
+
+import json
+import os
+import threading
+
+import pytest
+
+from config import CONFIG
+from tomato_novel_api import EnhancedNovelDownloader
+
+BOOK_ID = "1000"
+
+
+def catalog(count):
+    return [{"id": str(7000 + idx), "title": f"第{idx + 1}章 标题{idx}", "index": idx} for idx in range(count)]
+
+
+@pytest.fixture
+def downloader(tmp_path, monkeypatch):
+    # 目录缓存、端点统计等文件写到临时目录
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(CONFIG["batch_config"], "enabled", False)
+    monkeypatch.setitem(CONFIG["content_pool_config"], "enabled", False)
+    monkeypatch.setitem(CONFIG, "api_endpoints", [{"name": "stub", "url": "http://127.0.0.1:9"}])
+    return EnhancedNovelDownloader()
+
+
+def stub_book(downloader, chapters, fetched, fail=()):
+    """目录和章节下载使用桩函数，记录请求过的章节"""
+    def bootstrap_book(book_id, headers, include_enhanced=True):
+        return {"chapters": chapters, "book_info": ("测试书", "作者", "简介"), "enhanced_info": None}
+
+    def down_text(chapter_id, headers, book_id=None):
+        fetched.append(chapter_id)
+        if chapter_id in fail:
+            return None, None
+        return "", f"正文{chapter_id}"
+
+    downloader.download_engine.bootstrap_book = bootstrap_book
+    downloader.download_engine.down_text = down_text
+
+
+def test_run_download_writes_txt_and_saves_catalog(tmp_path, downloader):
+    save_path = str(tmp_path / "books")
+    chapters = catalog(5)
+    fetched = []
+    stub_book(downloader, chapters, fetched)
+    downloader.run_download(BOOK_ID, save_path, 'txt', use_async=False)
+
+    with open(os.path.join(save_path, "测试书.txt"), 'r', encoding='utf-8') as f:
+        text = f.read()
+    assert text.startswith("书名: 测试书\n作者: 作者\n简介: 简介\n")
+    positions = [text.index(f"第{idx + 1}章 标题{idx}\n正文{7000 + idx}\n") for idx in range(5)]
+    assert positions == sorted(positions)
+
+    # 目录缓存已保存，文件写入后下载状态被清理
+    with open(os.path.join("catalog_cache", f"{BOOK_ID}.json"), 'r', encoding='utf-8') as f:
+        assert [ch["id"] for ch in json.load(f)["chapters"]] == [ch["id"] for ch in chapters]
+    assert downloader.state_manager.load_status(save_path) == set()
+
+
+def test_catalog_saved_even_if_file_write_fails(tmp_path, downloader):
+    save_path = str(tmp_path / "books")
+    chapters = catalog(3)
+    stub_book(downloader, chapters, [])
+    downloader.file_output_manager.save_as_txt = lambda *args: False
+    downloader.run_download(BOOK_ID, save_path, 'txt', use_async=False)
+    assert os.path.exists(os.path.join("catalog_cache", f"{BOOK_ID}.json"))
+    # 文件没有写入时保留下载状态
+    assert downloader.state_manager.load_status(save_path) == {ch["id"] for ch in chapters}
+
+
+class Crash(Exception):
+    pass
+
+
+def test_resume_after_crash_does_not_refetch_stored_chapters(tmp_path, downloader):
+    save_path = str(tmp_path / "books")
+    chapters = catalog(8)
+    fetched = []
+    stored = []
+    lock = threading.Lock()
+
+    def down_text(chapter_id, headers, book_id=None):
+        # 前3章下载成功后程序中断，之后的请求都没有结果
+        with lock:
+            if len(stored) >= 3:
+                return None, None
+            stored.append(chapter_id)
+        return "", f"正文{chapter_id}"
+
+    def progress(value, message):
+        if len(stored) >= 3 and message.startswith("单章下载进度"):
+            raise Crash()
+
+    stub_book(downloader, chapters, fetched)
+    downloader.download_engine.down_text = down_text
+    downloader.progress_callback = progress
+    with pytest.raises(Crash):
+        downloader.run_download(BOOK_ID, save_path, 'txt', use_async=False)
+    # 下载状态按轮保存，中断时还没有记录任何章节
+    assert downloader.state_manager.load_status(save_path) == set()
+
+    downloader.progress_callback = None
+    stub_book(downloader, chapters, fetched)
+    downloader.run_download(BOOK_ID, save_path, 'txt', use_async=False)
+    assert sorted(fetched) == sorted(ch["id"] for ch in chapters if ch["id"] not in stored)
+    with open(os.path.join(save_path, "测试书.txt"), 'r', encoding='utf-8') as f:
+        text = f.read()
+    assert all(f"正文{ch['id']}" in text for ch in chapters)
+
+
+def test_catalog_update_downloads_only_changes(tmp_path, downloader):
+    save_path = str(tmp_path / "books")
+    fetched = []
+    stub_book(downloader, catalog(5), fetched)
+    downloader.run_download(BOOK_ID, save_path, 'txt', use_async=False)
+
+    # 下载状态已在写入文件后清理，已下载章节从内容库恢复
+    fetched.clear()
+    chapters = catalog(6)
+    chapters[1]["title"] = "第2章 新标题"
+    stub_book(downloader, chapters, fetched)
+    downloader.run_download(BOOK_ID, save_path, 'txt', use_async=False)
+    assert sorted(fetched) == ["7001", "7005"]
+
+
+def test_run_download_writes_streaming_epub(tmp_path, downloader):
+    from ebooklib import epub
+
+    save_path = str(tmp_path / "books")
+    stub_book(downloader, catalog(3), [])
+    downloader.run_download(BOOK_ID, save_path, 'epub', use_async=False)
+
+    book = epub.read_epub(os.path.join(save_path, "测试书.epub"), {'ignore_ncx': False})
+    assert book.get_metadata('DC', 'title')[0][0] == "测试书"
+    assert book.get_metadata('DC', 'description')[0][0] == "简介"
+    assert [book.get_item_with_id(idref).file_name for idref, _ in book.spine][1:] == \
+        ['chap_0.xhtml', 'chap_1.xhtml', 'chap_2.xhtml']
+
+
+def test_results_released_after_run(tmp_path, downloader):
+    save_path = str(tmp_path / "books")
+    stub_book(downloader, catalog(3), [])
+    downloader.run_download(BOOK_ID, save_path, 'txt', use_async=False)
+    # 正文只保留在内容库中，需要时逐章读回
+    assert downloader.chapter_results._memory == {}
+    assert downloader.chapter_results[1]["content"] == "正文7001"
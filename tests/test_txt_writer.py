@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""TXT顺序写入测试"""
+
+import random
+
+import txt_writer
+from txt_writer import OrderedTxtWriter, format_txt_chapter
+
+HEADER = '书名：测试\n\n'
+
+
+def chapter(index, length=3):
+    return {"base_title": f"第{index + 1}章", "api_title": "标题" if index % 2 else "",
+            "content": f"正文{index}" * length}
+
+
+def expected(results, indexes):
+    return HEADER + ''.join(format_txt_chapter(results[index]) for index in sorted(indexes))
+
+
+def read(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def test_out_of_order_chapters_are_written_in_order(tmp_path):
+    output = str(tmp_path / 'book.txt')
+    results = {}
+    writer = OrderedTxtWriter(output, HEADER, range(5), results, reorder_buffer=10)
+    for index in (2, 0, 4, 1, 3):
+        results[index] = chapter(index)
+        writer.add(index)
+    writer.close()
+    assert read(output) == expected(results, range(5))
+
+
+def test_full_buffer_skips_gap_and_checkpoint_patches_it(tmp_path):
+    output = str(tmp_path / 'book.txt')
+    results = {index: chapter(index) for index in range(6)}
+    writer = OrderedTxtWriter(output, HEADER, range(6), results, reorder_buffer=2)
+    for index in (1, 2, 3):
+        writer.add(index)
+    # 缓冲区满后越过缺失的第0章写入
+    writer._file.flush()
+    assert read(output) == HEADER + ''.join(format_txt_chapter(results[i]) for i in (1, 2, 3))
+
+    writer.add(0)
+    writer.checkpoint()
+    assert read(output) == expected(results, range(4))
+
+    writer.add(5)
+    writer.add(4)
+    writer.close()
+    assert read(output) == expected(results, range(6))
+
+
+def test_unexpected_duplicate_and_missing_chapters(tmp_path):
+    output = str(tmp_path / 'book.txt')
+    results = {index: chapter(index) for index in range(4)}
+    results[9] = chapter(9)
+    writer = OrderedTxtWriter(output, HEADER, range(4), results, reorder_buffer=1)
+    for index in (9, 3, 3, 0, 0):
+        writer.add(index)
+    # 第1、2章一直没有到达
+    writer.close()
+    assert read(output) == expected(results, (0, 3))
+
+
+def test_random_arrival_order(tmp_path, monkeypatch):
+    # 小的移动块，补章节时分多块移动
+    monkeypatch.setattr(txt_writer, '_MOVE_CHUNK', 7)
+    rng = random.Random(0)
+    for round_number in range(200):
+        output = str(tmp_path / f'book{round_number}.txt')
+        count = rng.randint(0, 40)
+        arriving = [index for index in range(count) if rng.random() > 0.1]
+        rng.shuffle(arriving)
+        results = {}
+        writer = OrderedTxtWriter(output, HEADER, range(count), results, reorder_buffer=rng.randint(1, 8))
+        for index in arriving:
+            results[index] = chapter(index, rng.randint(1, 200))
+            writer.add(index)
+            if rng.random() < 0.1:
+                writer.checkpoint()
+        writer.close()
+        assert read(output) == expected(results, arriving), round_number
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+水印与广告过滤模块
+从规则文件构建多模式匹配器，对每章内容一次扫描移除所有水印和广告文本，GUI保存和下载处理共用
+"""
+
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        TEXT_FILTER_CONFIG = {
+            "enabled": True,
+            "rules_file": "filter_rules.txt"
+        }
+
+
+# 内置规则，规则文件中的规则会追加到这里
+DEFAULT_RULES = {
+    # 只在行末出现时移除（正文中可能出现同样的词）
+    "line_end": [
+        '兔兔',
+        '【兔兔】',
+        '（兔兔）',
+        'tutuxka',
+        'TUTUXKA',
+        '兔小说',
+        '兔读',
+        '兔书',
+    ],
+    # 出现在任何位置都移除
+    "anywhere": [],
+}
+
+# 行末水印前后的空白（含全角空格）
+_SPACES = r'[ \t　]*'
+
+
+def load_rules(rules_file: str) -> Dict[str, List[str]]:
+    """
+    读取规则文件
+
+    每行一个字面规则，# 开头为注释；[line_end] 和 [anywhere] 切换规则类型，
+    未指定类型的规则按 line_end 处理。
+    """
+    rules = {"line_end": [], "anywhere": []}
+    section = "line_end"
+    with open(rules_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if line.startswith('[') and line.endswith(']') and line[1:-1] in rules:
+                section = line[1:-1]
+                continue
+            rules[section].append(line)
+    return rules
+
+
+def _alternation(patterns: Iterable[str]) -> str:
+    """字面规则合并为一个分支，长规则优先"""
+    unique = sorted(set(patterns), key=len, reverse=True)
+    return '|'.join(re.escape(pattern) for pattern in unique)
+
+
+class TextFilter:
+    """字面规则过滤器，所有规则编译为一个多模式匹配器"""
+
+    def __init__(self, line_end: Iterable[str] = (), anywhere: Iterable[str] = ()):
+        """
+        Args:
+            line_end: 只在行末移除的规则（连续多个水印会一并移除）
+            anywhere: 在任何位置都移除的规则
+        """
+        branches = []
+        line_end = _alternation(p for p in line_end if p)
+        anywhere = _alternation(p for p in anywhere if p)
+        if line_end:
+            branches.append(f'{_SPACES}(?:{line_end})(?:{_SPACES}(?:{line_end}))*{_SPACES}$')
+        if anywhere:
+            branches.append(f'(?:{anywhere})')
+        self._pattern = re.compile('|'.join(branches), re.MULTILINE) if branches else None
+
+    @classmethod
+    def from_rules(cls, rules: Dict[str, List[str]]) -> "TextFilter":
+        return cls(rules.get("line_end", ()), rules.get("anywhere", ()))
+
+    def apply(self, text: str) -> str:
+        """移除文本中的水印和广告"""
+        if not text or self._pattern is None:
+            return text
+        return self._pattern.sub('', text)
+
+
+_default_filter: Optional[TextFilter] = None
+_default_lock = threading.Lock()
+
+
+def get_default_filter() -> TextFilter:
+    """获取由内置规则和规则文件构建的共享过滤器（每个进程只构建一次）"""
+    global _default_filter
+    with _default_lock:
+        if _default_filter is None:
+            config = Config.TEXT_FILTER_CONFIG
+            rules = {name: list(patterns) for name, patterns in DEFAULT_RULES.items()}
+            if not config["enabled"]:
+                rules = {}
+            elif os.path.exists(config["rules_file"]):
+                try:
+                    for name, patterns in load_rules(config["rules_file"]).items():
+                        rules[name].extend(patterns)
+                except Exception as e:
+                    print(f"读取过滤规则失败: {str(e)}")
+            _default_filter = TextFilter.from_rules(rules)
+        return _default_filter
+
+
+def filter_text(text: str) -> str:
+    """使用共享过滤器移除水印和广告"""
+    return get_default_filter().apply(text)
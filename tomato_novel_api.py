@@ -16,10 +16,21 @@ from typing import Optional, Callable
 # 导入新的模块化组件
 from config import CONFIG
 from network import NetworkManager
-from content_processor import ContentProcessor
+from content_processor import ContentProcessor, clean_chapter_content
 from download_engine import DownloadEngine
 from file_output import FileOutputManager
 from state_manager import StateManager
+from async_download_engine import AsyncDownloadEngine
+from api_sources import ApiSourceLoader
+from catalog_cache import CatalogCache, format_diff, stale_chapter_ids
+from batch_pipeline import pipeline_batches
+from batch_sizing import BatchEndpointError, BatchScheduler, BatchSizer
+from rate_limiter import RateLimiter
+from concurrency_controller import ConcurrencyManager, worker_count
+from endpoint_stats import EndpointStats
+from circuit_breaker import CircuitBreakerManager
+from content_pool import ContentProcessPool
+from chapter_store import ChapterResults, ChapterStore
 
 # 全局锁
 print_lock = threading.Lock()
@@ -31,7 +42,8 @@ class EnhancedNovelDownloader:
     def __init__(self):
         self.progress_callback = None
         self.is_cancelled = False
-        self.chapter_results = {}
+        self.chapter_results = ChapterResults()
+        self.chapter_store = None
         
         # 初始化模块化组件
         self.network_manager = NetworkManager()
@@ -39,13 +51,45 @@ class EnhancedNovelDownloader:
         self.download_engine = DownloadEngine(self.network_manager, self.content_processor)
         self.file_output_manager = FileOutputManager()
         self.state_manager = StateManager()
+        self.catalog_cache = CatalogCache()
+        self.rate_limiter = RateLimiter() if CONFIG["rate_limit_config"]["enabled"] else None
+        self.endpoint_stats = EndpointStats() if CONFIG["endpoint_stats_config"]["enabled"] else None
+        self.breakers = CircuitBreakerManager() if CONFIG["circuit_breaker_config"]["enabled"] else None
+        # 单章下载的线程池和异步引擎共用同一组限速器、端点统计和熔断器
+        self.download_engine.rate_limiter = self.rate_limiter
+        self.download_engine.endpoint_stats = self.endpoint_stats
+        self.download_engine.breakers = self.breakers
+        # 线程池下载时按端点自适应调整并发数
+        if CONFIG["concurrency_config"]["enabled"]:
+            self.download_engine.concurrency = ConcurrencyManager(initial_limit=CONFIG["max_workers"])
+        self.batch_sizer = BatchSizer(CONFIG["batch_config"]["max_batch_size"])
         
     def cancel_download(self):
         """取消下载"""
         self.is_cancelled = True
         
-    def run_download(self, book_id, save_path, file_format='txt', start_chapter=None, end_chapter=None):
-        """运行下载"""
+    def run_download(self, book_id, save_path, file_format='txt', start_chapter=None, end_chapter=None, use_async=None):
+        """
+        运行下载
+        
+        Args:
+            book_id: 书籍ID
+            save_path: 保存路径
+            file_format: 文件格式 ('txt' 或 'epub')
+            start_chapter: 起始章节（可选，从0开始）
+            end_chapter: 结束章节（可选，包含）
+            use_async: 单章下载是否使用异步引擎（可选，默认读取 async_config）
+        """
+        if use_async is None:
+            use_async = CONFIG["async_config"]["enabled"]
+        if use_async and not AsyncDownloadEngine.is_available():
+            print("未安装aiohttp，单章下载回退到线程池模式")
+            use_async = False
+        
+        if CONFIG["content_pool_config"]["enabled"]:
+            self.download_engine.content_pool = ContentProcessPool(clean_chapter_content)
+        self.content_processor.reset_path_stats()
+        
         try:
             # 初始化API端点
             if not CONFIG["api_endpoints"]:
@@ -53,11 +97,13 @@ class EnhancedNovelDownloader:
                 self.network_manager.fetch_api_endpoints_from_server()
             
             headers = self.network_manager.get_headers()
-            chapters = self.download_engine.get_chapters_from_api(book_id, headers)
+            # 书籍页面与目录并发获取
+            book = self.download_engine.bootstrap_book(book_id, headers, include_enhanced=False)
+            chapters = book["chapters"]
             if not chapters:
                 raise Exception("未找到任何章节，请检查小说ID是否正确。")
             
-            name, author_name, description = self.download_engine.get_book_info(book_id, headers)
+            name, author_name, description = book["book_info"]
             if not name:
                 name = f"未知小说_{book_id}"
                 author_name = "未知作者"
@@ -70,7 +116,24 @@ class EnhancedNovelDownloader:
             else:
                 output_filename = f"{name}.{file_format}"
 
+            # 与上次目录对比，改名的章节重新下载，移除的章节不再计入；目录缓存在下载结束后更新
+            catalog_diff = self.catalog_cache.compare(book_id, book["chapters"])
             downloaded = self.state_manager.load_status(save_path)
+            # 已下载章节的内容从内容库恢复，内容库中没有的章节需要重新下载
+            self.chapter_store = ChapterStore(save_path, book_id)
+            if catalog_diff is not None:
+                print(format_diff(catalog_diff))
+                stale_ids = stale_chapter_ids(catalog_diff)
+                downloaded -= stale_ids
+                # 内容库与下载状态保持一致
+                self.chapter_store.discard(stale_ids)
+            # 正文超过内存预算时只保留在内容库中，写入文件时逐章读回
+            self.chapter_results = ChapterResults(self.chapter_store)
+            if self.chapter_store.enabled:
+                # 内容库逐章写入，下载状态按轮保存：中断前已写入内容库的章节即使不在下载状态中也已完成
+                restored = self.chapter_results.restore(chapters)
+                downloaded -= {ch["id"] for ch in chapters if ch["id"] in downloaded} - restored
+                downloaded |= restored
             todo_chapters = [ch for ch in chapters if ch["id"] not in downloaded]
             
             if self.progress_callback:
@@ -82,7 +145,6 @@ class EnhancedNovelDownloader:
             
             success_count = 0
             failed_chapters = []
-            self.chapter_results = {}
             lock = threading.Lock()
 
             # 批量下载模式
@@ -90,22 +152,50 @@ class EnhancedNovelDownloader:
                 if self.progress_callback:
                     self.progress_callback(10, "启用qyuing API批量下载模式...")
                     
-                batch_size = CONFIG["batch_config"]["max_batch_size"]
+                batch_config = CONFIG["batch_config"]
+                # 批次大小随响应情况调整，缺少章节时拆分后重新排队
+                scheduler = BatchScheduler(todo_chapters, self.batch_sizer, batch_config["name"])
+                
+                def fetch_batch(item_ids):
+                    results = self.content_processor.batch_download_chapters(item_ids, headers)
+                    if not results:
+                        # 请求错误在内部处理，一章都没有拿到时按端点失败处理，不拆分重试
+                        raise BatchEndpointError("批量下载没有返回任何章节")
+                    return results
+                
+                def save_batch_chapter(chap, processed):
+                    nonlocal success_count
+                    result = {
+                        "base_title": chap["title"],
+                        "api_title": "",
+                        "content": processed
+                    }
+                    self.chapter_results.add(chap["id"], chap["index"], result)
+                    with lock:
+                        downloaded.add(chap["id"])
+                        success_count += 1
                 
-                for i in range(0, len(todo_chapters), batch_size):
+                content_pool = self.download_engine.content_pool
+                
+                # 多个批量请求同时在途，按完成顺序处理
+                for batch, batch_results in pipeline_batches(
+                    scheduler.next_batch,
+                    scheduler.timed(fetch_batch),
+                    depth=batch_config.get("pipeline_depth", 1),
+                    is_cancelled=lambda: self.is_cancelled,
+                    rate_limiter=self.rate_limiter,
+                    rate_key=(batch_config["name"], batch_config.get("base_url") or "")
+                ):
                     if self.is_cancelled:
                         break
-                        
-                    batch = todo_chapters[i:i + batch_size]
-                    item_ids = [chap["id"] for chap in batch]
                     
+                    # 没有拿到内容的章节由调度器拆分重试或转为单章下载
+                    failed_chapters.extend(scheduler.resolve(batch, batch_results))
                     if self.progress_callback:
-                        progress = 10 + (i / len(todo_chapters)) * 60
-                        self.progress_callback(progress, f"批量下载第 {i//batch_size + 1} 批...")
+                        progress = 10 + (scheduler.resolved / len(todo_chapters)) * 60
+                        self.progress_callback(progress, f"批量下载 {scheduler.resolved}/{len(todo_chapters)} 章...")
                     
-                    batch_results = self.content_processor.batch_download_chapters(item_ids, headers)
                     if not batch_results:
-                        failed_chapters.extend(batch)
                         continue
                     
                     for chap in batch:
@@ -113,20 +203,17 @@ class EnhancedNovelDownloader:
                         if isinstance(content, dict):
                             content = content.get("content", "")
                         
-                        if content:
-                            processed = self.content_processor.process_chapter_content(content)
-                            with lock:
-                                self.chapter_results[chap["index"]] = {
-                                    "base_title": chap["title"],
-                                    "api_title": "",
-                                    "content": processed
-                                }
-                                downloaded.add(chap["id"])
-                                success_count += 1
+                        if not content:
+                            continue
+                        if content_pool:
+                            # 整批提交给进程池，不逐章等待处理结果
+                            content_pool.submit(content, lambda processed, chap=chap: save_batch_chapter(chap, processed))
                         else:
-                            with lock:
-                                failed_chapters.append(chap)
+                            save_batch_chapter(chap, self.download_engine.process_content(content))
                 
+                if content_pool:
+                    content_pool.join()
+                self.batch_sizer.save()
                 todo_chapters = failed_chapters.copy()
                 failed_chapters = []
                 self.state_manager.save_status(save_path, downloaded)
@@ -136,51 +223,88 @@ class EnhancedNovelDownloader:
                 if self.progress_callback:
                     self.progress_callback(70, f"开始单章下载模式，剩余 {len(todo_chapters)} 个章节...")
                 
-                def download_task(chapter):
+                def handle_result(chapter, title, content):
                     nonlocal success_count
+                    if content:
+                        result = {
+                            "base_title": chapter["title"],
+                            "api_title": title,
+                            "content": content
+                        }
+                        self.chapter_results.add(chapter["id"], chapter["index"], result)
+                        with lock:
+                            downloaded.add(chapter["id"])
+                            success_count += 1
+                    else:
+                        with lock:
+                            failed_chapters.append(chapter)
+
+                def download_task(chapter):
                     try:
                         if self.is_cancelled:
                             return
                             
                         title, content = self.download_engine.down_text(chapter["id"], headers, book_id)
-                        if content:
-                            with lock:
-                                self.chapter_results[chapter["index"]] = {
-                                    "base_title": chapter["title"],
-                                    "api_title": title,
-                                    "content": content
-                                }
-                                downloaded.add(chapter["id"])
-                                success_count += 1
-                        else:
-                            with lock:
-                                failed_chapters.append(chapter)
+                        handle_result(chapter, title, content)
                     except Exception as e:
                         with lock:
                             failed_chapters.append(chapter)
 
-                # 使用线程池下载
-                from concurrent.futures import ThreadPoolExecutor, as_completed
-                with ThreadPoolExecutor(max_workers=CONFIG["max_workers"]) as executor:
-                    futures = [executor.submit(download_task, ch) for ch in todo_chapters]
-                    
-                    completed_count = 0
-                    for future in as_completed(futures):
-                        if self.is_cancelled:
-                            break
-                        completed_count += 1
-                        if self.progress_callback:
-                            progress = 70 + (completed_count / len(todo_chapters)) * 25
-                            self.progress_callback(progress, f"单章下载进度: {completed_count}/{len(todo_chapters)}")
+                def report_progress(completed_count, total):
+                    if self.progress_callback:
+                        progress = 70 + (completed_count / total) * 25
+                        self.progress_callback(progress, f"单章下载进度: {completed_count}/{total}")
+
+                if use_async:
+                    # 使用异步引擎下载
+                    engine = AsyncDownloadEngine(
+                        self.download_engine.build_chapter_requests,
+                        self.download_engine.parse_chapter_response,
+                        max_concurrency=CONFIG["async_config"]["max_concurrency"],
+                        timeout=CONFIG["request_timeout"],
+                        is_cancelled=lambda: self.is_cancelled,
+                        rate_limiter=self.rate_limiter,
+                        record_attempt=self.download_engine.record_endpoint,
+                        breakers=self.breakers,
+                        fallback=lambda chapter_id: self.download_engine.batch_fallback(chapter_id, headers)
+                    )
+                    engine.download(todo_chapters, headers, handle_result, report_progress)
+                else:
+                    # 使用线程池下载
+                    from concurrent.futures import ThreadPoolExecutor, as_completed
+                    # 自适应并发时线程池按上限创建，实际并发由各端点控制器限制
+                    with ThreadPoolExecutor(max_workers=worker_count()) as executor:
+                        futures = [executor.submit(download_task, ch) for ch in todo_chapters]
+                        
+                        completed_count = 0
+                        for future in as_completed(futures):
+                            if self.is_cancelled:
+                                break
+                            completed_count += 1
+                            report_progress(completed_count, len(todo_chapters))
                 
                 self.state_manager.save_status(save_path, downloaded)
+                if self.endpoint_stats:
+                    self.endpoint_stats.save()
 
+            if not self.is_cancelled:
+                # 改名和移除的章节已从下载状态和内容库中去掉，之后再更新目录缓存（与文件是否写入成功无关）
+                self.catalog_cache.save(book_id, book["chapters"])
+            
             # 保存文件
             if not self.is_cancelled and self.chapter_results:
                 if self.progress_callback:
                     self.progress_callback(95, "正在保存文件...")
                 
-                self._write_downloaded_chapters_in_order(output_file_path, name, author_name, description, file_format)
+                if self._write_downloaded_chapters_in_order(output_file_path, name, author_name, description,
+                                                            file_format, book["chapters"]):
+                    # 文件已写入，清理下载状态；内容库保留，下次运行从内容库恢复，只下载目录的变化部分
+                    self.state_manager.clear_status(save_path)
+                
+                # 进程池模式下内容在子进程中处理，不在这里统计
+                if not self.download_engine.content_pool:
+                    with print_lock:
+                        print(self.content_processor.path_stats_summary())
                 
                 if self.progress_callback:
                     self.progress_callback(100, f"下载完成！成功下载 {success_count} 个章节")
@@ -189,33 +313,44 @@ class EnhancedNovelDownloader:
             if self.progress_callback:
                 self.progress_callback(-1, f"下载错误: {str(e)}")
             raise e
+        finally:
+            # 页面缓存只在本次下载内有效
+            self.download_engine.book_page_cache.invalidate(book_id)
+            if self.chapter_store:
+                # 下载结果都已在内容库中，下载结束后不再占用内存
+                self.chapter_results.release()
+                self.chapter_store.close()
+            if self.download_engine.content_pool:
+                self.download_engine.content_pool.shutdown()
+                self.download_engine.content_pool = None
 
-    def _write_downloaded_chapters_in_order(self, output_file_path, name, author_name, description, file_format):
-        """按章节顺序写入文件"""
+    def _write_downloaded_chapters_in_order(self, output_file_path, name, author_name, description, file_format,
+                                            chapters):
+        """
+        按章节顺序写入文件
+        
+        Args:
+            chapters: 完整目录，chapter_results 按其中的章节序号保存
+        
+        Returns:
+            是否写入成功
+        """
         if not self.chapter_results:
-            return
+            return False
             
         if file_format == 'txt':
-            self.file_output_manager.save_as_txt(output_file_path, {
-                'book_name': name,
+            return self.file_output_manager.save_as_txt(output_file_path, {
+                'name': name,
                 'author': author_name,
-                'abstract': description
-            }, self.chapter_results)
+                'description': description
+            }, chapters, self.chapter_results)
         elif file_format == 'epub':
-            self.file_output_manager.save_as_epub(output_file_path, {
-                'book_name': name,
+            return self.file_output_manager.save_as_epub(output_file_path, {
+                'name': name,
                 'author': author_name,
-                'abstract': description
-            }, self.chapter_results)
-            
-        # 下载完成后自动清理chapter.json
-        try:
-            import os
-            status_file = os.path.join(os.path.dirname(output_file_path), CONFIG["status_file"])
-            if os.path.exists(status_file):
-                os.remove(status_file)
-        except Exception as e:
-            print(f"自动清理chapter.json失败: {e}")
+                'description': description
+            }, chapters, self.chapter_results)
+        return False
 
 
 class TomatoNovelAPI:
@@ -232,13 +367,17 @@ class TomatoNovelAPI:
         # 初始化模块化组件
         self.network_manager = NetworkManager()
         self.content_processor = ContentProcessor(self.network_manager)
-        self.download_engine = DownloadEngine(self.network_manager, self.content_processor)
+        # 与下载器共用书籍页面缓存，获取小说信息时解析的页面可直接用于下载
+        self.download_engine = DownloadEngine(
+            self.network_manager, self.content_processor,
+            book_page_cache=self.enhanced_downloader.download_engine.book_page_cache
+        )
         self.file_output_manager = FileOutputManager()
         self.state_manager = StateManager()
         
-        # 初始化API端点
+        # 初始化API端点（优先使用本地缓存，后台刷新）
         if not CONFIG["api_endpoints"]:
-            self.network_manager.fetch_api_endpoints_from_server()
+            ApiSourceLoader(self.network_manager.session).load(self.network_manager.get_headers)
     
     def search_novels(self, keyword, offset=0, tab_type=1):
         """
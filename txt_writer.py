@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+"""
+TXT顺序写入模块
+章节到达后只要前面的章节都已写入就立即追加到文件；乱序到达的章节在重排缓冲区中等待，
+缓冲区满或到检查点时越过缺失章节继续写入，缺失章节之后补上时借助章节偏移索引只重写其后的部分
+"""
+
+import os
+import threading
+from typing import Any, Dict, Iterable, Mapping, Optional
+
+try:
+    from config import Config
+except ImportError:
+    class Config:
+        TXT_WRITER_CONFIG = {
+            "enabled": True,
+            "reorder_buffer": 1000
+        }
+
+# 补章节时移动文件内容的块大小
+_MOVE_CHUNK = 1024 * 1024
+
+
+def format_txt_chapter(result: Dict[str, Any]) -> str:
+    """TXT中一个章节的文本"""
+    title = f'{result["base_title"]} {result["api_title"]}' if result["api_title"] else result["base_title"]
+    return f"{title}\n{result['content']}\n\n"
+
+
+class OrderedTxtWriter:
+    """按章节顺序增量写入TXT文件"""
+
+    def __init__(self, output_file: str, header: str, indexes: Iterable[int],
+                 results: Mapping[int, Dict[str, Any]], reorder_buffer: Optional[int] = None):
+        """
+        Args:
+            output_file: 输出文件（会被覆盖）
+            header: 文件开头的书籍信息
+            indexes: 本次输出包含的章节序号
+            results: 章节序号 -> 下载结果，写入时从这里读取正文
+            reorder_buffer: 最多等待多少个乱序到达的章节，超过后越过缺失章节继续写入
+        """
+        self.output_file = output_file
+        self.results = results
+        self.reorder_buffer = max(1, reorder_buffer or Config.TXT_WRITER_CONFIG["reorder_buffer"])
+        self._order = sorted(set(indexes))
+        self._expected = set(self._order)
+        self._position = 0
+        # 已到达但还没写入的章节（只保存序号，正文写入时再读取）
+        self._arrived = set()
+        # 写入位置之前缺失、之后才到达的章节，检查点时插入
+        self._patches = set()
+        # 章节序号 -> (起始偏移, 结束偏移)，按写入顺序即章节顺序排列
+        self._offsets: Dict[int, tuple] = {}
+        self._lock = threading.Lock()
+        self._file = open(output_file, 'wb+')
+        self._file.write(header.encode('utf-8'))
+        self._end = self._file.tell()
+
+    def add(self, index: int):
+        """通知章节已到达"""
+        with self._lock:
+            if index not in self._expected or index in self._offsets or index in self._arrived:
+                return
+            if self._position and index < self._order[self._position - 1]:
+                self._patches.add(index)
+                return
+            self._arrived.add(index)
+            self._advance()
+            if len(self._arrived) > self.reorder_buffer:
+                self._skip_gaps()
+
+    def checkpoint(self):
+        """写入所有已到达的章节（越过缺失章节），补上之前缺失的章节并同步到磁盘"""
+        with self._lock:
+            self._skip_gaps()
+            self._apply_patches()
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        """写入剩余章节并关闭文件"""
+        with self._lock:
+            if self._file.closed:
+                return
+        try:
+            self.checkpoint()
+        finally:
+            self._file.close()
+
+    def _advance(self):
+        """按顺序写入所有前面已连续的章节"""
+        while self._position < len(self._order) and self._order[self._position] in self._arrived:
+            index = self._order[self._position]
+            self._arrived.discard(index)
+            self._append(index)
+            self._position += 1
+
+    def _skip_gaps(self):
+        """写入缓冲区中的章节，越过的缺失章节之后再补"""
+        if not self._arrived:
+            return
+        last = max(self._arrived)
+        while self._position < len(self._order) and self._order[self._position] <= last:
+            index = self._order[self._position]
+            if index in self._arrived:
+                self._arrived.discard(index)
+                self._append(index)
+            self._position += 1
+
+    def _append(self, index: int):
+        data = self._encode(index)
+        if data is None:
+            return
+        self._file.seek(self._end)
+        self._file.write(data)
+        self._offsets[index] = (self._end, self._end + len(data))
+        self._end += len(data)
+
+    def _apply_patches(self):
+        """
+        把之前缺失的章节插入到正确位置
+
+        按偏移索引把第一个插入位置之后的章节从后往前整体后移，再写入补上的章节，
+        只移动插入位置之后的部分，不重写整个文件。
+        """
+        if not self._patches:
+            return
+        patches = sorted(self._patches)
+        self._patches.clear()
+        sizes = {}
+        for index in patches:
+            data = self._encode(index)
+            if data is not None:
+                sizes[index] = len(data)
+        later = sorted(index for index in self._offsets if index > patches[0])
+
+        # 计算新的偏移
+        offsets = {}
+        position = self._offsets[later[0]][0] if later else self._end
+        for index in sorted(later + list(sizes)):
+            if index in sizes:
+                size = sizes[index]
+            else:
+                size = self._offsets[index][1] - self._offsets[index][0]
+            offsets[index] = (position, position + size)
+            position += size
+
+        # 从最后一章开始后移，移动时不会覆盖还没移动的内容
+        for index in reversed(later):
+            self._move(self._offsets[index], offsets[index][0])
+        for index in sizes:
+            self._file.seek(offsets[index][0])
+            self._file.write(self._encode(index))
+        self._offsets.update(offsets)
+        self._end = position
+
+    def _move(self, span: tuple, new_start: int):
+        """把文件中 span 范围的内容移动到 new_start（new_start 不小于原起始位置），从尾部分块复制"""
+        start, end = span
+        if new_start == start:
+            return
+        remaining = end - start
+        while remaining:
+            size = min(_MOVE_CHUNK, remaining)
+            remaining -= size
+            self._file.seek(start + remaining)
+            data = self._file.read(size)
+            self._file.seek(new_start + remaining)
+            self._file.write(data)
+
+    def _encode(self, index: int):
+        try:
+            result = self.results[index]
+        except KeyError:
+            return None
+        return format_txt_chapter(result).encode('utf-8')